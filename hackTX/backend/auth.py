@@ -0,0 +1,153 @@
+"""
+Signed session tokens
+
+Tokens are verified without a lookup; only sign-outs are stored, in the
+revoked_tokens table shared by every worker, until the token expires.
+Each worker checks tokens against an in-memory copy of that table.
+"""
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from fastapi import HTTPException, Request
+from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from .config import settings
+from .database import AsyncSessionLocal
+from .models import RevokedToken
+
+
+class TokenDenylist:
+    """
+    In-memory copy of the revoked token IDs in revoked_tokens
+
+    The copy is reloaded at most once per `sync_seconds`, by the first
+    token check after that interval, so checks cost no query. A logout is
+    enforced at once on the worker that handled it and on the others
+    within `sync_seconds`. The table only holds unexpired tokens' IDs,
+    so a reload stays small.
+    """
+
+    def __init__(self, sync_seconds: float = 10.0):
+        self._revoked: Dict[str, float] = {}
+        self._sync_seconds = sync_seconds
+        self._synced_at = float("-inf")
+
+    def add(self, jti: str, expires_at: float) -> None:
+        self._revoked[jti] = expires_at
+        self._purge()
+
+    def __contains__(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    async def _sync(self) -> None:
+        now = time.monotonic()
+        if now - self._synced_at < self._sync_seconds:
+            return
+        # Claimed before the query so concurrent checks do not reload too
+        self._synced_at = now
+
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(RevokedToken.jti, RevokedToken.expires_at)
+                    .where(RevokedToken.expires_at > datetime.now())
+                )).all()
+        except Exception as e:
+            print(f"Error loading revoked tokens: {e}")
+            return
+
+        for jti, expires_at in rows:
+            self._revoked[jti] = expires_at.timestamp()
+        self._purge()
+
+    async def is_revoked(self, jti: str) -> bool:
+        """Whether `jti` was revoked, as of the last sync"""
+        await self._sync()
+        return jti in self
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        """Record `jti` as revoked for every worker"""
+        self.add(jti, expires_at)
+        async with AsyncSessionLocal() as db:
+            db.add(RevokedToken(jti=jti, expires_at=datetime.fromtimestamp(expires_at)))
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Already revoked, e.g. by a repeated logout
+                await db.rollback()
+
+    def _purge(self) -> None:
+        now = time.time()
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+
+
+token_denylist = TokenDenylist(settings.token_revocation_sync_seconds)
+
+
+def create_access_token(user) -> str:
+    """Issue a signed, expiring token carrying the user's public info"""
+    now = datetime.now(timezone.utc)
+    claims = {
+        "sub": str(user.id),
+        "email": user.email,
+        "name": user.name,
+        "picture": user.picture,
+        "google_id": user.google_id,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + timedelta(minutes=settings.access_token_expire_minutes)
+    }
+    return jwt.encode(claims, settings.secret_key, algorithm=settings.algorithm)
+
+
+async def _decode(token: str) -> Dict:
+    try:
+        claims = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    if claims.get("jti") and await token_denylist.is_revoked(claims["jti"]):
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    return claims
+
+
+async def get_user_from_token(token: str) -> Dict:
+    """Verify a token and return the user info it carries"""
+    claims = await _decode(token)
+    return {
+        "user_id": int(claims["sub"]),
+        "email": claims.get("email"),
+        "name": claims.get("name"),
+        "picture": claims.get("picture"),
+        "google_id": claims.get("google_id")
+    }
+
+
+async def revoke_token(token: str) -> None:
+    """Deny a token on every worker until it expires; invalid tokens are ignored"""
+    try:
+        claims = await _decode(token)
+    except HTTPException:
+        return
+    await token_denylist.revoke(claims["jti"], float(claims["exp"]))
+
+
+def get_bearer_token(request: Request) -> str:
+    """Extract the token from an `Authorization: Bearer` header"""
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing or invalid authorization token")
+
+    return auth_header.replace("Bearer ", "")
+
+
+async def get_current_user(request: Request) -> Dict:
+    """FastAPI dependency for routes that require a signed-in user"""
+    return await get_user_from_token(get_bearer_token(request))
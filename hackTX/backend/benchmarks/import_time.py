@@ -0,0 +1,172 @@
+"""
+Cold-start benchmark: time to import backend.main and to run its startup
+
+Every run is a fresh interpreter, as for a new worker or replica. The
+import is timed separately from the lifespan startup, and `-X importtime`
+attributes the import to the packages it pulled in. The LLM
+backend is the fake one and the start-up prewarm is off, so runs make no
+network calls.
+
+Usage (from the hackTX directory):
+    python -m backend.benchmarks.import_time --runs 10
+    python -m backend.benchmarks.import_time --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .load_test import _git_commit
+
+HACKTX_DIR = Path(__file__).resolve().parents[2]
+
+# Runs in the child interpreter; prints the timings as JSON
+CHILD_SCRIPT = """
+import asyncio, json, time
+started = time.perf_counter()
+import backend.main
+imported = time.perf_counter()
+
+async def start():
+    async with backend.main.app.router.lifespan_context(backend.main.app):
+        pass
+
+asyncio.run(start())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (time.perf_counter() - imported) * 1000
+}))
+"""
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure backend import and startup time")
+    parser.add_argument("--runs", type=int, default=10, help="measured runs (one warm-up run is discarded)")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to report")
+    parser.add_argument("--init-schema", action="store_true", help="create the schema during startup")
+    parser.add_argument("--database-url", help="defaults to a fresh SQLite file")
+    parser.add_argument("--output", default="import_time_results.json")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    return parser.parse_args(argv)
+
+
+def child_environment(args: argparse.Namespace) -> Dict[str, str]:
+    database_url = args.database_url
+    if not database_url:
+        database_url = f"sqlite:///{Path(tempfile.mkdtemp(prefix='tachyon-import-')) / 'bench.db'}"
+
+    return {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "LLM_BACKEND": "fake",
+        "PREWARM_ON_STARTUP": "false",
+        "INIT_SCHEMA_ON_STARTUP": "true" if args.init_schema else "false",
+        "PYTHONWARNINGS": "ignore"
+    }
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Cumulative milliseconds of every module in `-X importtime` output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative) / 1000
+    # The entry points include everything and say nothing
+    modules.pop("backend", None)
+    modules.pop("backend.main", None)
+    return modules
+
+
+def run_once(env: Dict[str, str]) -> Dict:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT],
+        capture_output=True, text=True, cwd=HACKTX_DIR, env=env
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup failed:\n{completed.stderr[-2000:]}")
+
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings["modules"] = parse_importtime(completed.stderr)
+    return timings
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(values), 1),
+        "min_ms": round(min(values), 1),
+        "max_ms": round(max(values), 1)
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict:
+    env = child_environment(args)
+    # Warm-up: compiles bytecode and creates the database file
+    run_once({**env, "INIT_SCHEMA_ON_STARTUP": "true"})
+
+    runs = [run_once(env) for _ in range(args.runs)]
+
+    module_times = defaultdict(list)
+    for run in runs:
+        for name, ms in run["modules"].items():
+            module_times[name].append(ms)
+    slowest = sorted(
+        ((name, statistics.median(times)) for name, times in module_times.items()),
+        key=lambda item: item[1],
+        reverse=True
+    )[:args.top]
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "config": vars(args),
+        "import": summarize([run["import_ms"] for run in runs]),
+        "startup": summarize([run["startup_ms"] for run in runs]),
+        "total": summarize([run["import_ms"] + run["startup_ms"] for run in runs]),
+        "slowest_imports_ms": {name: round(ms, 1) for name, ms in slowest}
+    }
+
+
+def print_report(results: Dict) -> None:
+    print(f"{'phase':<10}{'median':>10}{'min':>10}{'max':>10}")
+    for phase in ("import", "startup", "total"):
+        stats = results[phase]
+        print(f"{phase:<10}{stats['median_ms']:>10}{stats['min_ms']:>10}{stats['max_ms']:>10}")
+    print("\nslowest imports (cumulative ms):")
+    for name, ms in results["slowest_imports_ms"].items():
+        print(f"  {name:<50}{ms:>8}")
+
+
+def compare(current: Dict, previous: Dict) -> None:
+    """Print median changes against an earlier run"""
+    print(f"\nCompared with {previous.get('git_commit') or 'previous run'}:")
+    for phase in ("import", "startup", "total"):
+        new = current[phase]["median_ms"]
+        old = previous.get(phase, {}).get("median_ms")
+        if old:
+            print(f"  {phase} {old} -> {new} ms ({(new - old) / old * 100:+.1f}%)")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+
+    results = run_benchmark(args)
+    print_report(results)
+
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+End-to-end load test for the interview and expansion flows
+
+Drives the real FastAPI app with many virtual users, each of which starts
+an interview, answers until it completes, waits for the background
+scenarios and then expands a few nodes. The LLM is the fake backend with
+simulated latency, so runs are offline and reproducible.
+
+Usage (from the hackTX directory):
+    python -m backend.benchmarks.load_test --users 50 --concurrency 20
+    python -m backend.benchmarks.load_test --transport uvicorn --output after.json --compare before.json
+
+Results are written as JSON for comparing commits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import httpx
+
+
+BENCHMARK_PROFILE = {
+    "income": 85000,
+    "credit_score": 720,
+    "location": "Austin, TX",
+    "preferred_lease_or_buy": "buy",
+    "vehicle_preferences": "Hybrid sedan"
+}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the Tachyon API with a fake LLM")
+    parser.add_argument("--users", type=int, default=20, help="virtual users in total")
+    parser.add_argument("--concurrency", type=int, default=10, help="virtual users running at once")
+    parser.add_argument("--answers", type=int, default=6, help="answers before the interview completes")
+    parser.add_argument("--expansions", type=int, default=4, help="expand-node calls per user")
+    parser.add_argument("--stream", action="store_true", help="submit answers via the SSE endpoint")
+    parser.add_argument("--transport", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--port", type=int, default=8765, help="port for --transport uvicorn")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="mean fake LLM latency")
+    parser.add_argument("--latency-jitter", type=float, default=0.5)
+    parser.add_argument("--latency-distribution", choices=("fixed", "uniform", "lognormal"), default="lognormal")
+    parser.add_argument("--llm-rpm", type=int, default=100000, help="gateway request quota per minute")
+    parser.add_argument("--job-workers", type=int, default=4, help="post-interview job workers")
+    parser.add_argument("--database-url", help="defaults to a fresh SQLite file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tracemalloc", action="store_true", help="track Python heap peak (slower)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Settings are read at import, so this must run before importing the app"""
+    database_url = args.database_url
+    if not database_url:
+        database_url = f"sqlite:///{Path(tempfile.mkdtemp(prefix='tachyon-bench-')) / 'bench.db'}"
+
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+        "FAKE_LLM_LATENCY_JITTER": str(args.latency_jitter),
+        "FAKE_LLM_LATENCY_DISTRIBUTION": args.latency_distribution,
+        "FAKE_LLM_INTERVIEW_TURNS": str(args.answers),
+        "FAKE_LLM_SEED": str(args.seed),
+        "LLM_REQUESTS_PER_MINUTE": str(args.llm_rpm),
+        "INTERVIEW_JOB_WORKERS": str(args.job_workers),
+        "DB_SLOW_REQUEST_MS": "1000000",
+        "INIT_SCHEMA_ON_STARTUP": "true",
+        "PREWARM_ON_STARTUP": "false"
+    })
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.fmean(values) * 1000, 2),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2)
+    }
+
+
+class Recorder:
+    """Collects per-endpoint latencies and errors"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.flow_times: List[float] = []
+        self.scenario_wait: List[float] = []
+        self.failed_users = 0
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.errors[name] += 1
+            raise
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a sleeping task"""
+
+    def __init__(self, interval: float = 0.01):
+        self._interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self._interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self._interval))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def run_user(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    token: str,
+    index: int,
+    args: argparse.Namespace
+) -> None:
+    """One virtual user: interview, wait for scenarios, expand nodes"""
+    headers = {"Authorization": f"Bearer {token}"}
+    flow_started = time.perf_counter()
+
+    response = await recorder.request(client, "POST /api/interview/start", "POST", "/api/interview/start", headers=headers)
+    response.raise_for_status()
+    session_id = response.json()["session_id"]
+
+    for turn in range(args.answers + 1):
+        body = {"session_id": session_id, "answer": f"Benchmark answer {turn} from user {index}"}
+        if args.stream:
+            response = await recorder.request(
+                client, "POST /api/interview/answer/stream", "POST", "/api/interview/answer/stream",
+                headers=headers, json=body
+            )
+            response.raise_for_status()
+            is_complete = '"is_complete": true' in response.text
+        else:
+            response = await recorder.request(
+                client, "POST /api/interview/answer", "POST", "/api/interview/answer",
+                headers=headers, json=body
+            )
+            response.raise_for_status()
+            is_complete = response.json()["is_complete"]
+        if is_complete:
+            break
+
+    # Scenarios are generated by a background job
+    completed_at = time.perf_counter()
+    scenarios = []
+    while True:
+        response = await recorder.request(
+            client, "GET /api/interview/status/{session_id}", "GET",
+            f"/api/interview/status/{session_id}", headers=headers
+        )
+        response.raise_for_status()
+        status = response.json()
+        if status.get("processing_status") in ("done", "failed"):
+            scenarios = status.get("scenarios") or []
+            break
+        await asyncio.sleep(0.25)
+    recorder.scenario_wait.append(time.perf_counter() - completed_at)
+
+    # Profiles differ per user so expansions are not all served from cache
+    profile = dict(BENCHMARK_PROFILE, income=BENCHMARK_PROFILE["income"] + index * 1000)
+    for expansion in range(min(args.expansions, len(scenarios) * 10)):
+        response = await recorder.request(
+            client, "POST /api/expand-node", "POST", "/api/expand-node",
+            headers=headers,
+            json={
+                "parent_scenario": scenarios[expansion % len(scenarios)],
+                "user_profile": profile,
+                "branch_level": expansion % 10 + 1
+            }
+        )
+        response.raise_for_status()
+
+    recorder.flow_times.append(time.perf_counter() - flow_started)
+
+
+async def create_tokens(count: int) -> List[str]:
+    """Insert benchmark users and sign a token for each"""
+    from ..auth import create_access_token
+    from ..database import AsyncSessionLocal
+    from ..models import User
+
+    run_id = int(time.time())
+    async with AsyncSessionLocal() as db:
+        users = [
+            User(email=f"bench-{run_id}-{index}@example.com", name=f"Bench User {index}", google_id=f"bench-{run_id}-{index}")
+            for index in range(count)
+        ]
+        db.add_all(users)
+        await db.commit()
+    return [create_access_token(user) for user in users]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict:
+    from ..database import db_stats_observers
+    from ..interview_service import llm_gateway
+    from ..main import app
+
+    db_stats = []
+    db_stats_observers.append(db_stats.append)
+    random.seed(args.seed)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_before = _peak_rss_mb()
+
+    async with app.router.lifespan_context(app):
+        tokens = await create_tokens(args.users)
+        recorder = Recorder()
+        lag = LoopLagMonitor()
+
+        server = None
+        if args.transport == "uvicorn":
+            import uvicorn
+            server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, lifespan="off", log_level="warning"))
+            server_task = asyncio.create_task(server.serve())
+            while not server.started:
+                await asyncio.sleep(0.05)
+            client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=120)
+        else:
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def limited(index: int) -> None:
+            async with semaphore:
+                try:
+                    await run_user(client, recorder, tokens[index], index, args)
+                except Exception as e:
+                    recorder.failed_users += 1
+                    print(f"Virtual user {index} failed: {e!r}")
+
+        lag.start()
+        started = time.perf_counter()
+        async with client:
+            await asyncio.gather(*(limited(index) for index in range(args.users)))
+        duration = time.perf_counter() - started
+        await lag.stop()
+
+        if server is not None:
+            server.should_exit = True
+            await server_task
+
+    heap_peak = None
+    if args.tracemalloc:
+        heap_peak = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+
+    total_requests = sum(len(values) for values in recorder.latencies.values())
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "config": vars(args),
+        "duration_s": round(duration, 3),
+        "users": {
+            "completed": len(recorder.flow_times),
+            "failed": recorder.failed_users,
+            "flow": summarize(recorder.flow_times),
+            "scenario_wait": summarize(recorder.scenario_wait)
+        },
+        "throughput": {
+            "requests_per_s": round(total_requests / duration, 2),
+            "interviews_per_s": round(len(recorder.flow_times) / duration, 3)
+        },
+        "endpoints": {
+            name: dict(
+                summarize(values),
+                errors=recorder.errors.get(name, 0),
+                requests_per_s=round(len(values) / duration, 2)
+            )
+            for name, values in sorted(recorder.latencies.items())
+        },
+        "event_loop_lag": summarize(lag.samples),
+        "db": {
+            "requests": len(db_stats),
+            "queries": sum(stats.query_count for stats in db_stats),
+            "query_time": summarize([stats.query_time for stats in db_stats]),
+            "checkout_wait": summarize([stats.checkout_wait for stats in db_stats]),
+            "session_time": summarize([stats.session_time for stats in db_stats])
+        },
+        "memory": {
+            "peak_rss_mb_before": rss_before,
+            "peak_rss_mb": _peak_rss_mb(),
+            "python_heap_peak_mb": heap_peak
+        },
+        "llm": llm_gateway.stats()
+    }
+
+
+def compare(current: Dict, previous: Dict) -> None:
+    """Print throughput and p95 changes against an earlier run"""
+    def change(new, old):
+        if not old:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    print(f"\nCompared with {previous.get('git_commit') or 'previous run'}:")
+    new_rps = current["throughput"]["requests_per_s"]
+    old_rps = previous["throughput"]["requests_per_s"]
+    print(f"  throughput {old_rps} -> {new_rps} req/s ({change(new_rps, old_rps)})")
+    for name, stats in current["endpoints"].items():
+        old = previous.get("endpoints", {}).get(name)
+        if old and stats.get("count"):
+            print(f"  {name} p95 {old['p95_ms']} -> {stats['p95_ms']} ms ({change(stats['p95_ms'], old['p95_ms'])})")
+
+
+def print_report(results: Dict) -> None:
+    print(f"\n{results['users']['completed']} users in {results['duration_s']}s "
+          f"({results['users']['failed']} failed), "
+          f"{results['throughput']['requests_per_s']} req/s")
+    print(f"{'endpoint':<42}{'count':>7}{'err':>5}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, stats in results["endpoints"].items():
+        print(f"{name:<42}{stats['count']:>7}{stats['errors']:>5}"
+              f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}")
+    lag = results["event_loop_lag"]
+    if lag.get("count"):
+        print(f"event loop lag: p99 {lag['p99_ms']}ms, max {lag['max_ms']}ms")
+    db = results["db"]
+    if db["requests"]:
+        print(f"db: {db['queries']} queries over {db['requests']} requests, "
+              f"session p95 {db['session_time']['p95_ms']}ms")
+    print(f"peak RSS: {results['memory']['peak_rss_mb']} MB")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    configure_environment(args)
+
+    results = asyncio.run(run_benchmark(args))
+    print_report(results)
+
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
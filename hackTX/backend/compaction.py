@@ -0,0 +1,248 @@
+"""
+Cold storage for old interview sessions and retention of abandoned ones
+
+Completed sessions older than `compaction_min_age_days` have their
+transcript (interview_messages rows), scenarios and slot state packed into
+one zlib-compressed JSON blob in InterviewSession.archive; readers go
+through unpack_archive, so the status and tree endpoints keep working.
+The extracted profile stays uncompressed because every node expansion
+reads it, and the scenario tree rows are left as they are.
+
+Incomplete sessions with no activity for `abandoned_session_retention_days`
+are deleted along with their messages, as are expired Idempotency-Key
+responses and revoked tokens.
+
+Usage (from the hackTX directory):
+    python -m backend.compaction --dry-run
+    python -m backend.compaction --vacuum
+"""
+import argparse
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import Text, cast, delete, func, or_, select, text, update
+from sqlalchemy.engine import Connection
+
+from . import json_codec
+from .config import settings
+from .database import DATABASE_URL, IS_SQLITE, engine
+from .models import IdempotencyKey, InterviewMessage, InterviewSession, RevokedToken, ScenarioNode
+
+ARCHIVE_VERSION = 1
+
+
+def pack_archive(documents: Dict) -> bytes:
+    """Compress a session's cold documents"""
+    return zlib.compress(json_codec.dumps_bytes({"version": ARCHIVE_VERSION, **documents}), 9)
+
+
+def unpack_archive(blob: Optional[bytes]) -> Dict:
+    """Documents of a compacted session ({} when it was never compacted)"""
+    if blob is None:
+        return {}
+    return json_codec.loads(zlib.decompress(blob))
+
+
+def _compact_session(connection: Connection, session_pk: int, dry_run: bool) -> Dict:
+    """Archive one session; returns its size before and after"""
+    sessions = InterviewSession.__table__
+    messages = InterviewMessage.__table__
+
+    scenarios, slot_state = connection.execute(
+        select(
+            cast(sessions.c.financing_scenarios, Text),
+            cast(sessions.c.slot_state, Text)
+        ).where(sessions.c.id == session_pk)
+    ).one()
+    rows = connection.execute(
+        select(messages.c.role, messages.c.content, messages.c.created_at)
+        .where(messages.c.interview_session_id == session_pk)
+        .order_by(messages.c.sequence)
+    ).all()
+
+    transcript = [
+        {"role": role, "content": content, "timestamp": created_at.isoformat()}
+        for role, content, created_at in rows
+    ]
+    blob = pack_archive({
+        "messages": transcript,
+        "financing_scenarios": json_codec.loads(scenarios) if scenarios else None,
+        "slot_state": json_codec.loads(slot_state) if slot_state else None
+    })
+    # Stored size of what the archive replaces, ignoring row overhead
+    original = (
+        len((scenarios or "").encode())
+        + len((slot_state or "").encode())
+        + sum(len(role.encode()) + len(content.encode()) for role, content, _ in rows)
+    )
+
+    if not dry_run:
+        connection.execute(
+            update(sessions)
+            .where(sessions.c.id == session_pk)
+            .values(
+                archive=blob,
+                archived_at=datetime.now(),
+                financing_scenarios=None,
+                slot_state=None
+            )
+        )
+        connection.execute(delete(messages).where(messages.c.interview_session_id == session_pk))
+
+    return {"original_bytes": original, "archived_bytes": len(blob), "messages": len(rows)}
+
+
+def compact_sessions(
+    min_age_days: int = settings.compaction_min_age_days,
+    batch_size: int = settings.compaction_batch_size,
+    dry_run: bool = False
+) -> Dict:
+    """Archive completed sessions older than `min_age_days`, one transaction per batch"""
+    sessions = InterviewSession.__table__
+    cutoff = datetime.now() - timedelta(days=min_age_days)
+    report = {"sessions": 0, "messages": 0, "original_bytes": 0, "archived_bytes": 0}
+
+    last_pk = 0
+    while True:
+        with engine.begin() as connection:
+            session_pks = connection.execute(
+                select(sessions.c.id)
+                .where(
+                    sessions.c.id > last_pk,
+                    sessions.c.is_complete.is_(True),
+                    # Sessions from before job tracking have no status
+                    or_(sessions.c.processing_status == "done", sessions.c.processing_status.is_(None)),
+                    sessions.c.completed_at < cutoff,
+                    sessions.c.archived_at.is_(None)
+                )
+                .order_by(sessions.c.id)
+                .limit(batch_size)
+            ).scalars().all()
+
+            for session_pk in session_pks:
+                sizes = _compact_session(connection, session_pk, dry_run)
+                report["sessions"] += 1
+                report["messages"] += sizes["messages"]
+                report["original_bytes"] += sizes["original_bytes"]
+                report["archived_bytes"] += sizes["archived_bytes"]
+
+        if len(session_pks) < batch_size:
+            break
+        last_pk = session_pks[-1]
+
+    report["reclaimed_bytes"] = report["original_bytes"] - report["archived_bytes"]
+    return report
+
+
+def purge_abandoned_sessions(
+    retention_days: int = settings.abandoned_session_retention_days,
+    dry_run: bool = False
+) -> Dict:
+    """Delete incomplete sessions with no message newer than `retention_days`"""
+    sessions = InterviewSession.__table__
+    messages = InterviewMessage.__table__
+    nodes = ScenarioNode.__table__
+    cutoff = datetime.now() - timedelta(days=retention_days)
+
+    recent_message = (
+        select(messages.c.id)
+        .where(messages.c.interview_session_id == sessions.c.id, messages.c.created_at >= cutoff)
+        .exists()
+    )
+    abandoned = (
+        select(sessions.c.id)
+        .where(
+            sessions.c.is_complete.is_(False),
+            sessions.c.created_at < cutoff,
+            ~recent_message
+        )
+    )
+
+    with engine.begin() as connection:
+        session_pks = connection.execute(abandoned).scalars().all()
+        message_count, message_bytes = connection.execute(
+            select(func.count(messages.c.id), func.coalesce(func.sum(func.length(messages.c.content)), 0))
+            .where(messages.c.interview_session_id.in_(session_pks))
+        ).one()
+
+        if session_pks and not dry_run:
+            connection.execute(delete(messages).where(messages.c.interview_session_id.in_(session_pks)))
+            connection.execute(delete(nodes).where(nodes.c.interview_session_id.in_(session_pks)))
+            connection.execute(delete(sessions).where(sessions.c.id.in_(session_pks)))
+
+    return {"sessions": len(session_pks), "messages": message_count, "message_bytes": int(message_bytes)}
+
+
+def purge_expired_idempotency_keys(dry_run: bool = False) -> int:
+    """Delete stored answer responses past their replay window"""
+    keys = IdempotencyKey.__table__
+    expired = keys.c.expires_at <= datetime.now()
+
+    with engine.begin() as connection:
+        if dry_run:
+            return connection.execute(select(func.count(keys.c.id)).where(expired)).scalar_one()
+        return connection.execute(delete(keys).where(expired)).rowcount
+
+
+def purge_expired_revoked_tokens(dry_run: bool = False) -> int:
+    """Delete revocations of tokens that have expired anyway"""
+    tokens = RevokedToken.__table__
+    expired = tokens.c.expires_at <= datetime.now()
+
+    with engine.begin() as connection:
+        if dry_run:
+            return connection.execute(select(func.count()).select_from(tokens).where(expired)).scalar_one()
+        return connection.execute(delete(tokens).where(expired)).rowcount
+
+
+def _sqlite_file_size() -> Optional[int]:
+    path = DATABASE_URL.replace("sqlite:///", "", 1)
+    return os.path.getsize(path) if os.path.exists(path) else None
+
+
+def vacuum() -> Dict:
+    """Return freed pages to the filesystem (SQLite) or to the table (PostgreSQL)"""
+    size_before = _sqlite_file_size() if IS_SQLITE else None
+
+    # VACUUM cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if IS_SQLITE:
+            connection.execute(text("VACUUM"))
+        else:
+            connection.execute(text("VACUUM (ANALYZE) interview_sessions, interview_messages"))
+
+    if size_before is None:
+        return {}
+    size_after = _sqlite_file_size()
+    return {"file_bytes_before": size_before, "file_bytes_after": size_after, "file_bytes_reclaimed": size_before - size_after}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compress old interview sessions and purge abandoned ones")
+    parser.add_argument("--min-age-days", type=int, default=settings.compaction_min_age_days)
+    parser.add_argument("--retention-days", type=int, default=settings.abandoned_session_retention_days)
+    parser.add_argument("--batch-size", type=int, default=settings.compaction_batch_size)
+    parser.add_argument("--no-purge", action="store_true", help="only compact, keep abandoned sessions")
+    parser.add_argument("--vacuum", action="store_true", help="reclaim freed space from the database afterwards")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
+    report = {
+        "dry_run": args.dry_run,
+        "compacted": compact_sessions(args.min_age_days, args.batch_size, args.dry_run)
+    }
+    if not args.no_purge:
+        report["purged"] = purge_abandoned_sessions(args.retention_days, args.dry_run)
+        report["purged"]["idempotency_keys"] = purge_expired_idempotency_keys(args.dry_run)
+        report["purged"]["revoked_tokens"] = purge_expired_revoked_tokens(args.dry_run)
+    if args.vacuum and not args.dry_run:
+        report["vacuum"] = vacuum()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
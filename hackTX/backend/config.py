@@ -27,24 +27,119 @@ class Settings(BaseSettings):
     # CORS Configuration
     cors_origins: List[str] = ["http://localhost:5173", "http://localhost:3000"]
     
+    # Users allowed to call maintenance endpoints (e.g. clearing the expansion cache)
+    admin_emails: List[str] = []
+    
     # Database Configuration
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./interview.db")
     
+    # Schema creation runs as a separate step (python -m backend.migrations);
+    # enable this to run it at startup instead, e.g. for local SQLite
+    init_schema_on_startup: bool = False
+    
+    # Database engine profile: pool settings apply to server databases
+    # (postgres), pragmas to SQLite
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0  # seconds to wait for a pooled connection
+    db_pool_recycle: int = 1800  # seconds before a connection is replaced
+    db_pool_pre_ping: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    db_slow_request_ms: float = 500.0  # report requests spending longer in the DB
+    
     # Google AI Configuration
     google_api_key: str = os.getenv("GOOGLE_API_KEY", "")
     google_cloud_project: str = os.getenv("GOOGLE_CLOUD_PROJECT", "")
     google_cloud_location: str = os.getenv("GOOGLE_CLOUD_LOCATION", "global")
     
+    # Gemini context caching for static agent instructions
+    prompt_cache_enabled: bool = True
+    prompt_cache_ttl_seconds: int = 3600
+    prompt_cache_refresh_margin_seconds: int = 300
+    prompt_cache_min_tokens: int = 4096  # the API refuses to cache shorter prompts
+    
+    # Node expansion result cache
+    expand_cache_max_entries: int = 512
+    expand_cache_ttl_seconds: int = 86400
+    expand_cache_persist: bool = True  # also store results in the database
+    expand_cache_generation_check_seconds: float = 5.0  # how stale a worker's memory tier may be after an invalidation
+    
+    # Branch levels 1, 6, 7, 8 and 9 are computed by the local finance engine
+    local_finance_enabled: bool = True
+    local_finance_llm_prose: bool = False  # let the LLM rewrite the templated prose
+    
+    # Batch node expansion
+    expand_batch_max_items: int = 50
+    expand_batch_concurrency: int = 5  # concurrent LLM calls per batch request
+
+    # Speculative expansion of the nodes a user is likely to open next,
+    # run at background LLM priority
+    prefetch_enabled: bool = True
+    prefetch_top_k: int = 2  # root scenarios prefetched per completed interview
+    prefetch_concurrency: int = 2  # prefetches running at once, all users
+    prefetch_max_pending: int = 50  # further prefetches are dropped
+    prefetch_user_concurrency: int = 2  # pending prefetches per user
+    prefetch_user_hourly_budget: int = 30  # prefetches per user per hour
+    prefetch_join_timeout_seconds: float = 3.0  # a click waits this long for a running prefetch
+
+    # LLM backend: gemini, record (gemini, saving cassettes), replay
+    # (cassettes only) or fake (canned responses, simulated latency)
+    llm_backend: str = os.getenv("LLM_BACKEND", "gemini")
+    llm_cassette_dir: str = str(Path(__file__).parent / "cassettes")
+    fake_llm_latency_ms: float = 800.0  # mean response latency
+    fake_llm_latency_jitter: float = 0.5  # lognormal sigma, or +/- fraction for uniform
+    fake_llm_latency_distribution: str = "lognormal"  # fixed, uniform or lognormal
+    fake_llm_interview_turns: int = 6  # answers before the fake interviewer finishes
+    fake_llm_seed: int = 0
+    
+    # LLM gateway: quota, retries and circuit breaking for every Gemini call
+    llm_requests_per_minute: int = 15
+    llm_tokens_per_minute: int = 1000000
+    llm_background_reserve: float = 0.2  # share of quota background calls leave to interactive ones
+    llm_max_queue_wait: float = 30.0  # seconds an interactive call may wait for quota before a 503
+    llm_max_attempts: int = 4
+    llm_retry_base_delay: float = 1.0  # seconds, doubled per attempt
+    llm_retry_max_delay: float = 30.0
+    llm_breaker_failure_threshold: int = 5  # consecutive failures before failing fast
+    llm_breaker_reset_seconds: float = 30.0
+    llm_estimated_output_tokens: int = 1024
+    
+    # Prometheus-format /metrics endpoint and its collectors
+    metrics_enabled: bool = True
+    
+    # Background processing of completed interviews
+    interview_job_workers: int = 2
+    interview_job_max_attempts: int = 3
+    interview_job_retry_delay: float = 2.0  # seconds, doubled per attempt
+    interview_job_lease_seconds: float = 600.0  # per step; an expired lease lets another worker take over
+    
+    # Answer submission: how long a turn may hold its session, and how
+    # long responses are kept for Idempotency-Key replays
+    answer_lease_seconds: float = 180.0  # longer than the worst-case gateway wait and retries
+    idempotency_key_ttl_hours: int = 24
+    
+    # Cold storage and retention (python -m backend.compaction)
+    compaction_min_age_days: int = 30  # completed sessions older than this are compressed
+    compaction_batch_size: int = 100
+    abandoned_session_retention_days: int = 14  # incomplete sessions older than this are purged
+    
     # Authentication (for future use)
     secret_key: str = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    token_revocation_sync_seconds: float = 10.0  # a logout reaches other workers within this
     
     # Google OAuth
     google_client_id: str = os.getenv("GOOGLE_CLIENT_ID", "")
     google_client_secret: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
     google_redirect_uri: str = os.getenv("GOOGLE_REDIRECT_URI", "http://localhost:8000/auth/google/callback")
     
+    # Fetch the OpenID discovery document and build the LLM client at
+    # startup, in the background, instead of on the first request
+    prewarm_on_startup: bool = True
+    
     # Frontend URL for redirects
     frontend_url: str = os.getenv("FRONTEND_URL", "http://localhost:5173")  # Changed this
     backend_url: str = os.getenv("VITE_BACKEND_URL", "http://localhost:8000")
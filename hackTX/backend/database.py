@@ -1,9 +1,18 @@
 import os
-from sqlalchemy import create_engine
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+from sqlalchemy import JSON, create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from dotenv import load_dotenv
 
+from . import json_codec
+from .config import settings
+
 # Load environment variables from multiple possible locations
 # Try to load from hackTX/backend/.env first, then from project root
 backend_env = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
@@ -36,19 +45,161 @@ if DATABASE_URL.startswith("sqlite:///./"):
     
     DATABASE_URL = f"sqlite:///{abs_path}"
 
-# Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+
+
+def _async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver"""
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return url.replace(prefix, "postgresql+asyncpg://", 1)
+    return url
+
+
+ASYNC_DATABASE_URL = _async_database_url(DATABASE_URL)
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+
+def _engine_options() -> dict:
+    """Pool and driver options for the configured database"""
+    # JSON columns are encoded with orjson when it is installed
+    codec = {"json_serializer": json_codec.dumps, "json_deserializer": json_codec.loads}
+    
+    if IS_SQLITE:
+        # Connections are handed between threads by the pool; waiting on a
+        # lock is bounded by busy_timeout instead of failing immediately
+        return {
+            **codec,
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": settings.sqlite_busy_timeout_ms / 1000
+            }
+        }
+    
+    return {
+        **codec,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping
+    }
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers proceed during a write; NORMAL sync is safe under WAL"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.close()
+
+
+# Create SQLAlchemy engine (sync, used for schema creation)
+engine = create_engine(DATABASE_URL, **_engine_options())
+
+# Async engine used by request handlers and the interview service
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options())
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+
+@dataclass
+class DBStats:
+    """Per-request database timings collected by get_db"""
+    checkout_wait: float = 0.0  # seconds waiting for a pooled connection
+    query_count: int = 0
+    query_time: float = 0.0  # seconds spent executing statements
+    session_time: float = 0.0  # seconds the session was open
+
+
+# Stats of the request currently running in this task, if any
+current_db_stats: ContextVar[Optional[DBStats]] = ContextVar("current_db_stats", default=None)
+
+# Called with every finished request's stats (e.g. by benchmarks)
+db_stats_observers: List[Callable[[DBStats], None]] = []
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = current_db_stats.get()
+    if stats is not None:
+        stats.query_count += 1
+        stats.query_time += time.perf_counter() - started
+
+
+class InstrumentedSession(Session):
+    """Session that records how long it waits for a pooled connection"""
+
+
+@event.listens_for(InstrumentedSession, "after_transaction_create")
+def _start_checkout_timer(session, transaction):
+    # Runs before the connection is acquired for a new outer transaction
+    if transaction.parent is None:
+        session.info["checkout_started"] = time.perf_counter()
+
+
+@event.listens_for(InstrumentedSession, "after_begin")
+def _stop_checkout_timer(session, transaction, connection):
+    started = session.info.pop("checkout_started", None)
+    stats = session.info.get("db_stats")
+    if started is not None and stats is not None:
+        stats.checkout_wait += time.perf_counter() - started
+
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Objects stay usable after commit so handlers can release the connection
+# before long LLM calls without triggering lazy reloads
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=InstrumentedSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Create Base class for models
 Base = declarative_base()
 
+# JSON document column type: binary JSONB on PostgreSQL, JSON text on
+# SQLite; Python None is stored as SQL NULL rather than JSON null
+JSONDocument = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
+def _report_db_stats(stats: DBStats) -> None:
+    """Surface requests that waited on the pool or spent long in queries"""
+    for observer in db_stats_observers:
+        observer(stats)
+    
+    threshold = settings.db_slow_request_ms / 1000
+    if stats.query_time > threshold or stats.checkout_wait > threshold:
+        print(
+            f"Slow DB request: {stats.query_count} queries in {stats.query_time * 1000:.1f}ms, "
+            f"checkout wait {stats.checkout_wait * 1000:.1f}ms, "
+            f"session open {stats.session_time * 1000:.1f}ms"
+        )
+
+
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    stats = DBStats()
+    current_db_stats.set(stats)
+    started = time.perf_counter()
     try:
-        yield db
+        async with AsyncSessionLocal() as db:
+            db.sync_session.info["db_stats"] = stats
+            yield db
     finally:
-        db.close()
+        stats.session_time = time.perf_counter() - started
+        _report_db_stats(stats)
@@ -0,0 +1,228 @@
+"""
+Two-tier cache for node expansion results
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .database import AsyncSessionLocal
+from .models import CacheGeneration, ExpansionCacheEntry
+
+GENERATION_NAME = "expansion_cache"
+
+
+class ExpansionCache:
+    """
+    Cache generated child scenarios keyed on their inputs
+
+    The first tier is a bounded in-memory LRU local to the worker. The
+    optional second tier is the `expansion_cache` table, which survives
+    restarts and is shared by every worker using the same database. Both
+    tiers honour the same TTL.
+
+    Invalidation bumps a generation counter in the database; every worker
+    compares it at most once per `generation_check_seconds` and clears its
+    memory tier when it changed. Without persistence an invalidation only
+    reaches the worker that ran it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: int = 86400,
+        persist: bool = True,
+        generation_check_seconds: float = 5.0
+    ):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._persist = persist
+        self._generation_check_seconds = generation_check_seconds
+        self._generation: Optional[int] = None
+        self._generation_checked_at = float("-inf")
+        self._entries: "OrderedDict[str, Tuple[float, List[Dict]]]" = OrderedDict()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(parent_scenario: Dict, user_profile: Dict, branch_level: int) -> str:
+        """Canonical hash of the expansion inputs"""
+        canonical = json.dumps(
+            {
+                "parent_scenario": parent_scenario,
+                "user_profile": user_profile,
+                "branch_level": branch_level
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for monitoring"""
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._entries)
+        }
+
+    def _remember(self, key: str, children: List[Dict], expires_at: float) -> None:
+        self._entries[key] = (expires_at, children)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def _check_generation(self) -> None:
+        """Clear the memory tier if another worker invalidated the cache"""
+        now = time.monotonic()
+        if not self._persist or now - self._generation_checked_at < self._generation_check_seconds:
+            return
+        self._generation_checked_at = now
+
+        try:
+            async with AsyncSessionLocal() as db:
+                generation = await db.scalar(
+                    select(CacheGeneration.generation).where(CacheGeneration.name == GENERATION_NAME)
+                ) or 0
+        except Exception as e:
+            print(f"Error reading expansion cache generation: {e}")
+            return
+
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    async def _bump_generation(self) -> None:
+        async with AsyncSessionLocal() as db:
+            for _ in range(2):
+                bumped = await db.execute(
+                    update(CacheGeneration)
+                    .where(CacheGeneration.name == GENERATION_NAME)
+                    .values(generation=CacheGeneration.generation + 1)
+                )
+                if bumped.rowcount:
+                    await db.commit()
+                    return
+
+                db.add(CacheGeneration(name=GENERATION_NAME, generation=1))
+                try:
+                    await db.commit()
+                    return
+                except IntegrityError:
+                    # Another worker created the row first; bump that one
+                    await db.rollback()
+
+    async def get(self, key: str) -> Optional[List[Dict]]:
+        """Return cached children, checking memory first and then the database"""
+        await self._check_generation()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, children = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return children
+            del self._entries[key]
+
+        if self._persist:
+            try:
+                async with AsyncSessionLocal() as db:
+                    result = await db.execute(
+                        select(ExpansionCacheEntry.children, ExpansionCacheEntry.expires_at).where(
+                            ExpansionCacheEntry.cache_key == key,
+                            ExpansionCacheEntry.expires_at > datetime.now()
+                        )
+                    )
+                    row = result.first()
+            except Exception as e:
+                print(f"Error reading expansion cache: {e}")
+                row = None
+
+            if row is not None:
+                children = row.children
+                self._remember(key, children, row.expires_at.timestamp())
+                self.db_hits += 1
+                return children
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, children: List[Dict], branch_level: int) -> None:
+        """Store children in both tiers"""
+        self._remember(key, children, time.time() + self._ttl_seconds)
+
+        if not self._persist:
+            return
+
+        expires_at = datetime.now() + timedelta(seconds=self._ttl_seconds)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    delete(ExpansionCacheEntry).where(ExpansionCacheEntry.cache_key == key)
+                )
+                db.add(ExpansionCacheEntry(
+                    cache_key=key,
+                    branch_level=branch_level,
+                    children=children,
+                    expires_at=expires_at
+                ))
+                await db.commit()
+        except Exception as e:
+            # Another worker may have stored the same key concurrently
+            print(f"Error writing expansion cache: {e}")
+
+    async def invalidate(self, key: Optional[str] = None) -> int:
+        """
+        Drop one key, or every entry when no key is given, on every worker
+
+        Other workers clear their whole memory tier within
+        `generation_check_seconds` of the invalidation.
+
+        Returns:
+            Number of entries removed from the persistent tier (or memory
+            when persistence is off)
+        """
+        if key is None:
+            removed = len(self._entries)
+            self._entries.clear()
+        else:
+            removed = 1 if self._entries.pop(key, None) is not None else 0
+
+        if not self._persist:
+            return removed
+
+        statement = delete(ExpansionCacheEntry)
+        if key is not None:
+            statement = statement.where(ExpansionCacheEntry.cache_key == key)
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(statement)
+            await db.commit()
+        await self._bump_generation()
+        # This worker's memory tier is already current
+        self._generation_checked_at = float("-inf")
+        return result.rowcount
+
+    async def purge_expired(self) -> int:
+        """Delete expired rows from the persistent tier"""
+        now = time.time()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+
+        if not self._persist:
+            return 0
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(ExpansionCacheEntry).where(ExpansionCacheEntry.expires_at <= datetime.now())
+            )
+            await db.commit()
+        return result.rowcount
@@ -0,0 +1,515 @@
+"""
+Vectorized loan and lease arithmetic
+
+Every function accepts scalars or NumPy arrays and broadcasts, so a whole
+grid of terms, APRs and down payments is evaluated in one pass. Branch
+levels whose content is pure arithmetic (payment structures, trade-ins,
+lease vs. buy, refinancing, early payoff) are built here instead of asking
+the LLM to invent the numbers.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from pydantic import ValidationError
+
+from .models.schemas import FinancingScenario
+
+
+# Branch levels answered locally; the others still go to node_maker
+LOCAL_BRANCH_LEVELS = {1, 6, 7, 8, 9}
+# Levels about a purchase loan; cash purchases and leases go to node_maker
+LOAN_BRANCH_LEVELS = {1, 6, 8, 9}
+
+DEFAULT_VEHICLE_PRICE = 30000.0
+DEFAULT_APR = 6.5
+DEFAULT_TERM_MONTHS = 60
+
+
+def amortized_payment(principal, apr, term_months) -> np.ndarray:
+    """Monthly payment of a fully amortizing loan (APR in percent)"""
+    principal, apr, term = np.broadcast_arrays(
+        np.asarray(principal, dtype=float),
+        np.asarray(apr, dtype=float),
+        np.asarray(term_months, dtype=float)
+    )
+    rate = apr / 1200.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = principal * rate / (1.0 - (1.0 + rate) ** -term)
+    return np.where(rate > 0, payment, principal / term)
+
+
+def financed_principal(monthly_payment, apr, term_months) -> np.ndarray:
+    """Loan principal that a monthly payment amortizes over the term"""
+    payment, apr, term = np.broadcast_arrays(
+        np.asarray(monthly_payment, dtype=float),
+        np.asarray(apr, dtype=float),
+        np.asarray(term_months, dtype=float)
+    )
+    rate = apr / 1200.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        principal = payment * (1.0 - (1.0 + rate) ** -term) / rate
+    return np.where(rate > 0, principal, payment * term)
+
+
+def remaining_balance(principal, apr, term_months, months_paid) -> np.ndarray:
+    """Outstanding balance after `months_paid` scheduled payments"""
+    principal = np.asarray(principal, dtype=float)
+    rate = np.asarray(apr, dtype=float) / 1200.0
+    paid = np.asarray(months_paid, dtype=float)
+    payment = amortized_payment(principal, apr, term_months)
+    growth = (1.0 + rate) ** paid
+    with np.errstate(divide="ignore", invalid="ignore"):
+        balance = principal * growth - payment * (growth - 1.0) / rate
+    balance = np.where(rate > 0, balance, principal - payment * paid)
+    return np.maximum(balance, 0.0)
+
+
+def months_to_payoff(principal, apr, monthly_payment) -> np.ndarray:
+    """Months (fractional) to retire a balance at a fixed monthly payment"""
+    principal, rate, payment = np.broadcast_arrays(
+        np.asarray(principal, dtype=float),
+        np.asarray(apr, dtype=float) / 1200.0,
+        np.asarray(monthly_payment, dtype=float)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        months = -np.log1p(-rate * principal / payment) / np.log1p(rate)
+    return np.where(rate > 0, months, principal / payment)
+
+
+def lease_payment(cap_cost, residual_value, money_factor, term_months) -> np.ndarray:
+    """Monthly lease payment: depreciation plus the money-factor rent charge"""
+    cap_cost = np.asarray(cap_cost, dtype=float)
+    residual = np.asarray(residual_value, dtype=float)
+    depreciation = np.maximum(cap_cost - residual, 0.0) / np.asarray(term_months, dtype=float)
+    rent_charge = (cap_cost + residual) * np.asarray(money_factor, dtype=float)
+    return depreciation + rent_charge
+
+
+def residual_percent(term_months) -> np.ndarray:
+    """Typical residual value as a fraction of price for a lease term"""
+    return np.clip(0.74 - 0.0045 * np.asarray(term_months, dtype=float), 0.35, 0.70)
+
+
+def apr_to_money_factor(apr):
+    return np.asarray(apr, dtype=float) / 2400.0
+
+
+def money_factor_to_apr(money_factor):
+    return np.asarray(money_factor, dtype=float) * 2400.0
+
+
+def fit_score(monthly_payment, total_cost, vehicle_price, annual_income: Optional[float]) -> np.ndarray:
+    """
+    0-100 positivity score from affordability and total-cost efficiency
+
+    A payment at or under 10% of gross monthly income scores full
+    affordability, 25% or more scores none; total cost at the vehicle
+    price scores full efficiency, 30% over scores none.
+    """
+    payment = np.asarray(monthly_payment, dtype=float)
+    if annual_income and annual_income > 0:
+        ratio = payment / (annual_income / 12.0)
+    else:
+        ratio = np.full_like(payment, 0.12)
+    affordability = np.clip(1.0 - (ratio - 0.10) / 0.15, 0.0, 1.0)
+    overhead = np.asarray(total_cost, dtype=float) / np.asarray(vehicle_price, dtype=float) - 1.0
+    efficiency = np.clip(1.0 - overhead / 0.30, 0.0, 1.0)
+    return np.rint(100.0 * (0.6 * affordability + 0.4 * efficiency))
+
+
+def payment_grid(vehicle_price: float, down_payments, aprs, terms) -> Dict[str, np.ndarray]:
+    """
+    Evaluate every (down payment, APR, term) combination at once
+
+    Returns arrays shaped (len(down_payments), len(aprs), len(terms)).
+    """
+    down, apr, term = np.ix_(
+        np.asarray(down_payments, dtype=float),
+        np.asarray(aprs, dtype=float),
+        np.asarray(terms, dtype=float)
+    )
+    principal = np.maximum(vehicle_price - down, 0.0)
+    payment = amortized_payment(principal, apr, term)
+    total_paid = payment * term
+    return {
+        "monthly_payment": payment,
+        "total_interest": total_paid - principal,
+        "total_cost": total_paid + down
+    }
+
+
+def _number(value, default: float) -> float:
+    try:
+        number = float(str(value).replace(",", "").replace("$", "").replace("%", ""))
+    except (TypeError, ValueError):
+        return default
+    return number if np.isfinite(number) else default
+
+
+def _money(value) -> float:
+    return round(float(value), 2)
+
+
+def _usd(value) -> str:
+    return f"${float(value):,.0f}"
+
+
+@dataclass
+class _Baseline:
+    """Purchase terms implied by a parent scenario"""
+    plan_type: str
+    vehicle_price: float
+    down_payment: float
+    monthly_payment: float
+    term_months: int
+    apr: float
+    model: str
+    annual_income: Optional[float]
+
+    @property
+    def principal(self) -> float:
+        return max(self.vehicle_price - self.down_payment, 0.0)
+
+
+def _baseline(parent_scenario: Dict, user_profile: Dict) -> _Baseline:
+    """Recover price, rate and term from the parent scenario's numbers"""
+    plan_type = str(parent_scenario.get("plan_type", "finance")).lower()
+    term = int(_number(parent_scenario.get("term_months"), DEFAULT_TERM_MONTHS))
+    if term <= 0:
+        term = DEFAULT_TERM_MONTHS
+    down = max(_number(parent_scenario.get("down_payment"), 0.0), 0.0)
+    payment = _number(parent_scenario.get("monthly_payment"), 0.0)
+    rate = _number(parent_scenario.get("interest_rate"), DEFAULT_APR)
+
+    if plan_type == "lease":
+        # Lease rates are money factors (~0.001-0.004); larger values are APRs
+        money_factor = rate if 0 < rate < 0.05 else float(apr_to_money_factor(rate))
+        apr = float(money_factor_to_apr(money_factor))
+        if payment > 0:
+            residual = float(residual_percent(term))
+            per_dollar = (1 - residual) / term + (1 + residual) * money_factor
+            price = payment / per_dollar + down
+        else:
+            price = DEFAULT_VEHICLE_PRICE
+    else:
+        # Some outputs express APR as a fraction (0.059 instead of 5.9)
+        apr = rate * 100 if 0 < rate < 1 else rate
+        if payment > 0:
+            price = float(financed_principal(payment, apr, term)) + down
+        else:
+            price = DEFAULT_VEHICLE_PRICE
+
+    income = _number(user_profile.get("income"), 0.0) if user_profile else 0.0
+
+    return _Baseline(
+        plan_type=plan_type,
+        vehicle_price=price,
+        down_payment=down,
+        monthly_payment=payment,
+        term_months=term,
+        apr=apr if apr > 0 else DEFAULT_APR,
+        model=str(parent_scenario.get("suggested_model") or "Toyota"),
+        annual_income=income or None
+    )
+
+
+def _scenario(base: _Baseline, **fields) -> Dict:
+    scenario = dict(fields)
+    scenario.setdefault("plan_type", "finance")
+    scenario.setdefault("down_payment", _money(base.down_payment))
+    scenario.setdefault("suggested_model", base.model)
+    return scenario
+
+
+def _payment_structures(base: _Baseline) -> List[Dict]:
+    terms = np.array([36, 48, 60, 72, 84])
+    # Lenders price longer terms higher
+    aprs = np.maximum(base.apr + (terms - 60) / 12 * 0.35, 0.0)
+    principal = base.principal
+    payments = amortized_payment(principal, aprs, terms)
+    total_interest = payments * terms - principal
+    total_cost = payments * terms + base.down_payment
+    scores = fit_score(payments, total_cost, base.vehicle_price, base.annual_income)
+
+    # Best short (36-48), the standard 60, and best extended (72-84) option
+    short = int(np.argmax(scores[:2]))
+    extended = 3 + int(np.argmax(scores[3:]))
+    picks = [
+        (short, "Short-Term Payoff", "Higher payments, lowest total interest"),
+        (2, "Standard Term Plan", "Balanced payment and total cost"),
+        (extended, "Extended Low Payment", "Lowest monthly payment, more interest")
+    ]
+
+    scenarios = []
+    for index, name, tagline in picks:
+        term = int(terms[index])
+        scenarios.append(_scenario(
+            base,
+            name=name,
+            title=f"{term}-Month Financing for {base.model}",
+            description=(
+                f"Financing {_usd(principal)} over {term} months at {aprs[index]:.2f}% APR "
+                f"costs {_usd(payments[index])} a month. {tagline}: "
+                f"{_usd(total_interest[index])} in total interest."
+            ),
+            monthly_payment=_money(payments[index]),
+            term_months=term,
+            interest_rate=round(float(aprs[index]), 2),
+            positivity_score=int(scores[index]),
+            total_interest=_money(total_interest[index]),
+            total_cost=_money(total_cost[index]),
+            recommendations=(
+                "Choose the shortest term whose payment fits comfortably in your budget "
+                "to minimize interest."
+            )
+        ))
+    return scenarios
+
+
+def _trade_in(base: _Baseline) -> List[Dict]:
+    trade_values = np.array([0.0, 6500.0, 12000.0])
+    principal = np.maximum(base.principal - trade_values, 0.0)
+    payments = amortized_payment(principal, base.apr, base.term_months)
+    total_interest = payments * base.term_months - principal
+    total_cost = payments * base.term_months + base.down_payment + trade_values
+    scores = fit_score(payments, total_cost, base.vehicle_price, base.annual_income)
+
+    names = ["No Trade-In", "Average Trade-In", "High-Value Trade-In"]
+    scenarios = []
+    for index, name in enumerate(names):
+        trade = trade_values[index]
+        trade_text = "without a trade-in" if trade == 0 else f"with a {_usd(trade)} trade-in"
+        scenarios.append(_scenario(
+            base,
+            name=name,
+            title=f"{base.model} Financing {trade_text.capitalize()}",
+            description=(
+                f"Buying {trade_text} leaves {_usd(principal[index])} to finance over "
+                f"{base.term_months} months at {base.apr:.2f}% APR, for "
+                f"{_usd(payments[index])} a month and {_usd(total_interest[index])} in interest."
+            ),
+            monthly_payment=_money(payments[index]),
+            term_months=base.term_months,
+            interest_rate=round(base.apr, 2),
+            positivity_score=int(scores[index]),
+            trade_in_value=_money(trade),
+            total_interest=_money(total_interest[index]),
+            total_cost=_money(total_cost[index]),
+            recommendations=(
+                "Get trade-in quotes from several dealers and pay off any remaining "
+                "loan on your current vehicle before trading it in."
+            )
+        ))
+    return scenarios
+
+
+def _lease_vs_buy(base: _Baseline) -> List[Dict]:
+    finance_term = base.term_months if base.plan_type != "lease" else DEFAULT_TERM_MONTHS
+    finance_payment = float(amortized_payment(base.principal, base.apr, finance_term))
+    finance_total = finance_payment * finance_term + base.down_payment
+
+    lease_term = 36
+    money_factor = float(apr_to_money_factor(base.apr))
+    residual = base.vehicle_price * float(residual_percent(lease_term))
+    # The down payment reduces the cap cost, but only down to the residual;
+    # a lease never pays for more than the depreciation
+    cap_reduction = min(base.down_payment, max(base.vehicle_price - residual, 0.0))
+    lease_monthly = float(lease_payment(base.vehicle_price - cap_reduction, residual, money_factor, lease_term))
+    lease_total = lease_monthly * lease_term + cap_reduction
+    buyout_total = lease_total + residual
+
+    payments = np.array([finance_payment, lease_monthly, lease_monthly])
+    totals = np.array([finance_total, lease_total, buyout_total])
+    # The plain lease returns the car, so it is measured against the
+    # depreciation it pays for rather than the full price
+    reference_values = np.array([base.vehicle_price, base.vehicle_price - residual, base.vehicle_price])
+    scores = fit_score(payments, totals, reference_values, base.annual_income)
+
+    return [
+        _scenario(
+            base,
+            name="Traditional Purchase",
+            title=f"{finance_term}-Month Purchase of {base.model}",
+            description=(
+                f"Finance {_usd(base.principal)} at {base.apr:.2f}% APR for "
+                f"{_usd(finance_payment)} a month over {finance_term} months. "
+                f"You own the vehicle outright after {_usd(finance_total)} in total payments."
+            ),
+            monthly_payment=_money(finance_payment),
+            term_months=finance_term,
+            interest_rate=round(base.apr, 2),
+            positivity_score=int(scores[0]),
+            total_cost=_money(finance_total),
+            recommendations="Buying builds equity and suits drivers who keep vehicles for many years."
+        ),
+        _scenario(
+            base,
+            name="Standard Lease",
+            title=f"36-Month Lease of {base.model}",
+            plan_type="lease",
+            down_payment=_money(cap_reduction),
+            description=(
+                f"Lease for {_usd(lease_monthly)} a month over 36 months with a money factor "
+                f"of {money_factor:.5f} and a {_usd(residual)} residual. "
+                f"Total lease cost is {_usd(lease_total)}, and you return the vehicle at the end."
+            ),
+            monthly_payment=_money(lease_monthly),
+            term_months=lease_term,
+            interest_rate=round(money_factor, 5),
+            positivity_score=int(scores[1]),
+            residual_value=_money(residual),
+            total_cost=_money(lease_total),
+            recommendations="Leasing keeps payments low if you drive within the mileage allowance."
+        ),
+        _scenario(
+            base,
+            name="Lease With Buyout",
+            title=f"36-Month Lease With Purchase Option on {base.model}",
+            plan_type="lease",
+            down_payment=_money(cap_reduction),
+            description=(
+                f"Lease for {_usd(lease_monthly)} a month, then buy the vehicle for its "
+                f"{_usd(residual)} residual value. Owning this way costs {_usd(buyout_total)} "
+                f"in total versus {_usd(finance_total)} when financing from the start."
+            ),
+            monthly_payment=_money(lease_monthly),
+            term_months=lease_term,
+            interest_rate=round(money_factor, 5),
+            positivity_score=int(scores[2]),
+            residual_value=_money(residual),
+            total_cost=_money(buyout_total),
+            recommendations="Keep the buyout option if you are unsure whether you will keep the car long term."
+        )
+    ]
+
+
+def _refinancing(base: _Baseline, months_elapsed: int = 24) -> List[Dict]:
+    original_term = max(base.term_months, months_elapsed + 12)
+    original_payment = float(amortized_payment(base.principal, base.apr, original_term))
+    balance = float(remaining_balance(base.principal, base.apr, original_term, months_elapsed))
+    remaining = original_term - months_elapsed
+    interest_if_kept = original_payment * remaining - balance
+
+    new_aprs = np.maximum(np.array([base.apr - 1.5, base.apr - 0.75, base.apr - 0.5]), 0.0)
+    new_terms = np.array([remaining, max(remaining - 12, 12), remaining + 12])
+    payments = amortized_payment(balance, new_aprs, new_terms)
+    new_interest = payments * new_terms - balance
+    savings = interest_if_kept - new_interest
+    totals = payments * new_terms + base.down_payment + original_payment * months_elapsed
+    scores = fit_score(payments, totals, base.vehicle_price, base.annual_income)
+
+    names = ["Lower Rate Refinance", "Shorter Term Refinance", "Lower Payment Refinance"]
+    scenarios = []
+    for index, name in enumerate(names):
+        term = int(new_terms[index])
+        saved = savings[index]
+        outcome = (
+            f"saves {_usd(saved)} in interest" if saved >= 0
+            else f"adds {_usd(-saved)} in interest in exchange for a lower payment"
+        )
+        scenarios.append(_scenario(
+            base,
+            name=name,
+            title=f"Refinance After {months_elapsed} Months to {term}-Month Term",
+            description=(
+                f"After {months_elapsed} payments about {_usd(balance)} remains. Refinancing at "
+                f"{new_aprs[index]:.2f}% APR over {term} months costs {_usd(payments[index])} "
+                f"a month (was {_usd(original_payment)}) and {outcome}."
+            ),
+            monthly_payment=_money(payments[index]),
+            term_months=term,
+            interest_rate=round(float(new_aprs[index]), 2),
+            positivity_score=int(scores[index]),
+            remaining_balance=_money(balance),
+            interest_saved=_money(saved),
+            recommendations=(
+                "Refinance only when the rate drop outweighs any fees, and avoid extending "
+                "the term unless you need the lower payment."
+            )
+        ))
+    return scenarios
+
+
+def _early_payoff(base: _Baseline) -> Optional[List[Dict]]:
+    payment = float(amortized_payment(base.principal, base.apr, base.term_months))
+    if base.principal <= 0 or not payment > 0:
+        return None
+    baseline_interest = payment * base.term_months - base.principal
+
+    # Bi-weekly half payments add one extra monthly payment per year
+    extras = np.array([50.0, 100.0, payment / 12.0])
+    months = months_to_payoff(base.principal, base.apr, payment + extras)
+    interest = (payment + extras) * months - base.principal
+    interest_saved = baseline_interest - interest
+    months_saved = base.term_months - np.ceil(months)
+    totals = interest + base.principal + base.down_payment
+    scores = fit_score(payment + extras, totals, base.vehicle_price, base.annual_income)
+
+    labels = ["Extra $50 Monthly", "Extra $100 Monthly", "Bi-Weekly Payments"]
+    strategies = [
+        "Adding $50 a month toward principal",
+        "Adding $100 a month toward principal",
+        f"Paying {_usd(payment / 2)} every two weeks"
+    ]
+    scenarios = []
+    for index, name in enumerate(labels):
+        term = int(np.ceil(months[index]))
+        scenarios.append(_scenario(
+            base,
+            name=name,
+            title=f"Pay Off Your {base.model} Loan in {term} Months",
+            description=(
+                f"{strategies[index]} on a {_usd(payment)} payment retires the loan "
+                f"{int(months_saved[index])} months early and saves "
+                f"{_usd(interest_saved[index])} in interest."
+            ),
+            monthly_payment=_money(payment + extras[index]),
+            term_months=term,
+            interest_rate=round(base.apr, 2),
+            positivity_score=int(scores[index]),
+            interest_saved=_money(interest_saved[index]),
+            months_saved=int(months_saved[index]),
+            recommendations=(
+                "Confirm with your lender that extra payments go to principal and that "
+                "there is no prepayment penalty."
+            )
+        ))
+    return scenarios
+
+
+_BUILDERS = {
+    1: _payment_structures,
+    6: _trade_in,
+    7: _lease_vs_buy,
+    8: _refinancing,
+    9: _early_payoff
+}
+
+
+def build_child_scenarios(parent_scenario: Dict, user_profile: Dict, branch_level: int) -> Optional[List[Dict]]:
+    """
+    Compute the 3 child scenarios for an arithmetic branch level
+
+    Every scenario is checked against FinancingScenario like the LLM's;
+    the extra figures (total_cost, interest_saved, ...) are kept.
+
+    Returns:
+        List of 3 scenarios, or None when the level needs the LLM
+    """
+    builder = _BUILDERS.get(branch_level)
+    if builder is None:
+        return None
+
+    base = _baseline(parent_scenario, user_profile or {})
+    if branch_level in LOAN_BRANCH_LEVELS and (base.plan_type == "lease" or base.principal <= 0):
+        return None
+    scenarios = builder(base)
+    if not scenarios:
+        return None
+
+    try:
+        return [{**scenario, **FinancingScenario.model_validate(scenario).model_dump()} for scenario in scenarios]
+    except ValidationError as e:
+        print(f"Local branch level {branch_level} produced an invalid scenario: {e.errors()[0]['loc']} {e.errors()[0]['msg']}")
+        return None
@@ -0,0 +1,118 @@
+"""
+Idempotency-Key handling for answer submissions
+
+The first request with a key claims it by inserting a row; its response
+is stored when it finishes, and later requests with the same key and
+body get that response back instead of running again. Rows are written
+with their own DB sessions so streamed responses can be recorded after
+the request-scoped session has closed.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .config import settings
+from .database import AsyncSessionLocal
+from .models import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(Exception):
+    """The key cannot be used for this request right now"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def request_fingerprint(endpoint: str, body: Dict) -> str:
+    """Hash of what a key is bound to, so a reused key with a new body is rejected"""
+    canonical = json.dumps({"endpoint": endpoint, "body": body}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def claim_idempotency_key(user_id: int, key: str, fingerprint: str) -> Optional[Tuple[int, Any]]:
+    """
+    Claim `key` for a new request
+
+    Returns None when the caller should run the request, or the stored
+    (status_code, response) to replay.
+
+    Raises:
+        IdempotencyConflict: If the key is too long, was used with a
+            different request, or its first request is still running
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyConflict(400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+    async with AsyncSessionLocal() as db:
+        # A second pass is only needed when an expired row was cleared
+        for _ in range(2):
+            now = datetime.now()
+            db.add(IdempotencyKey(
+                user_id=user_id,
+                key=key,
+                request_hash=fingerprint,
+                expires_at=now + timedelta(hours=settings.idempotency_key_ttl_hours)
+            ))
+            try:
+                await db.commit()
+                return None
+            except IntegrityError:
+                await db.rollback()
+
+            expired = await db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.expires_at <= now
+                )
+            )
+            await db.commit()
+            if expired.rowcount:
+                continue
+
+            result = await db.execute(
+                select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            )
+            record = result.scalar_one_or_none()
+            if record is None:
+                continue
+
+            if record.request_hash != fingerprint:
+                raise IdempotencyConflict(422, "Idempotency-Key was already used with a different request")
+            if record.response is None:
+                raise IdempotencyConflict(409, "A request with this Idempotency-Key is still in progress")
+            return record.status_code, record.response
+
+    raise IdempotencyConflict(409, "A request with this Idempotency-Key is still in progress")
+
+
+async def complete_idempotency_key(user_id: int, key: str, status_code: int, response: Any) -> None:
+    """Store the response replayed for later requests with `key`"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(status_code=status_code, response=response)
+        )
+        await db.commit()
+
+
+async def release_idempotency_key(user_id: int, key: str) -> None:
+    """Drop an unfinished claim so the client can retry with the same key"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.response.is_(None)
+            )
+        )
+        await db.commit()
@@ -1,99 +1,365 @@
 """
 Interview service to handle agent interactions and session management
 """
+import asyncio
+import base64
+import binascii
 import json
+import time
 import uuid
-import os
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-from sqlalchemy.orm import Session
-from google import genai
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import String, Text, cast, literal, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer, undefer_group
 
-from .models import InterviewSession, User
+from .compaction import unpack_archive
+from .config import settings
+from .database import IS_SQLITE, AsyncSessionLocal
+from .expansion_cache import ExpansionCache
+from .finance import LOCAL_BRANCH_LEVELS, build_child_scenarios
+from . import json_codec, metrics
+from .jobs import JobRunner
+from .json_stream import JSONArrayParser
+from .llm_backends import LLMResponse, get_llm_backend
+from .llm_gateway import LLMGateway, LLMUnavailableError, Priority
+from .models import InterviewMessage, InterviewSession, ScenarioNode, User
+from .models.schemas import ExtractedProfile, FinancingScenario, ScenarioProse
+from .prefetch import Prefetcher
+from .prompt_cache import PromptCache
+from .scenario_feed import TERMINAL_EVENTS, ScenarioFeed
+from .scenario_tree import (
+    ensure_root_nodes,
+    load_children,
+    load_subtree,
+    next_branch_level,
+    seed_root_nodes,
+    store_children
+)
+from .slots import (
+    SLOT_LABELS,
+    missing_slots,
+    parsed_slot_values,
+    slot_values,
+    unconfirmed_slots,
+    update_slot_state
+)
 
-# Initialize the Google Generative AI client
-client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+GEMINI_MODEL = 'gemini-2.0-flash'
 
 
-def create_interview_session(db: Session, user_id: int) -> Tuple[str, str]:
-    """
-    Create a new interview session and get the first question
+class _ConfiguredBackend:
+    """Resolve the LLM backend from settings on first use, not at import"""
     
-    Returns:
-        Tuple of (session_id, first_question)
+    def __getattr__(self, name):
+        return getattr(get_llm_backend(), name)
+
+
+llm = _ConfiguredBackend()
+
+# Static agent instructions are sent as cached system prompts
+prompt_cache = PromptCache(
+    llm,
+    enabled=settings.prompt_cache_enabled,
+    ttl_seconds=settings.prompt_cache_ttl_seconds,
+    refresh_margin_seconds=settings.prompt_cache_refresh_margin_seconds,
+    min_tokens=settings.prompt_cache_min_tokens
+)
+
+
+# Every Gemini call goes through the gateway's quota, retries and breaker
+llm_gateway = LLMGateway(
+    requests_per_minute=settings.llm_requests_per_minute,
+    tokens_per_minute=settings.llm_tokens_per_minute,
+    background_reserve=settings.llm_background_reserve,
+    max_queue_wait=settings.llm_max_queue_wait,
+    max_attempts=settings.llm_max_attempts,
+    retry_base_delay=settings.llm_retry_base_delay,
+    retry_max_delay=settings.llm_retry_max_delay,
+    failure_threshold=settings.llm_breaker_failure_threshold,
+    reset_seconds=settings.llm_breaker_reset_seconds
+)
+
+
+def _is_cache_miss(error: Exception) -> bool:
+    """Whether a failed call may be due to an expired cached content"""
+    message = str(error)
+    return "NOT_FOUND" in message or "404" in message or "cachedContent" in message
+
+
+def _record_llm_call(agent: str, started: float, response: Optional[LLMResponse]) -> None:
+    """Record one LLM call's latency and token usage"""
+    agent_name, branch_level = metrics.agent_labels(agent)
+    outcome = "error" if response is None else "ok"
+    metrics.llm_call_duration.observe(time.perf_counter() - started, agent_name, branch_level, outcome)
+    
+    if response is not None:
+        if response.prompt_tokens:
+            metrics.llm_tokens.inc(agent_name, branch_level, "prompt", amount=response.prompt_tokens)
+        if response.output_tokens:
+            metrics.llm_tokens.inc(agent_name, branch_level, "response", amount=response.output_tokens)
+
+
+def _parse_json(agent: str, text: str):
+    """Decode an LLM's JSON output, counting failures per agent"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        metrics.llm_json_failures.inc(metrics.agent_labels(agent)[0])
+        raise
+
+
+async def _generate(
+    agent: str,
+    instruction: str,
+    contents: str,
+    priority: str = Priority.INTERACTIVE,
+    **config_fields
+) -> LLMResponse:
     """
-    # Generate unique session ID
-    session_id = str(uuid.uuid4())
+    Call the LLM as `agent` with `instruction` as the (cached) system
+    prompt and `contents` as the per-call input
+    """
+    cached_content = await prompt_cache.cached_name(agent, GEMINI_MODEL, instruction)
+    estimated_tokens = LLMGateway.estimate_tokens(
+        instruction,
+        contents,
+        output_tokens=config_fields.get("max_output_tokens") or settings.llm_estimated_output_tokens
+    )
     
-    # Get first question from interviewer agent
-    first_question = "Hi! I'm your Toyota Financial Services assistant. I'm here to help you find the best financing or leasing option for your dream Toyota vehicle. Let's start by getting to know you better. What's your name?"
+    def call(cached_content):
+        return lambda: llm.generate(
+            agent, GEMINI_MODEL, instruction, contents, cached_content, **config_fields
+        )
     
-    # Initialize conversation history
-    conversation_history = [
-        {
-            "role": "agent",
-            "content": first_question,
-            "timestamp": datetime.now().isoformat()
-        }
-    ]
+    started = time.perf_counter()
+    response = None
+    try:
+        try:
+            response = await llm_gateway.generate(call(cached_content), estimated_tokens, priority)
+        except Exception as e:
+            if not cached_content or not _is_cache_miss(e):
+                raise
+            # The cache expired server-side; retry once with the inline instruction
+            print(f"Cached prompt {agent} unavailable, retrying uncached: {e}")
+            prompt_cache.invalidate(cached_content)
+            response = await llm_gateway.generate(call(None), estimated_tokens, priority)
+    finally:
+        _record_llm_call(agent, started, response)
     
-    # Create session in database
-    session = InterviewSession(
-        session_id=session_id,
-        user_id=user_id,
-        conversation_history=json.dumps(conversation_history),
-        is_complete=False
+    return response
+
+
+async def _generate_stream(
+    agent: str,
+    instruction: str,
+    contents: str,
+    priority: str = Priority.INTERACTIVE,
+    **config_fields
+) -> AsyncIterator[LLMResponse]:
+    """Streaming counterpart of _generate"""
+    cached_content = await prompt_cache.cached_name(agent, GEMINI_MODEL, instruction)
+    estimated_tokens = LLMGateway.estimate_tokens(
+        instruction,
+        contents,
+        output_tokens=config_fields.get("max_output_tokens") or settings.llm_estimated_output_tokens
     )
     
-    db.add(session)
-    db.commit()
-    db.refresh(session)
+    def call(cached_content):
+        return lambda: llm.generate_stream(
+            agent, GEMINI_MODEL, instruction, contents, cached_content, **config_fields
+        )
     
-    return session_id, first_question
+    started = time.perf_counter()
+    try:
+        try:
+            stream = await llm_gateway.stream(call(cached_content), estimated_tokens, priority)
+        except Exception as e:
+            if not cached_content or not _is_cache_miss(e):
+                raise
+            print(f"Cached prompt {agent} unavailable, retrying uncached: {e}")
+            prompt_cache.invalidate(cached_content)
+            stream = await llm_gateway.stream(call(None), estimated_tokens, priority)
+    except Exception:
+        _record_llm_call(agent, started, None)
+        raise
+    
+    async def recorded() -> AsyncIterator[LLMResponse]:
+        # Latency covers the whole stream; usage arrives on the last chunk
+        last = None
+        try:
+            async for chunk in stream:
+                last = chunk
+                yield chunk
+        except Exception:
+            last = None
+            raise
+        finally:
+            _record_llm_call(agent, started, last or LLMResponse(text=""))
+    
+    return recorded()
 
 
-def process_interview_answer(
-    db: Session,
-    session_id: str,
-    user_answer: str
-) -> Tuple[str, bool]:
+def _json_output(schema) -> Dict:
+    """Config fields that constrain a response to JSON matching `schema`"""
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": schema
+    }
+
+
+def _validate_item(item, schema: Type[BaseModel]) -> Optional[Dict]:
     """
-    Process user's answer and get next question from agent
+    Validate one decoded object against `schema`
     
-    Returns:
-        Tuple of (next_question, is_complete)
+    Invalid optional fields are dropped rather than failing the whole
+    object; returns None when a required field is missing or invalid.
     """
-    # Get session from database
-    session = db.query(InterviewSession).filter(
-        InterviewSession.session_id == session_id
-    ).first()
+    if not isinstance(item, dict):
+        metrics.llm_rejected_items.inc(schema.__name__)
+        return None
+    
+    try:
+        return schema.model_validate(item).model_dump()
+    except ValidationError as e:
+        invalid_fields = {error["loc"][0] for error in e.errors() if error["loc"]}
+    
+    cleaned = {key: value for key, value in item.items() if key not in invalid_fields}
+    try:
+        validated = schema.model_validate(cleaned).model_dump()
+    except ValidationError as e:
+        print(f"Rejected {schema.__name__}: {e.errors()[0]['loc']} {e.errors()[0]['msg']}")
+        metrics.llm_rejected_items.inc(schema.__name__)
+        return None
+    
+    print(f"Dropped invalid {schema.__name__} fields: {sorted(invalid_fields)}")
+    return validated
+
+
+def _validate_items(items, schema: Type[BaseModel]) -> List[Dict]:
+    """Validate a decoded JSON array item by item, keeping the valid ones"""
+    if not isinstance(items, list):
+        raise ValueError(f"Expected a JSON array of {schema.__name__}")
+    
+    validated = [_validate_item(item, schema) for item in items]
+    return [item for item in validated if item is not None]
+
+
+async def _stream_items(
+    agent: str,
+    stream: AsyncIterator[LLMResponse],
+    schema: Type[BaseModel]
+) -> AsyncIterator[Dict]:
+    """
+    Validated items of a streamed JSON array, each yielded as soon as its
+    closing brace arrives
+    """
+    parser = JSONArrayParser()
+    try:
+        async for chunk in stream:
+            for item in parser.feed(chunk.text or ""):
+                validated = _validate_item(item, schema)
+                if validated is not None:
+                    yield validated
+        parser.close()
+    except ValueError:
+        metrics.llm_json_failures.inc(metrics.agent_labels(agent)[0])
+        raise
+
+
+async def _get_session(db: AsyncSession, session_id: str) -> InterviewSession:
+    """
+    Load an interview session, including its JSON documents, by its public
+    ID or raise ValueError
+    """
+    result = await db.execute(
+        select(InterviewSession)
+        .where(InterviewSession.session_id == session_id)
+        .options(undefer_group("documents"))
+    )
+    session = result.scalar_one_or_none()
     
     if not session:
         raise ValueError(f"Interview session {session_id} not found")
     
-    if session.is_complete:
-        raise ValueError("Interview is already complete")
-    
-    # Load conversation history
-    conversation_history = json.loads(session.conversation_history)
+    return session
+
+
+async def _load_conversation_history(db: AsyncSession, session_pk: int) -> List[Dict]:
+    """Read a session's messages in order via the (session, sequence) index"""
+    result = await db.execute(
+        select(
+            InterviewMessage.role,
+            InterviewMessage.content,
+            InterviewMessage.created_at
+        )
+        .where(InterviewMessage.interview_session_id == session_pk)
+        .order_by(InterviewMessage.sequence)
+    )
     
-    # Add user's answer to history
-    conversation_history.append({
-        "role": "user",
-        "content": user_answer,
-        "timestamp": datetime.now().isoformat()
-    })
+    history = [
+        {
+            "role": role,
+            "content": content,
+            "timestamp": created_at.isoformat()
+        }
+        for role, content, created_at in result.all()
+    ]
+    if history:
+        return history
     
-    # Build conversation context for agent
-    conversation_text = "\n\n".join([
+    # Compacted sessions keep their transcript in the archive
+    archive = await db.scalar(select(InterviewSession.archive).where(InterviewSession.id == session_pk))
+    return unpack_archive(archive).get("messages", [])
+
+
+def _format_transcript(conversation_history: List[Dict]) -> str:
+    """Render the conversation as the plain-text transcript agents read"""
+    return "\n\n".join([
         f"{'Agent' if msg['role'] == 'agent' else 'User'}: {msg['content']}"
         for msg in conversation_history
     ])
+
+
+async def create_interview_session(db: AsyncSession, user_id: int) -> Tuple[str, str]:
+    """
+    Create a new interview session and get the first question
     
-    # Get next question from interviewer agent
-    try:
-        # Build interviewer instruction
-        interviewer_instruction = """
+    Returns:
+        Tuple of (session_id, first_question)
+    """
+    # Generate unique session ID
+    session_id = str(uuid.uuid4())
+    
+    # Get first question from interviewer agent
+    first_question = "Hi! I'm your Toyota Financial Services assistant. I'm here to help you find the best financing or leasing option for your dream Toyota vehicle. Let's start by getting to know you better. What's your name?"
+    
+    # Create session in database
+    session = InterviewSession(
+        session_id=session_id,
+        user_id=user_id,
+        is_complete=False
+    )
+    db.add(session)
+    await db.flush()
+    
+    # Initialize conversation history
+    db.add(InterviewMessage(
+        interview_session_id=session.id,
+        sequence=0,
+        role="agent",
+        content=first_question,
+        created_at=datetime.now()
+    ))
+    await db.commit()
+    
+    return session_id, first_question
+
+
+INTERVIEWER_INSTRUCTION = """
 You are a smart, friendly Toyota Financial Services assistant. Your job is to help users find the best way to finance or lease their Toyota vehicle.
 
 Your role is to conduct a conversational interview to gather all necessary information about the user's financial situation and vehicle preferences.
@@ -115,84 +381,518 @@ Information you need to collect:
 
 Once you have ALL this information, respond with "INTERVIEW_COMPLETE" followed by a thank you message.
 """
-        
-        # Use the client to generate next question
-        prompt = f"""{interviewer_instruction}
 
-Based on this conversation so far, determine your next question.
+INTERVIEW_COMPLETE_SENTINEL = "INTERVIEW_COMPLETE"
+
+COMPLETION_FALLBACK_MESSAGE = "Thank you for providing all this information! I'm now analyzing your profile to create personalized financing options for you."
+
+AGENT_ERROR_FALLBACK_QUESTION = "Thank you! Could you tell me more about your financial situation?"
+
+
+class SessionBusyError(Exception):
+    """Another answer for the session is being processed, or was saved first"""
+
+
+@dataclass
+class AnswerTurn:
+    """State carried from loading a session to persisting the agent's reply"""
+    session_pk: int
+    session_id: str
+    user_answer: str
+    answered_at: datetime
+    conversation_history: List[Dict]
+    conversation_text: str
+    slot_state: Dict
+    version: int  # session version this turn holds the lease at
+
+
+def _build_answer_turn(
+    session_pk: int,
+    session_id: str,
+    version: int,
+    conversation_history: List[Dict],
+    slot_state: Optional[Dict],
+    user_answer: str
+) -> AnswerTurn:
+    """Append the user's answer to a copy of the transcript and update the slots"""
+    # Fill what slots we can from the answer to the last question
+    last_question = conversation_history[-1]["content"] if conversation_history else ""
+    slot_state = update_slot_state(
+        slot_state,
+        last_question,
+        user_answer,
+        len(conversation_history)
+    )
+    
+    # Add user's answer to history
+    answered_at = datetime.now()
+    conversation_history = conversation_history + [{
+        "role": "user",
+        "content": user_answer,
+        "timestamp": answered_at.isoformat()
+    }]
+    
+    return AnswerTurn(
+        session_pk=session_pk,
+        session_id=session_id,
+        user_answer=user_answer,
+        answered_at=answered_at,
+        conversation_history=conversation_history,
+        # Build conversation context for agent
+        conversation_text=_format_transcript(conversation_history),
+        slot_state=slot_state,
+        version=version + 1
+    )
+
+
+async def _claim_answer_turn(db: AsyncSession, turn: AnswerTurn) -> None:
+    """
+    Lease the session to `turn` if nothing changed it since the version
+    the turn was built from, then commit
+    """
+    claim = await db.execute(
+        update(InterviewSession)
+        .where(
+            InterviewSession.id == turn.session_pk,
+            InterviewSession.version == turn.version - 1,
+            or_(
+                InterviewSession.answer_lease_until.is_(None),
+                InterviewSession.answer_lease_until < turn.answered_at
+            )
+        )
+        .values(
+            version=turn.version,
+            answer_lease_until=turn.answered_at + timedelta(seconds=settings.answer_lease_seconds)
+        )
+    )
+    if claim.rowcount == 0:
+        await db.rollback()
+        raise SessionBusyError("Another answer for this session is being processed")
+    
+    # Release the DB connection while waiting on Gemini
+    await db.commit()
+
+
+async def begin_answer_turn(
+    db: AsyncSession,
+    session_id: str,
+    user_answer: str
+) -> AnswerTurn:
+    """
+    Load the session, append the user's answer and build the transcript
+    
+    The session is leased to this turn until it is finished or released,
+    so a duplicate submission fails fast instead of paying for a second
+    LLM call.
+    
+    Raises:
+        ValueError: If the session does not exist or is already complete
+        SessionBusyError: If another answer holds the session
+    """
+    # Get session from database
+    session = await _get_session(db, session_id)
+    
+    if session.is_complete:
+        raise ValueError("Interview is already complete")
+    
+    turn = _build_answer_turn(
+        session.id,
+        session.session_id,
+        session.version,
+        await _load_conversation_history(db, session.id),
+        session.slot_state,
+        user_answer
+    )
+    await _claim_answer_turn(db, turn)
+    return turn
+
+
+async def release_answer_turn(turn: AnswerTurn) -> None:
+    """Give up a turn's lease without saving it, so the answer can be resubmitted"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(InterviewSession)
+            .where(InterviewSession.id == turn.session_pk, InterviewSession.version == turn.version)
+            .values(answer_lease_until=None)
+        )
+        await db.commit()
+
+
+def _build_interviewer_prompt(conversation_text: str, slot_state: Optional[Dict] = None) -> str:
+    """Build the per-turn interviewer input (the instruction is cached)"""
+    missing = missing_slots(slot_state)
+    unconfirmed = unconfirmed_slots(slot_state)
+    notes = []
+    if missing:
+        notes.append("Information that may still be missing: " + ", ".join(SLOT_LABELS[slot] for slot in missing))
+    if unconfirmed:
+        # Free-text fills are guesses; the model must judge them from the transcript
+        notes.append(
+            "Possibly answered, check the conversation and ask again if unclear: "
+            + ", ".join(SLOT_LABELS[slot] for slot in unconfirmed)
+        )
+    still_needed = "\n".join(notes) or "All of the information appears to have been collected."
+    
+    return f"""Based on this conversation so far, determine your next question.
 
 Conversation:
 {conversation_text}
 
+{still_needed}
+
 Your response:"""
-        
-        response = client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=prompt
+
+
+def _parse_interviewer_reply(agent_response: str) -> Tuple[str, bool]:
+    """
+    Split the interviewer's raw reply into the message shown to the user
+    and the completion flag
+    """
+    # Check if interview is complete
+    is_complete = INTERVIEW_COMPLETE_SENTINEL in agent_response.upper()
+    
+    if is_complete:
+        # Extract the thank you message (everything after INTERVIEW_COMPLETE)
+        next_question = agent_response.split(INTERVIEW_COMPLETE_SENTINEL)[-1].strip()
+        if not next_question:
+            next_question = COMPLETION_FALLBACK_MESSAGE
+        return next_question, True
+    
+    return agent_response, False
+
+
+async def finish_answer_turn(
+    db: AsyncSession,
+    turn: AnswerTurn,
+    next_question: str,
+    is_complete: bool
+) -> None:
+    """
+    Persist the agent's reply and queue post-interview processing
+    
+    Raises:
+        SessionBusyError: If the lease expired and another turn took the
+            session; nothing is written
+    """
+    values = {"slot_state": turn.slot_state, "version": turn.version + 1, "answer_lease_until": None}
+    if is_complete:
+        values.update(
+            is_complete=True,
+            completed_at=datetime.now(),
+            processing_status=ProcessingStatus.QUEUED
         )
-        
-        agent_response = response.text
-        
-        # Check if interview is complete
-        is_complete = "INTERVIEW_COMPLETE" in agent_response.upper()
-        
-        if is_complete:
-            # Extract the thank you message (everything after INTERVIEW_COMPLETE)
-            next_question = agent_response.split("INTERVIEW_COMPLETE")[-1].strip()
-            if not next_question:
-                next_question = "Thank you for providing all this information! I'm now analyzing your profile to create personalized financing options for you."
-        else:
-            next_question = agent_response
-        
-    except Exception as e:
-        print(f"Error getting agent response: {e}")
-        # Fallback to simple continuation
-        next_question = "Thank you! Could you tell me more about your financial situation?"
-        is_complete = False
+    saved = await db.execute(
+        update(InterviewSession)
+        .where(InterviewSession.id == turn.session_pk, InterviewSession.version == turn.version)
+        .values(**values)
+    )
+    if saved.rowcount == 0:
+        await db.rollback()
+        raise SessionBusyError("The session was changed by another answer")
     
-    # Add agent's response to history
-    conversation_history.append({
+    # Both messages of the turn are appended; earlier rows are never rewritten
+    next_sequence = len(turn.conversation_history) - 1
+    replied_at = datetime.now()
+    db.add_all([
+        InterviewMessage(
+            interview_session_id=turn.session_pk,
+            sequence=next_sequence,
+            role="user",
+            content=turn.user_answer,
+            created_at=turn.answered_at
+        ),
+        InterviewMessage(
+            interview_session_id=turn.session_pk,
+            sequence=next_sequence + 1,
+            role="agent",
+            content=next_question,
+            created_at=replied_at
+        )
+    ])
+    
+    turn.conversation_history.append({
         "role": "agent",
         "content": next_question,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": replied_at.isoformat()
     })
     
-    # Update session
-    session.conversation_history = json.dumps(conversation_history)
+    await db.commit()
     
+    # Reviewer and node_maker run in the background so this turn returns
+    # at the latency of a normal one
     if is_complete:
-        session.is_complete = True
-        session.completed_at = datetime.now()
+        post_interview_jobs.enqueue(turn.session_id)
+
+
+async def process_interview_answer(
+    db: AsyncSession,
+    session_id: str,
+    user_answer: str
+) -> Tuple[str, bool]:
+    """
+    Process user's answer and get next question from agent
+    
+    Returns:
+        Tuple of (next_question, is_complete)
+    """
+    turn = await begin_answer_turn(db, session_id, user_answer)
+    
+    saved = False
+    try:
+        # Get next question from interviewer agent
+        try:
+            response = await _generate(
+                "interviewer",
+                INTERVIEWER_INSTRUCTION,
+                _build_interviewer_prompt(turn.conversation_text, turn.slot_state)
+            )
+            
+            next_question, is_complete = _parse_interviewer_reply(response.text)
+            
+        except LLMUnavailableError:
+            # Surface quota and outage errors so the client can resubmit
+            raise
+        except Exception as e:
+            print(f"Error getting agent response: {e}")
+            # Fallback to simple continuation
+            next_question = AGENT_ERROR_FALLBACK_QUESTION
+            is_complete = False
         
-        # Process with reviewer and node_maker agents
+        await finish_answer_turn(db, turn, next_question, is_complete)
+        saved = True
+    finally:
+        # Failed and cancelled requests (client disconnects, shutdown) hand
+        # the session back right away instead of holding it until the lease expires
+        if not saved:
+            await release_answer_turn(turn)
+    
+    return next_question, is_complete
+
+
+class _SentinelFilter:
+    """
+    Forward streamed interviewer text while withholding anything that
+    could be the start of the completion sentinel split across chunks
+    """
+    
+    def __init__(self):
+        self._pending = ""
+        self.is_complete = False
+    
+    def _held_suffix_length(self) -> int:
+        # Longest tail of the pending text that is a prefix of the sentinel
+        upper = self._pending.upper()
+        for length in range(min(len(upper), len(INTERVIEW_COMPLETE_SENTINEL) - 1), 0, -1):
+            if INTERVIEW_COMPLETE_SENTINEL.startswith(upper[-length:]):
+                return length
+        return 0
+    
+    def feed(self, text: str) -> List[Dict]:
+        """Consume a chunk and return the events that are safe to emit"""
+        if self.is_complete:
+            return [{"event": "chunk", "data": {"text": text}}] if text else []
+        
+        self._pending += text
+        index = self._pending.upper().find(INTERVIEW_COMPLETE_SENTINEL)
+        
+        if index != -1:
+            # Text after the sentinel is the closing message
+            self.is_complete = True
+            remainder = self._pending[index + len(INTERVIEW_COMPLETE_SENTINEL):].lstrip()
+            self._pending = ""
+            events = [{"event": "complete", "data": {}}]
+            if remainder:
+                events.append({"event": "chunk", "data": {"text": remainder}})
+            return events
+        
+        cut = len(self._pending) - self._held_suffix_length()
+        ready, self._pending = self._pending[:cut], self._pending[cut:]
+        return [{"event": "chunk", "data": {"text": ready}}] if ready else []
+    
+    def flush(self) -> List[Dict]:
+        """Release any withheld text once the stream has ended"""
+        ready, self._pending = self._pending, ""
+        return [{"event": "chunk", "data": {"text": ready}}] if ready else []
+
+
+async def stream_interview_answer(turn: AnswerTurn) -> AsyncIterator[Dict]:
+    """
+    Stream the interviewer's next question as it is generated
+    
+    Yields event dicts ({"event": ..., "data": ...}): "chunk" for text
+    deltas, "complete" when the sentinel is detected, and a final "done"
+    carrying the persisted question. The reply is written with a fresh DB
+    session because the request-scoped one may already be closed. An
+    "error" event (503 or 409) ends the stream when the turn was not saved.
+    """
+    sentinel_filter = _SentinelFilter()
+    raw_chunks = []
+    saved = False
+    
+    try:
         try:
-            extracted_profile, scenarios = process_complete_interview(conversation_text)
-            session.extracted_profile = json.dumps(extracted_profile)
-            session.financing_scenarios = json.dumps(scenarios)
+            stream = await _generate_stream(
+                "interviewer",
+                INTERVIEWER_INSTRUCTION,
+                _build_interviewer_prompt(turn.conversation_text, turn.slot_state)
+            )
+            
+            async for chunk in stream:
+                text = chunk.text or ""
+                raw_chunks.append(text)
+                for event in sentinel_filter.feed(text):
+                    yield event
+            
+            for event in sentinel_filter.flush():
+                yield event
+            
+            next_question, is_complete = _parse_interviewer_reply("".join(raw_chunks))
+            
+        except LLMUnavailableError as e:
+            if raw_chunks:
+                raise
+            # Nothing was shown yet, so the turn is dropped and can be resubmitted
+            yield {
+                "event": "error",
+                "data": {"status": 503, "detail": str(e), "retry_after": round(e.retry_after)}
+            }
+            return
         except Exception as e:
-            print(f"Error processing complete interview: {e}")
+            print(f"Error streaming agent response: {e}")
+            next_question = AGENT_ERROR_FALLBACK_QUESTION
+            is_complete = False
+        
+        try:
+            async with AsyncSessionLocal() as db:
+                await finish_answer_turn(db, turn, next_question, is_complete)
+        except SessionBusyError as e:
+            yield {"event": "error", "data": {"status": 409, "detail": str(e)}}
+            return
+        saved = True
+        
+        yield {
+            "event": "done",
+            "data": {"question": next_question, "is_complete": is_complete}
+        }
+    finally:
+        # Failed or abandoned streams hand the session back right away
+        # instead of holding it until the lease expires
+        if not saved:
+            await release_answer_turn(turn)
+
+
+@dataclass
+class InterviewConnection:
+    """
+    Session state a WebSocket keeps between turns instead of re-reading it
     
-    db.commit()
-    db.refresh(session)
+    `version` is the session version this state was read at; a turn that
+    finds the stored version moved on reloads the state from the database.
+    """
+    session_pk: int
+    session_id: str
+    user_id: int
+    version: int
+    conversation_history: List[Dict]
+    slot_state: Optional[Dict]
+    is_complete: bool
     
-    return next_question, is_complete
+    def snapshot(self) -> Dict:
+        return {
+            "session_id": self.session_id,
+            "is_complete": self.is_complete,
+            "messages": self.conversation_history
+        }
 
 
-def process_complete_interview(conversation_text: str) -> Tuple[Dict, List[Dict]]:
+async def open_interview_connection(db: AsyncSession, session_id: str, user_id: int) -> InterviewConnection:
     """
-    Process completed interview with reviewer and node_maker agents
+    Load the state of one of `user_id`'s sessions
     
-    Returns:
-        Tuple of (extracted_profile, financing_scenarios)
+    Raises:
+        ValueError: If the session does not exist or belongs to someone else
     """
-    # Step 1: Use reviewer agent to extract and validate profile
-    reviewer_instruction = """
+    result = await db.execute(
+        select(InterviewSession)
+        .where(InterviewSession.session_id == session_id, InterviewSession.user_id == user_id)
+        .options(undefer(InterviewSession.slot_state))
+    )
+    session = result.scalar_one_or_none()
+    if session is None:
+        raise ValueError(f"Interview session {session_id} not found")
+    
+    return InterviewConnection(
+        session_pk=session.id,
+        session_id=session.session_id,
+        user_id=user_id,
+        version=session.version,
+        conversation_history=await _load_conversation_history(db, session.id),
+        slot_state=session.slot_state,
+        is_complete=session.is_complete
+    )
+
+
+async def _reload_connection(connection: InterviewConnection) -> None:
+    async with AsyncSessionLocal() as db:
+        fresh = await open_interview_connection(db, connection.session_id, connection.user_id)
+    connection.__dict__.update(fresh.__dict__)
+
+
+async def stream_connection_turn(connection: InterviewConnection, user_answer: str) -> AsyncIterator[Dict]:
+    """
+    stream_interview_answer for a WebSocket: the turn is built from the
+    connection's state, so the only query before the LLM call is the
+    lease claim, and only the turn's two new messages are written
+    
+    The connection's state is advanced when the turn is saved and reloaded
+    when it is not.
+    
+    Raises:
+        ValueError: If the interview is already complete
+        SessionBusyError: If another request holds or changed the session
+    """
+    if connection.is_complete:
+        raise ValueError("Interview is already complete")
+    
+    turn = _build_answer_turn(
+        connection.session_pk,
+        connection.session_id,
+        connection.version,
+        connection.conversation_history,
+        connection.slot_state,
+        user_answer
+    )
+    try:
+        async with AsyncSessionLocal() as db:
+            await _claim_answer_turn(db, turn)
+    except SessionBusyError:
+        # Another tab or an HTTP request got there first
+        await _reload_connection(connection)
+        raise
+    
+    saved = False
+    try:
+        async for event in stream_interview_answer(turn):
+            if event["event"] == "done":
+                saved = True
+                connection.version = turn.version + 1
+                connection.conversation_history = turn.conversation_history
+                connection.slot_state = turn.slot_state
+                connection.is_complete = event["data"]["is_complete"]
+            yield event
+    finally:
+        if not saved:
+            await _reload_connection(connection)
+
+
+REVIEWER_INSTRUCTION = """
 You are a helpful assistant that analyzes an interview conversation and extracts key information to populate a user's profile for Toyota financing or leasing.
 
 Based on the conversation, determine if enough information has been gathered to understand the user's financial situation and preferences.
 
 If the information is sufficient, respond with a JSON object containing the extracted information with these fields:
 - "is_complete": true
+- "name": User's name
 - "bio": User's background summary
 - "goal": User's goals
 - "location": User's location
@@ -213,47 +913,8 @@ If NOT sufficient, respond with:
 
 IMPORTANT: Output ONLY the JSON object. No extra text.
 """
-    
-    reviewer_prompt = f"""{reviewer_instruction}
-
-Conversation:
-{conversation_text}
 
-Your analysis (JSON only):"""
-    
-    try:
-        response = client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=reviewer_prompt
-        )
-        reviewer_response = response.text
-    except Exception as e:
-        print(f"Error calling reviewer: {e}")
-        return {"is_complete": False, "reason": "Error processing"}, []
-    
-    # Parse reviewer response (should be JSON)
-    try:
-        # Try to extract JSON from response
-        if "{" in reviewer_response:
-            json_start = reviewer_response.index("{")
-            json_end = reviewer_response.rindex("}") + 1
-            json_str = reviewer_response[json_start:json_end]
-            extracted_profile = json.loads(json_str)
-        else:
-            raise ValueError("No JSON found in reviewer response")
-        
-        # Check if profile is complete
-        if not extracted_profile.get("is_complete", False):
-            print(f"Profile incomplete: {extracted_profile.get('reason', 'Unknown')}")
-            return extracted_profile, []
-            
-    except Exception as e:
-        print(f"Error parsing reviewer response: {e}")
-        extracted_profile = {"is_complete": False, "reason": "Failed to parse profile"}
-        return extracted_profile, []
-    
-    # Step 2: Use node_maker agent to generate scenarios
-    node_maker_instruction = """
+NODE_MAKER_INSTRUCTION = """
 You are an expert Auto Financing Scenario Generator for Toyota Financial Services.
 
 Create exactly 5 realistic, personalized, and financially sound vehicle financing or leasing scenarios.
@@ -273,125 +934,530 @@ Each scenario object MUST include:
 
 Output ONLY valid JSON array - no explanations or additional text.
 """
+
+
+class ProcessingStatus:
+    """Values of InterviewSession.processing_status"""
+    QUEUED = "queued"
+    REVIEWING = "reviewing"
+    GENERATING = "generating"
+    DONE = "done"
+    FAILED = "failed"
+    
+    ACTIVE = (QUEUED, REVIEWING, GENERATING)
+
+
+async def _review_interview(conversation_text: str, slot_state: Optional[Dict] = None) -> Dict:
+    """
+    Extract and validate the user's profile with the reviewer agent
+    
+    Parsed slots are passed along so the reviewer does not write them
+    again, and free-text slots as tentative values it must check against
+    the transcript. Only when every slot was parsed is the reviewer
+    skipped. Raises on LLM or parse errors so the job can be retried.
+    """
+    known = parsed_slot_values(slot_state)
+    tentative = {slot: value for slot, value in slot_values(slot_state).items() if slot not in known}
+    if not missing_slots(slot_state) and not tentative:
+        profile = _validate_item({"is_complete": True, **known}, ExtractedProfile)
+        if profile is not None:
+            metrics.interview_reviews.inc("skipped")
+            return profile
+    
+    already_extracted = ""
+    if known:
+        already_extracted += f"""
+Already extracted (do not repeat these fields, return the others):
+{json.dumps(known, indent=2)}
+"""
+    if tentative:
+        already_extracted += f"""
+Guessed from single answers (verify against the conversation and return corrected values):
+{json.dumps(tentative, indent=2)}
+"""
+    
+    reviewer_prompt = f"""Conversation:
+{conversation_text}
+{already_extracted}
+Your analysis (JSON only):"""
+    
+    response = await _generate(
+        "reviewer",
+        REVIEWER_INSTRUCTION,
+        reviewer_prompt,
+        priority=Priority.BACKGROUND,
+        **_json_output(ExtractedProfile)
+    )
     
-    node_maker_prompt = f"""{node_maker_instruction}
+    extracted_profile = _validate_item(_parse_json("reviewer", response.text), ExtractedProfile)
+    if extracted_profile is None:
+        raise ValueError("Reviewer response did not match the profile schema")
+    metrics.interview_reviews.inc("partial" if known else "full")
+    
+    # Parsed values are exact; guessed free text is left to the reviewer
+    extracted_profile.update(known)
+    
+    return extracted_profile
+
+
+# Root scenarios reach subscribed clients while node_maker is still writing
+scenario_feed = ScenarioFeed()
 
-Customer Profile:
+
+async def _generate_initial_scenarios(session_id: str, extracted_profile: Dict) -> List[Dict]:
+    """
+    Generate the 5 root financing scenarios with the node_maker agent,
+    publishing each to scenario_feed as soon as it is complete
+    
+    Raises on LLM or parse errors so the job can be retried.
+    """
+    node_maker_prompt = f"""Customer Profile:
 {json.dumps(extracted_profile, indent=2)}
 
 Generate 5 scenarios (JSON array only):"""
     
-    try:
-        response = client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=node_maker_prompt
+    # Clients drop scenarios shown by an earlier, failed attempt
+    scenario_feed.publish(session_id, "reset")
+    
+    stream = await _generate_stream(
+        "node_maker",
+        NODE_MAKER_INSTRUCTION,
+        node_maker_prompt,
+        priority=Priority.BACKGROUND,
+        **_json_output(list[FinancingScenario])
+    )
+    
+    scenarios = []
+    async for scenario in _stream_items("node_maker", stream, FinancingScenario):
+        scenario_feed.publish(session_id, "scenario", {"index": len(scenarios), "scenario": scenario})
+        scenarios.append(scenario)
+    
+    if not scenarios:
+        raise ValueError("node_maker returned no valid scenarios")
+    
+    return scenarios
+
+
+def _job_lease_until() -> datetime:
+    return datetime.now() + timedelta(seconds=settings.interview_job_lease_seconds)
+
+
+async def _claim_processing(db: AsyncSession, session_id: str) -> bool:
+    """
+    Lease the post-interview job of `session_id` to this worker, then commit
+    
+    Returns False when the job is finished or another worker holds an
+    unexpired lease on it.
+    """
+    claim = await db.execute(
+        update(InterviewSession)
+        .where(
+            InterviewSession.session_id == session_id,
+            InterviewSession.processing_status.in_(ProcessingStatus.ACTIVE),
+            or_(
+                InterviewSession.processing_lease_until.is_(None),
+                InterviewSession.processing_lease_until < datetime.now()
+            )
         )
-        node_maker_response = response.text
-    except Exception as e:
-        print(f"Error calling node_maker: {e}")
-        return extracted_profile, []
+        .values(
+            processing_status=ProcessingStatus.REVIEWING,
+            processing_attempts=InterviewSession.processing_attempts + 1,
+            processing_error=None,
+            processing_lease_until=_job_lease_until()
+        )
+    )
+    if claim.rowcount == 0:
+        await db.rollback()
+        return False
+    await db.commit()
+    return True
+
+
+async def _release_processing(session_id: str) -> None:
+    """Drop a failed attempt's lease so the retry can claim the job"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(InterviewSession)
+            .where(InterviewSession.session_id == session_id)
+            .values(processing_lease_until=None)
+        )
+        await db.commit()
+
+
+async def process_complete_interview(session_id: str) -> None:
+    """
+    Background job: run the reviewer and node_maker agents for a completed
+    interview, recording progress in InterviewSession.processing_status
     
-    # Parse node_maker response (should be JSON array)
-    try:
-        if "[" in node_maker_response:
-            json_start = node_maker_response.index("[")
-            json_end = node_maker_response.rindex("]") + 1
-            json_str = node_maker_response[json_start:json_end]
-            scenarios = json.loads(json_str)
-        else:
-            raise ValueError("No JSON array found in node_maker response")
-    except Exception as e:
-        print(f"Error parsing node_maker response: {e}")
-        scenarios = []
+    The job only runs after _claim_processing leases the session, so a
+    session recovered or enqueued by several workers is processed once.
+    """
+    async with AsyncSessionLocal() as db:
+        if not await _claim_processing(db, session_id):
+            return
+        
+        try:
+            await _run_processing(db, session_id)
+        except (Exception, asyncio.CancelledError):
+            # Retries, and recovery after a shutdown, must be able to claim it
+            await _release_processing(session_id)
+            raise
+        finally:
+            # A crashed attempt must not leave its partial scenarios buffered
+            scenario_feed.end_generation(session_id)
+
+
+async def _run_processing(db: AsyncSession, session_id: str) -> None:
+    session = await _get_session(db, session_id)
+    conversation_text = _format_transcript(
+        await _load_conversation_history(db, session.id)
+    )
+    slot_state = session.slot_state
+    await db.commit()
+    
+    # Step 1: Use reviewer agent to extract and validate profile
+    extracted_profile = await _review_interview(conversation_text, slot_state)
+    session.extracted_profile = extracted_profile
+    
+    # Check if profile is complete
+    if not extracted_profile.get("is_complete", False):
+        print(f"Profile incomplete: {extracted_profile.get('reason', 'Unknown')}")
+        session.financing_scenarios = []
+        session.processing_status = ProcessingStatus.DONE
+        session.processing_lease_until = None
+        await db.commit()
+        scenario_feed.publish(session_id, "done", {"count": 0})
+        return
+    
+    session.processing_status = ProcessingStatus.GENERATING
+    session.processing_lease_until = _job_lease_until()
+    await db.commit()
     
-    return extracted_profile, scenarios
+    # Step 2: Use node_maker agent to generate scenarios
+    scenarios = await _generate_initial_scenarios(session_id, extracted_profile)
+    session.financing_scenarios = scenarios
+    roots = seed_root_nodes(db, session.id, scenarios)
+    session.processing_status = ProcessingStatus.DONE
+    session.processing_lease_until = None
+    await db.commit()
+    scenario_feed.publish(session_id, "done", {"count": len(scenarios)})
+    
+    # Expand the likeliest picks while the user reads the scenarios
+    prefetch_expansions(session.user_id, roots, settings.prefetch_top_k)
+
+
+async def _mark_processing_failed(session_id: str, error: Exception) -> None:
+    """Record a post-interview job that ran out of retries"""
+    async with AsyncSessionLocal() as db:
+        session = await _get_session(db, session_id)
+        session.processing_status = ProcessingStatus.FAILED
+        session.processing_error = str(error)
+        session.processing_lease_until = None
+        await db.commit()
+    scenario_feed.publish(session_id, "failed", {"error": str(error)})
 
 
-def get_interview_status(db: Session, session_id: str) -> Dict:
+post_interview_jobs = JobRunner(
+    name="post-interview",
+    handler=process_complete_interview,
+    on_failure=_mark_processing_failed,
+    workers=settings.interview_job_workers,
+    max_attempts=settings.interview_job_max_attempts,
+    retry_delay=settings.interview_job_retry_delay
+)
+
+
+async def recover_post_interview_jobs() -> int:
     """
-    Get the current status of an interview session
+    Re-enqueue jobs left unfinished by a previous process
+    
+    Jobs another worker is still running are enqueued too; their claim
+    fails and they are skipped.
     """
-    session = db.query(InterviewSession).filter(
-        InterviewSession.session_id == session_id
-    ).first()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(InterviewSession.session_id).where(
+                InterviewSession.processing_status.in_(ProcessingStatus.ACTIVE)
+            )
+        )
+        session_ids = result.scalars().all()
     
-    if not session:
-        raise ValueError(f"Interview session {session_id} not found")
+    for session_id in session_ids:
+        post_interview_jobs.enqueue(session_id)
+    
+    return len(session_ids)
+
+
+async def get_interview_status(db: AsyncSession, session_id: str) -> Dict:
+    """
+    Get the current status of an interview session
+    """
+    session = await _get_session(db, session_id)
     
     result = {
         "session_id": session.session_id,
         "is_complete": session.is_complete,
+        "processing_status": session.processing_status,
+        "processing_error": session.processing_error,
         "scenarios": None
     }
     
-    if session.is_complete and session.financing_scenarios:
-        result["scenarios"] = json.loads(session.financing_scenarios)
+    scenarios = session.financing_scenarios
+    if session.archive is not None:
+        scenarios = unpack_archive(session.archive).get("financing_scenarios")
+    
+    if session.is_complete and scenarios:
+        result["scenarios"] = scenarios
     
     return result
 
 
-def generate_child_scenarios(parent_scenario: Dict, user_profile: Dict, branch_level: int = 1) -> List[Dict]:
+async def get_interview_status_json(db: AsyncSession, session_id: str, user_id: int) -> bytes:
     """
-    Generate 3 child scenarios branching from a parent scenario using node_maker agent
-    Each level explores a different aspect of the car buying/financing journey
+    get_interview_status encoded as JSON, for the frequently polled status
+    endpoint; sessions of other users are reported as not found
     
-    Args:
-        parent_scenario: The parent scenario to branch from
-        user_profile: User's financial profile
-        branch_level: The level of branching (1-10, each level has different focus)
+    Only the status columns are read, and the stored scenarios document is
+    spliced into the response as text instead of being decoded and
+    re-encoded. Compacted sessions are the exception: their scenarios are
+    decompressed from the archive.
+    """
+    result = await db.execute(
+        select(
+            InterviewSession.session_id,
+            InterviewSession.is_complete,
+            InterviewSession.processing_status,
+            InterviewSession.processing_error,
+            cast(InterviewSession.financing_scenarios, Text),
+            InterviewSession.archive
+        ).where(InterviewSession.session_id == session_id, InterviewSession.user_id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        raise ValueError(f"Interview session {session_id} not found")
+    
+    session_id, is_complete, processing_status, processing_error, scenarios, archive = row
+    if archive is not None:
+        scenarios = json_codec.dumps(unpack_archive(archive).get("financing_scenarios"))
+    head = json_codec.dumps_bytes({
+        "session_id": session_id,
+        "is_complete": is_complete,
+        "processing_status": processing_status,
+        "processing_error": processing_error
+    })
+    # Mirrors get_interview_status: an empty array is reported as null
+    if not is_complete or scenarios in (None, "null", "[]"):
+        scenarios = "null"
+    return head[:-1] + b',"scenarios":' + scenarios.encode() + b"}"
+
+
+def _encode_session_cursor(created_at: datetime, session_pk: int) -> str:
+    payload = json_codec.dumps_bytes([created_at.isoformat(), session_pk])
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def _decode_session_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for cursors this API did not issue"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, session_pk = json_codec.loads(payload)
+        return datetime.fromisoformat(created_at), int(session_pk)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _cursor_timestamp(created_at: datetime):
+    """
+    Bind a cursor's created_at so it compares equal to the stored value
+    
+    SQLite keeps CURRENT_TIMESTAMP as text without fractional seconds,
+    while bound datetimes always carry them and would sort after it.
+    """
+    if IS_SQLITE:
+        return literal(created_at.isoformat(sep=" "), String)
+    return created_at
+
+
+async def list_interview_sessions(
+    db: AsyncSession,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of a user's sessions, newest first, using keyset pagination
+    on (created_at, id) so every page is an index range scan
+    
+    Only the summary columns are selected; the JSON documents stay on disk.
     
     Returns:
-        List of 3 child scenarios
+        Tuple of (session summaries, cursor of the next page or None)
+    
+    Raises:
+        ValueError: If the cursor is malformed
     """
+    statement = select(
+        InterviewSession.id,
+        InterviewSession.session_id,
+        InterviewSession.is_complete,
+        InterviewSession.processing_status,
+        InterviewSession.created_at,
+        InterviewSession.completed_at
+    ).where(InterviewSession.user_id == user_id)
+    
+    if cursor:
+        created_at, session_pk = _decode_session_cursor(cursor)
+        statement = statement.where(
+            tuple_(InterviewSession.created_at, InterviewSession.id)
+            < tuple_(_cursor_timestamp(created_at), session_pk)
+        )
+    
+    # One extra row tells whether there is a next page
+    result = await db.execute(
+        statement
+        .order_by(InterviewSession.created_at.desc(), InterviewSession.id.desc())
+        .limit(limit + 1)
+    )
+    rows = result.all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_session_cursor(rows[-1].created_at, rows[-1].id)
     
-    # Define what each branch level focuses on
-    branch_focus = {
-        1: {
-            "name": "Payment Structures",
-            "instruction": "Generate 3 different PAYMENT STRUCTURE variations:\n- Short-term high payment (36-48 months)\n- Standard mid-term (60 months)\n- Extended low payment (72-84 months)\nFocus on how different loan terms affect monthly payments and total cost."
-        },
-        2: {
-            "name": "Vehicle Trim Levels",
-            "instruction": "Generate 3 different TRIM LEVEL options for the same model:\n- Base/LE trim (budget-friendly)\n- Mid-level/XLE trim (balanced features)\n- Premium/Limited trim (fully loaded)\nShow how trim upgrades affect pricing and value."
-        },
-        3: {
-            "name": "Add-Ons & Packages",
-            "instruction": "Generate 3 scenarios with different WARRANTY AND PACKAGE combinations:\n- Basic coverage only\n- Extended warranty + protection package\n- Premium coverage + maintenance package + GAP insurance\nExplain cost vs. protection trade-offs."
-        },
-        4: {
-            "name": "Insurance Options",
-            "instruction": "Generate 3 different INSURANCE SCENARIOS:\n- Minimum required coverage\n- Recommended full coverage\n- Premium coverage with low deductibles\nInclude estimated insurance costs in monthly budget."
-        },
-        5: {
-            "name": "Maintenance Plans",
-            "instruction": "Generate 3 SERVICE AND MAINTENANCE options:\n- Pay-as-you-go maintenance\n- Prepaid maintenance plan (3 years)\n- Premium ToyotaCare Plus (5 years)\nShow long-term cost savings and convenience."
-        },
-        6: {
-            "name": "Trade-In Scenarios",
-            "instruction": "Generate 3 TRADE-IN options:\n- No trade-in (higher loan amount)\n- Average trade-in value ($5,000-$8,000)\n- High trade-in value ($10,000+)\nShow how trade-in equity reduces financing needs."
-        },
-        7: {
-            "name": "Lease vs. Buy Comparison",
-            "instruction": "Generate 3 OWNERSHIP structure comparisons:\n- Traditional purchase/finance\n- Standard lease (36 months)\n- Lease with purchase option at end\nCompare long-term costs and flexibility."
-        },
-        8: {
-            "name": "Refinancing Options",
-            "instruction": "Generate 3 REFINANCING scenarios (assuming purchase after 2 years):\n- Refinance for lower rate\n- Refinance for shorter term\n- Refinance for lower payment\nShow potential savings and payoff timeline changes."
-        },
-        9: {
-            "name": "Early Payoff Strategies",
-            "instruction": "Generate 3 EARLY PAYMENT scenarios:\n- Extra $50/month toward principal\n- Extra $100/month toward principal\n- Bi-weekly payment strategy\nCalculate interest saved and time reduced."
-        },
-        10: {
-            "name": "Alternative Vehicles",
-            "instruction": "Generate 3 ALTERNATIVE TOYOTA MODELS with similar profiles:\n- Comparable model in different segment\n- Hybrid/electric alternative\n- Certified pre-owned recent model\nCompare value, features, and total cost of ownership."
+    sessions = [
+        {
+            "session_id": row.session_id,
+            "is_complete": row.is_complete,
+            "processing_status": row.processing_status,
+            "created_at": row.created_at,
+            "completed_at": row.completed_at
         }
-    }
+        for row in rows
+    ]
+    return sessions, next_cursor
+
+
+def _final_scenario_events(status: Dict, replace: bool) -> List[Dict]:
+    """Events for a job that finished without this subscriber seeing it"""
+    if status["processing_status"] == ProcessingStatus.FAILED:
+        return [{"event": "failed", "data": {"error": status["processing_error"]}}]
+    
+    scenarios = status["scenarios"] or []
+    events = [{"event": "reset", "data": None}] if replace else []
+    events.extend(
+        {"event": "scenario", "data": {"index": index, "scenario": scenario}}
+        for index, scenario in enumerate(scenarios)
+    )
+    events.append({"event": "done", "data": {"count": len(scenarios)}})
+    return events
+
+
+async def stream_session_scenarios(session_id: str, poll_seconds: float = 5.0) -> AsyncIterator[Dict]:
+    """
+    Root scenarios of a session as the post-interview job produces them
     
-    # Get the appropriate branch focus (default to level 1 if out of range)
-    focus = branch_focus.get(branch_level, branch_focus[1])
+    Yields event dicts: "scenario" ({"index", "scenario"}) per root,
+    "reset" when a retried job starts over, and finally "done" or
+    "failed". The stored status is re-read every `poll_seconds` without
+    events, which covers jobs finishing before the subscription or in
+    another worker process.
+    """
+    queue = scenario_feed.subscribe(session_id)
+    try:
+        async with AsyncSessionLocal() as db:
+            status = await get_interview_status(db, session_id)
+        if status["processing_status"] in (ProcessingStatus.DONE, ProcessingStatus.FAILED):
+            for event in _final_scenario_events(status, replace=False):
+                yield event
+            return
+        
+        received = 0
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), poll_seconds)
+            except asyncio.TimeoutError:
+                async with AsyncSessionLocal() as db:
+                    status = await get_interview_status(db, session_id)
+                if status["processing_status"] in (ProcessingStatus.DONE, ProcessingStatus.FAILED):
+                    for event in _final_scenario_events(status, replace=received > 0):
+                        yield event
+                    return
+                continue
+            
+            yield event
+            if event["event"] in TERMINAL_EVENTS:
+                return
+            received = received + 1 if event["event"] == "scenario" else 0
+    finally:
+        scenario_feed.unsubscribe(session_id, queue)
+
+
+# Identical expansions are served without another LLM call
+expansion_cache = ExpansionCache(
+    max_entries=settings.expand_cache_max_entries,
+    ttl_seconds=settings.expand_cache_ttl_seconds,
+    persist=settings.expand_cache_persist,
+    generation_check_seconds=settings.expand_cache_generation_check_seconds
+)
+
+
+# What each expansion branch level focuses on
+BRANCH_FOCUS = {
+    1: {
+        "name": "Payment Structures",
+        "instruction": "Generate 3 different PAYMENT STRUCTURE variations:\n- Short-term high payment (36-48 months)\n- Standard mid-term (60 months)\n- Extended low payment (72-84 months)\nFocus on how different loan terms affect monthly payments and total cost."
+    },
+    2: {
+        "name": "Vehicle Trim Levels",
+        "instruction": "Generate 3 different TRIM LEVEL options for the same model:\n- Base/LE trim (budget-friendly)\n- Mid-level/XLE trim (balanced features)\n- Premium/Limited trim (fully loaded)\nShow how trim upgrades affect pricing and value."
+    },
+    3: {
+        "name": "Add-Ons & Packages",
+        "instruction": "Generate 3 scenarios with different WARRANTY AND PACKAGE combinations:\n- Basic coverage only\n- Extended warranty + protection package\n- Premium coverage + maintenance package + GAP insurance\nExplain cost vs. protection trade-offs."
+    },
+    4: {
+        "name": "Insurance Options",
+        "instruction": "Generate 3 different INSURANCE SCENARIOS:\n- Minimum required coverage\n- Recommended full coverage\n- Premium coverage with low deductibles\nInclude estimated insurance costs in monthly budget."
+    },
+    5: {
+        "name": "Maintenance Plans",
+        "instruction": "Generate 3 SERVICE AND MAINTENANCE options:\n- Pay-as-you-go maintenance\n- Prepaid maintenance plan (3 years)\n- Premium ToyotaCare Plus (5 years)\nShow long-term cost savings and convenience."
+    },
+    6: {
+        "name": "Trade-In Scenarios",
+        "instruction": "Generate 3 TRADE-IN options:\n- No trade-in (higher loan amount)\n- Average trade-in value ($5,000-$8,000)\n- High trade-in value ($10,000+)\nShow how trade-in equity reduces financing needs."
+    },
+    7: {
+        "name": "Lease vs. Buy Comparison",
+        "instruction": "Generate 3 OWNERSHIP structure comparisons:\n- Traditional purchase/finance\n- Standard lease (36 months)\n- Lease with purchase option at end\nCompare long-term costs and flexibility."
+    },
+    8: {
+        "name": "Refinancing Options",
+        "instruction": "Generate 3 REFINANCING scenarios (assuming purchase after 2 years):\n- Refinance for lower rate\n- Refinance for shorter term\n- Refinance for lower payment\nShow potential savings and payoff timeline changes."
+    },
+    9: {
+        "name": "Early Payoff Strategies",
+        "instruction": "Generate 3 EARLY PAYMENT scenarios:\n- Extra $50/month toward principal\n- Extra $100/month toward principal\n- Bi-weekly payment strategy\nCalculate interest saved and time reduced."
+    },
+    10: {
+        "name": "Alternative Vehicles",
+        "instruction": "Generate 3 ALTERNATIVE TOYOTA MODELS with similar profiles:\n- Comparable model in different segment\n- Hybrid/electric alternative\n- Certified pre-owned recent model\nCompare value, features, and total cost of ownership."
+    }
+}
+
+
+def _branch_focus(branch_level: int) -> Dict:
+    """Get the branch focus (default to level 1 if out of range)"""
+    return BRANCH_FOCUS.get(branch_level, BRANCH_FOCUS[1])
+
+
+@lru_cache(maxsize=None)
+def _expansion_instruction(branch_level: int) -> str:
+    """Static node_maker instruction for one expansion branch level"""
+    focus = _branch_focus(branch_level)
     
-    node_maker_instruction = f"""
+    return f"""
 You are an expert Auto Financing Scenario Generator for Toyota Financial Services.
 
 BRANCH LEVEL {branch_level}: {focus['name']}
@@ -421,9 +1487,70 @@ CRITICAL RULES:
 Output format: JSON array with exactly 3 objects.
 """
 
-    prompt = f"""{node_maker_instruction}
 
-PARENT SCENARIO:
+FINANCE_PROSE_INSTRUCTION = """
+You are a Toyota Financial Services advisor writing copy for financing scenarios whose numbers have already been calculated.
+
+For each scenario in the input JSON array, write:
+- "name": Short label (2-4 words)
+- "title": 5-10 word description
+- "description": Concise explanation (2-3 sentences) tailored to the user's profile, quoting the provided numbers exactly
+- "recommendations": Brief financial tips (1-2 sentences)
+
+CRITICAL RULES:
+1. Do NOT change, round differently or invent any numbers
+2. Output ONLY a valid JSON array with one object per input scenario, in the same order
+"""
+
+PROSE_FIELDS = ("name", "title", "description", "recommendations")
+
+
+async def _write_scenario_prose(
+    scenarios: List[Dict],
+    user_profile: Dict,
+    priority: str = Priority.INTERACTIVE
+) -> List[Dict]:
+    """
+    Have the LLM rewrite only the prose fields of locally computed scenarios
+    
+    The numeric fields always come from the finance engine; on any error
+    the templated prose is kept.
+    """
+    prompt = f"""SCENARIOS:
+{json.dumps(scenarios, indent=2)}
+
+USER PROFILE:
+{json.dumps(user_profile, indent=2)}
+
+Write the prose fields (JSON array only):"""
+    
+    try:
+        response = await _generate(
+            "finance-prose",
+            FINANCE_PROSE_INSTRUCTION,
+            prompt,
+            priority=priority,
+            **_json_output(list[ScenarioProse])
+        )
+        prose = _parse_json("finance-prose", response.text)
+    except Exception as e:
+        print(f"Error writing scenario prose, keeping templates: {e}")
+        return scenarios
+    
+    for scenario, written in zip(scenarios, prose):
+        if isinstance(written, dict):
+            scenario.update({
+                field: written[field]
+                for field in PROSE_FIELDS
+                if isinstance(written.get(field), str) and written[field].strip()
+            })
+    
+    return scenarios
+
+
+def _expansion_prompt(parent_scenario: Dict, user_profile: Dict, branch_level: int) -> str:
+    focus = _branch_focus(branch_level)
+    return f"""PARENT SCENARIO:
 {json.dumps(parent_scenario, indent=2)}
 
 USER PROFILE:
@@ -431,37 +1558,281 @@ USER PROFILE:
 
 Generate 3 variations for {focus['name']}:"""
 
+
+def _expansion_error(branch_level: int, error: Exception) -> ValueError:
+    """Translate a failed expansion call into a user-facing error"""
+    error_msg = str(error)
+    print(f"Error calling node_maker for expansion (level {branch_level}): {error}")
+    
+    # Provide helpful error messages for common issues
+    # (quota errors arrive as LLMUnavailableError from the gateway)
+    if "401" in error_msg or "UNAUTHENTICATED" in error_msg:
+        return ValueError(f"API authentication failed. Please check your API key. Original error: {error_msg}")
+    return ValueError(f"Failed to generate child scenarios: {error_msg}")
+
+
+async def generate_child_scenarios(
+    parent_scenario: Dict,
+    user_profile: Dict,
+    branch_level: int = 1,
+    priority: str = Priority.INTERACTIVE
+) -> List[Dict]:
+    """
+    Generate 3 child scenarios branching from a parent scenario using node_maker agent
+    Each level explores a different aspect of the car buying/financing journey
+    
+    Args:
+        parent_scenario: The parent scenario to branch from
+        user_profile: User's financial profile
+        branch_level: The level of branching (1-10, each level has different focus)
+        priority: Gateway priority of the LLM call (BACKGROUND for prefetches)
+    
+    Returns:
+        List of 3 child scenarios
+    """
+    # Arithmetic-only levels are computed locally in microseconds; a parent
+    # the arithmetic cannot use (e.g. nothing financed) goes to the LLM
+    local_scenarios = None
+    if settings.local_finance_enabled and branch_level in LOCAL_BRANCH_LEVELS:
+        local_scenarios = build_child_scenarios(parent_scenario, user_profile, branch_level)
+    if local_scenarios is not None and not settings.local_finance_llm_prose:
+        return local_scenarios
+    
+    cache_key = expansion_cache.make_key(parent_scenario, user_profile, branch_level)
+    cached_children = await expansion_cache.get(cache_key)
+    if cached_children is not None:
+        return cached_children
+    
+    if local_scenarios is not None:
+        scenarios = await _write_scenario_prose(local_scenarios, user_profile, priority)
+        await expansion_cache.set(cache_key, scenarios, branch_level)
+        return scenarios
+    
     try:
-        response = client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=prompt
+        response = await _generate(
+            f"expansion-{branch_level}",
+            _expansion_instruction(branch_level),
+            _expansion_prompt(parent_scenario, user_profile, branch_level),
+            priority=priority,
+            **_json_output(list[FinancingScenario])
         )
         node_maker_response = response.text
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        error_msg = str(e)
-        print(f"Error calling node_maker for expansion (level {branch_level}): {e}")
-        
-        # Provide helpful error messages for common issues
-        if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg or "quota" in error_msg.lower():
-            raise ValueError(f"API quota exceeded. Please wait a few minutes or upgrade your API plan. Original error: {error_msg}")
-        elif "401" in error_msg or "UNAUTHENTICATED" in error_msg:
-            raise ValueError(f"API authentication failed. Please check your API key. Original error: {error_msg}")
-        else:
-            raise ValueError(f"Failed to generate child scenarios: {error_msg}")
-
-    # Parse node_maker response (should be JSON array)
+        raise _expansion_error(branch_level, e)
+
+    # The response is schema-constrained JSON; only invalid items are dropped
     try:
-        if "[" in node_maker_response:
-            json_start = node_maker_response.index("[")
-            json_end = node_maker_response.rindex("]") + 1
-            json_str = node_maker_response[json_start:json_end]
-            scenarios = json.loads(json_str)
-        else:
-            raise ValueError("No JSON array found in node_maker response for expansion")
-    except (json.JSONDecodeError, ValueError) as e:
+        scenarios = _validate_items(
+            _parse_json(f"expansion-{branch_level}", node_maker_response),
+            FinancingScenario
+        )
+        if not scenarios:
+            raise ValueError("No valid scenarios in node_maker response for expansion")
+    except ValueError as e:
         print(f"Error parsing node_maker expansion response: {e}")
         print(f"Response was: {node_maker_response[:500]}")
         raise ValueError(f"Failed to parse child scenarios: {str(e)}")
 
-    print(f"Generated {len(scenarios)} level-{branch_level} ({focus['name']}) scenarios")
+    print(f"Generated {len(scenarios)} level-{branch_level} ({_branch_focus(branch_level)['name']}) scenarios")
+    await expansion_cache.set(cache_key, scenarios, branch_level)
     return scenarios
+
+
+async def stream_child_scenarios(
+    parent_scenario: Dict,
+    user_profile: Dict,
+    branch_level: int = 1
+) -> AsyncIterator[Dict]:
+    """
+    Streaming counterpart of generate_child_scenarios: each child is
+    yielded as soon as node_maker finishes writing it
+    
+    Locally computed levels and cached results are yielded all at once.
+    """
+    if settings.local_finance_enabled and branch_level in LOCAL_BRANCH_LEVELS:
+        for scenario in await generate_child_scenarios(parent_scenario, user_profile, branch_level):
+            yield scenario
+        return
+    
+    cache_key = expansion_cache.make_key(parent_scenario, user_profile, branch_level)
+    cached_children = await expansion_cache.get(cache_key)
+    if cached_children is not None:
+        for scenario in cached_children:
+            yield scenario
+        return
+    
+    agent = f"expansion-{branch_level}"
+    try:
+        stream = await _generate_stream(
+            agent,
+            _expansion_instruction(branch_level),
+            _expansion_prompt(parent_scenario, user_profile, branch_level),
+            **_json_output(list[FinancingScenario])
+        )
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        raise _expansion_error(branch_level, e)
+    
+    scenarios = []
+    try:
+        async for scenario in _stream_items(agent, stream, FinancingScenario):
+            scenarios.append(scenario)
+            yield scenario
+    except ValueError as e:
+        print(f"Error parsing streamed node_maker expansion response: {e}")
+        raise ValueError(f"Failed to parse child scenarios: {str(e)}")
+    
+    if not scenarios:
+        raise ValueError("Failed to parse child scenarios: no valid scenarios in node_maker response")
+    
+    await expansion_cache.set(cache_key, scenarios, branch_level)
+
+
+async def generate_child_scenarios_batch(
+    expansions: List[Tuple[str, Dict, Dict, int]],
+    concurrency: int
+) -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    Expand several nodes concurrently, yielding results as they finish
+    
+    Args:
+        expansions: (item_id, parent_scenario, user_profile, branch_level) tuples
+        concurrency: Maximum number of expansions generated at once
+    
+    Yields:
+        (item_id, result) pairs where result has "success", "branch_level"
+        and either "children" or "error". Items with identical inputs share
+        a single generation.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    # Group items that would produce the same cache key
+    groups: Dict[str, List[str]] = {}
+    inputs: Dict[str, Tuple[Dict, Dict, int]] = {}
+    for item_id, parent_scenario, user_profile, branch_level in expansions:
+        key = expansion_cache.make_key(parent_scenario, user_profile, branch_level)
+        groups.setdefault(key, []).append(item_id)
+        inputs[key] = (parent_scenario, user_profile, branch_level)
+    
+    async def expand(key: str) -> Tuple[str, Dict]:
+        parent_scenario, user_profile, branch_level = inputs[key]
+        async with semaphore:
+            try:
+                children = await generate_child_scenarios(parent_scenario, user_profile, branch_level)
+                return key, {"success": True, "branch_level": branch_level, "children": children}
+            except Exception as e:
+                print(f"Error expanding node in batch (level {branch_level}): {e}")
+                return key, {"success": False, "branch_level": branch_level, "error": str(e)}
+    
+    for next_done in asyncio.as_completed([expand(key) for key in groups]):
+        key, result = await next_done
+        for item_id in groups[key]:
+            yield item_id, result
+
+
+def _expansion_profile(extracted_profile: Optional[Dict]) -> Dict:
+    """The reviewer's profile without its bookkeeping fields"""
+    return {
+        key: value
+        for key, value in (extracted_profile or {}).items()
+        if value is not None and key not in ("is_complete", "reason")
+    }
+
+
+async def expand_scenario_node(
+    db: AsyncSession,
+    node: ScenarioNode,
+    branch_level: int,
+    priority: str = Priority.INTERACTIVE
+) -> Tuple[List[ScenarioNode], bool]:
+    """
+    Children of a persisted node at `branch_level`, generating and storing
+    them on first request
+    
+    Returns:
+        Tuple of (children, generated) where generated is False when the
+        children were already stored
+    """
+    if priority == Priority.INTERACTIVE:
+        # Reuse a prefetch of this expansion that is already under way,
+        # then expand at interactive priority if it has not finished
+        await prefetcher.wait_for(node.id, branch_level, settings.prefetch_join_timeout_seconds)
+    
+    children = await load_children(db, node.id, branch_level)
+    if children:
+        return children, False
+    
+    extracted_profile = await db.scalar(
+        select(InterviewSession.extracted_profile).where(InterviewSession.id == node.interview_session_id)
+    )
+    user_profile = _expansion_profile(extracted_profile)
+    parent_scenario = node.scenario
+    
+    # Release the DB connection while the children are generated
+    await db.commit()
+    
+    scenarios = await generate_child_scenarios(parent_scenario, user_profile, branch_level, priority)
+    children = await store_children(db, node, branch_level, scenarios)
+    return children, True
+
+
+def _needs_llm(branch_level: int) -> bool:
+    """Whether expanding at `branch_level` calls the LLM at all"""
+    return not (
+        settings.local_finance_enabled
+        and branch_level in LOCAL_BRANCH_LEVELS
+        and not settings.local_finance_llm_prose
+    )
+
+
+async def _prefetch_node(node_id: int, branch_level: int) -> None:
+    async with AsyncSessionLocal() as db:
+        node = await db.get(ScenarioNode, node_id)
+        if node is not None:
+            await expand_scenario_node(db, node, branch_level, Priority.BACKGROUND)
+
+
+# Speculative expansions share the gateway at background priority, so
+# its interactive reserve keeps them from delaying user requests
+prefetcher = Prefetcher(
+    _prefetch_node,
+    enabled=settings.prefetch_enabled,
+    concurrency=settings.prefetch_concurrency,
+    max_pending=settings.prefetch_max_pending,
+    user_concurrency=settings.prefetch_user_concurrency,
+    user_hourly_budget=settings.prefetch_user_hourly_budget
+)
+
+
+def prefetch_expansions(user_id: int, nodes: List[ScenarioNode], top_k: int = 1) -> None:
+    """
+    Schedule the default next-level expansion of the `top_k` nodes with
+    the highest positivity_score
+    
+    Levels the finance engine computes without the LLM are skipped, as
+    they are already instant, and so is everything while the gateway's
+    circuit breaker is open.
+    """
+    if not prefetcher.enabled or llm_gateway.breaker.state == llm_gateway.breaker.OPEN:
+        return
+    
+    def score(node: ScenarioNode) -> float:
+        value = node.scenario.get("positivity_score")
+        return value if isinstance(value, (int, float)) else 0
+    
+    candidates = [node for node in nodes if _needs_llm(next_branch_level(node.depth))]
+    for node in sorted(candidates, key=score, reverse=True)[:top_k]:
+        prefetcher.schedule(user_id, node.id, next_branch_level(node.depth))
+
+
+async def get_scenario_tree(
+    db: AsyncSession,
+    session: InterviewSession,
+    path_prefix: str = ""
+) -> List[ScenarioNode]:
+    """A session's persisted scenario tree, or the subtree under `path_prefix`"""
+    await ensure_root_nodes(db, session)
+    return await load_subtree(db, session.id, path_prefix)
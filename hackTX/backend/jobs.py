@@ -0,0 +1,120 @@
+"""
+In-process background job runner backed by an asyncio worker pool
+"""
+import asyncio
+import random
+from typing import Awaitable, Callable, List, Optional, Set
+
+
+JobHandler = Callable[[str], Awaitable[None]]
+FailureHandler = Callable[[str, Exception], Awaitable[None]]
+
+
+class JobRunner:
+    """
+    Run keyed async jobs on a fixed pool of worker tasks
+
+    A job is identified by a string key (e.g. an interview session ID) and
+    is retried with jittered exponential backoff until it succeeds or runs
+    out of attempts, at which point the failure handler is called. Job state
+    itself lives in the database, so a restarted process can re-enqueue
+    unfinished keys.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: JobHandler,
+        on_failure: Optional[FailureHandler] = None,
+        workers: int = 2,
+        max_attempts: int = 3,
+        retry_delay: float = 2.0
+    ):
+        self.name = name
+        self._handler = handler
+        self._on_failure = on_failure
+        self._workers = max(1, workers)
+        self._max_attempts = max(1, max_attempts)
+        self._retry_delay = retry_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retry_tasks: Set[asyncio.Task] = set()
+        self._pending: Set[str] = set()
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        if self._tasks:
+            return
+
+        self._queue = asyncio.Queue()
+        for index in range(self._workers):
+            task = asyncio.create_task(self._worker(), name=f"{self.name}-worker-{index}")
+            self._tasks.append(task)
+
+        # Keys enqueued before start are picked up now
+        for key in self._pending:
+            self._queue.put_nowait((key, 1))
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks; unfinished jobs stay persisted"""
+        tasks = self._tasks + list(self._retry_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._retry_tasks.clear()
+        self._queue = None
+
+    def enqueue(self, key: str) -> None:
+        """Schedule a job unless the same key is already queued or running"""
+        if key in self._pending:
+            return
+
+        self._pending.add(key)
+        if self._queue is not None:
+            self._queue.put_nowait((key, 1))
+
+    def _backoff(self, attempt: int) -> float:
+        delay = self._retry_delay * (2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    async def _requeue_later(self, key: str, attempt: int) -> None:
+        await asyncio.sleep(self._backoff(attempt - 1))
+        if self._queue is not None:
+            self._queue.put_nowait((key, attempt))
+
+    async def _worker(self) -> None:
+        while True:
+            key, attempt = await self._queue.get()
+            try:
+                await self._run(key, attempt)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, key: str, attempt: int) -> None:
+        try:
+            await self._handler(key)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if attempt < self._max_attempts:
+                print(f"{self.name} job {key} failed (attempt {attempt}), retrying: {e}")
+                retry_task = asyncio.create_task(self._requeue_later(key, attempt + 1))
+                self._retry_tasks.add(retry_task)
+                retry_task.add_done_callback(self._retry_tasks.discard)
+                return
+
+            print(f"{self.name} job {key} failed after {attempt} attempts: {e}")
+            self._pending.discard(key)
+            if self._on_failure is not None:
+                try:
+                    await self._on_failure(key, e)
+                except Exception as failure_error:
+                    print(f"Error recording {self.name} job failure for {key}: {failure_error}")
+            return
+
+        self._pending.discard(key)
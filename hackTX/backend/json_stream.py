@@ -0,0 +1,72 @@
+"""
+Incremental parsing of a streamed JSON array of objects
+"""
+import json
+from typing import Any, List
+
+
+class JSONArrayParser:
+    """
+    Parse each element of a top-level JSON array of objects as soon as its
+    closing brace arrives, without waiting for the rest of the array
+
+    Only the characters of the element being read are buffered. Text
+    before the opening "[" (such as a code fence) is skipped.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._started = False
+        self._finished = False
+        self._depth = 0  # nesting inside the current element
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Any]:
+        """Consume the next chunk and return the elements it completed"""
+        elements = []
+        for char in text:
+            if self._finished:
+                break
+
+            if not self._started:
+                if char == "[":
+                    self._started = True
+                continue
+
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = [char]
+                elif char == "]":
+                    self._finished = True
+                elif not (char.isspace() or char == ","):
+                    raise ValueError(f"Expected an object in the JSON array, got {char!r}")
+                continue
+
+            self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    elements.append(json.loads("".join(self._buffer)))
+                    self._buffer = []
+
+        return elements
+
+    def close(self) -> None:
+        """Raise ValueError if the stream ended before the closing "]" """
+        if not self._finished:
+            raise ValueError("JSON array ended before its closing bracket")
+
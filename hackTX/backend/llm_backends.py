@@ -0,0 +1,459 @@
+"""
+Pluggable LLM backends: Gemini, record/replay cassettes and a deterministic fake
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+from .config import settings
+
+
+@dataclass
+class LLMResponse:
+    """Backend-neutral result of one generation (or one streamed chunk)"""
+    text: str
+    prompt_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
+    @property
+    def total_tokens(self) -> Optional[int]:
+        if self.prompt_tokens is None and self.output_tokens is None:
+            return None
+        return (self.prompt_tokens or 0) + (self.output_tokens or 0)
+
+
+class LLMBackend:
+    """
+    Interface every backend implements
+
+    `agent` names the calling agent (e.g. "interviewer", "expansion-3") so
+    backends that do not call a model can pick a suitable response.
+    Backends without server-side prompt caching leave the cache methods
+    raising NotImplementedError; callers then send the instruction inline.
+    """
+
+    name = "base"
+
+    async def generate(
+        self,
+        agent: str,
+        model: str,
+        instruction: str,
+        contents: str,
+        cached_content: Optional[str] = None,
+        **config_fields
+    ) -> LLMResponse:
+        raise NotImplementedError
+
+    async def generate_stream(
+        self,
+        agent: str,
+        model: str,
+        instruction: str,
+        contents: str,
+        cached_content: Optional[str] = None,
+        **config_fields
+    ) -> AsyncIterator[LLMResponse]:
+        raise NotImplementedError
+
+    async def create_cache(self, model: str, instruction: str, display_name: str, ttl_seconds: int) -> str:
+        """Cache `instruction` server-side and return the cached content name"""
+        raise NotImplementedError
+
+    async def update_cache(self, name: str, ttl_seconds: int) -> None:
+        raise NotImplementedError
+
+    async def delete_cache(self, name: str) -> None:
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """The real Gemini API via google-genai"""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str):
+        from google import genai
+        from google.genai import types
+
+        self._client = genai.Client(api_key=api_key)
+        self._types = types
+
+    def _config(self, instruction: str, cached_content: Optional[str], config_fields: Dict):
+        if cached_content:
+            return self._types.GenerateContentConfig(cached_content=cached_content, **config_fields)
+        return self._types.GenerateContentConfig(system_instruction=instruction, **config_fields)
+
+    @staticmethod
+    def _response(response) -> LLMResponse:
+        usage = response.usage_metadata
+        return LLMResponse(
+            text=response.text or "",
+            prompt_tokens=getattr(usage, "prompt_token_count", None),
+            output_tokens=getattr(usage, "candidates_token_count", None)
+        )
+
+    async def generate(self, agent, model, instruction, contents, cached_content=None, **config_fields):
+        response = await self._client.aio.models.generate_content(
+            model=model,
+            contents=contents,
+            config=self._config(instruction, cached_content, config_fields)
+        )
+        return self._response(response)
+
+    async def generate_stream(self, agent, model, instruction, contents, cached_content=None, **config_fields):
+        stream = await self._client.aio.models.generate_content_stream(
+            model=model,
+            contents=contents,
+            config=self._config(instruction, cached_content, config_fields)
+        )
+
+        async def chunks():
+            async for chunk in stream:
+                yield self._response(chunk)
+
+        return chunks()
+
+    async def create_cache(self, model, instruction, display_name, ttl_seconds):
+        cached = await self._client.aio.caches.create(
+            model=model,
+            config=self._types.CreateCachedContentConfig(
+                system_instruction=instruction,
+                display_name=display_name,
+                ttl=f"{ttl_seconds}s"
+            )
+        )
+        return cached.name
+
+    async def update_cache(self, name, ttl_seconds):
+        await self._client.aio.caches.update(
+            name=name,
+            config=self._types.UpdateCachedContentConfig(ttl=f"{ttl_seconds}s")
+        )
+
+    async def delete_cache(self, name):
+        await self._client.aio.caches.delete(name=name)
+
+
+class CassetteMissError(LookupError):
+    """A replayed call has no recorded response"""
+
+
+class CassetteBackend(LLMBackend):
+    """
+    Record and replay responses keyed by a hash of the prompt
+
+    In record mode every call goes to `inner` and its response is written
+    to `<directory>/<hash>.json`; in replay mode responses are served from
+    those files and a missing one raises CassetteMissError. The hash
+    covers the model, instruction, contents and config fields, but not the
+    cached content name, which differs between runs.
+    """
+
+    def __init__(self, directory: str, record: bool = False, inner: Optional[LLMBackend] = None):
+        if record and inner is None:
+            raise ValueError("Recording needs a backend to record from")
+        self._directory = Path(directory)
+        self._record = record
+        self._inner = inner
+        self.name = "record" if record else "replay"
+
+    @staticmethod
+    def prompt_hash(model: str, instruction: str, contents: str, stream: bool, config_fields: Dict) -> str:
+        canonical = json.dumps(
+            {
+                "model": model,
+                "instruction": instruction,
+                "contents": contents,
+                "stream": stream,
+                "config": config_fields
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self._directory / f"{key}.json"
+
+    def _load(self, agent: str, key: str) -> List[LLMResponse]:
+        try:
+            cassette = json.loads(self._path(key).read_text())
+        except FileNotFoundError:
+            raise CassetteMissError(f"No recorded {agent} response for prompt {key[:12]}")
+        return [LLMResponse(**chunk) for chunk in cassette["chunks"]]
+
+    def _save(self, agent: str, key: str, chunks: List[LLMResponse]) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        cassette = {"agent": agent, "chunks": [asdict(chunk) for chunk in chunks]}
+        self._path(key).write_text(json.dumps(cassette, indent=2))
+
+    async def generate(self, agent, model, instruction, contents, cached_content=None, **config_fields):
+        key = self.prompt_hash(model, instruction, contents, False, config_fields)
+        if not self._record:
+            return self._load(agent, key)[0]
+
+        response = await self._inner.generate(agent, model, instruction, contents, cached_content, **config_fields)
+        self._save(agent, key, [response])
+        return response
+
+    async def generate_stream(self, agent, model, instruction, contents, cached_content=None, **config_fields):
+        key = self.prompt_hash(model, instruction, contents, True, config_fields)
+        if not self._record:
+            recorded = self._load(agent, key)
+
+            async def replay():
+                for chunk in recorded:
+                    yield chunk
+
+            return replay()
+
+        stream = await self._inner.generate_stream(agent, model, instruction, contents, cached_content, **config_fields)
+
+        async def record():
+            chunks = []
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+            self._save(agent, key, chunks)
+
+        return record()
+
+    async def create_cache(self, model, instruction, display_name, ttl_seconds):
+        if not self._record:
+            raise NotImplementedError
+        return await self._inner.create_cache(model, instruction, display_name, ttl_seconds)
+
+    async def update_cache(self, name, ttl_seconds):
+        await self._inner.update_cache(name, ttl_seconds)
+
+    async def delete_cache(self, name):
+        await self._inner.delete_cache(name)
+
+
+FAKE_QUESTIONS = [
+    "What do you do for work, and roughly what is your annual income?",
+    "Do you know your approximate credit score?",
+    "Where are you located?",
+    "Are you leaning towards leasing or buying?",
+    "Which Toyota models or vehicle types interest you?",
+    "Do you currently own a vehicle you might trade in?",
+    "How much could you put down, and what monthly payment feels comfortable?",
+]
+
+FAKE_PROFILE = {
+    "is_complete": True,
+    "bio": "Software engineer who commutes daily",
+    "goal": "Replace an aging sedan with a reliable, efficient car",
+    "location": "Austin, TX",
+    "interests": "Road trips, technology",
+    "skills": "Software development",
+    "title": "Software Engineer",
+    "income": 85000,
+    "credit_score": 720,
+    "preferred_lease_or_buy": "buy",
+    "vehicle_preferences": "Hybrid sedan or compact SUV",
+    "current_vehicle": "2012 Honda Civic"
+}
+
+FAKE_MODELS = ["Camry Hybrid", "RAV4 Hybrid", "Corolla", "Prius", "Highlander"]
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Deterministic offline stand-in for the LLM
+
+    Responses are canned per agent and valid against the schemas the
+    service expects; latency is drawn from a seeded distribution so load
+    tests are reproducible. The interviewer finishes after `interview_turns`
+    user answers.
+
+    Cached contents are kept in memory and every cache call is recorded in
+    `cache_calls`. Like the Gemini API, instructions shorter than
+    `min_cacheable_chars` are refused.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_jitter: float = 0.5,
+        distribution: str = "lognormal",
+        interview_turns: int = 6,
+        seed: int = 0,
+        min_cacheable_chars: int = 0
+    ):
+        if distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown fake LLM latency distribution: {distribution}")
+        self._latency_ms = latency_ms
+        self._jitter = latency_jitter
+        self._distribution = distribution
+        self._interview_turns = interview_turns
+        self._random = random.Random(seed)
+        self._min_cacheable_chars = min_cacheable_chars
+        self.caches: Dict[str, Dict] = {}
+        self.cache_calls: List[tuple] = []
+        self._caches_created = 0
+
+    def sample_latency(self) -> float:
+        """One response latency in seconds"""
+        mean = self._latency_ms / 1000.0
+        if self._distribution == "fixed" or mean <= 0:
+            return max(mean, 0.0)
+        if self._distribution == "uniform":
+            return self._random.uniform(mean * (1 - self._jitter), mean * (1 + self._jitter))
+        # Lognormal with the configured mean and sigma = latency_jitter
+        sigma = self._jitter
+        return self._random.lognormvariate(0, sigma) * mean / math.exp(sigma * sigma / 2)
+
+    def _interviewer(self, contents: str) -> str:
+        answers = len(re.findall(r"^User:", contents, flags=re.MULTILINE))
+        if answers >= self._interview_turns:
+            return "INTERVIEW_COMPLETE Thank you! I have everything I need to build your financing options."
+        return FAKE_QUESTIONS[(answers - 1) % len(FAKE_QUESTIONS)]
+
+    @staticmethod
+    def _scenarios(count: int, level: int) -> List[Dict]:
+        scenarios = []
+        for index in range(count):
+            lease = index % 3 == 2
+            term = 36 if lease else 48 + 12 * (index % 3)
+            scenarios.append({
+                "name": f"Option {index + 1}",
+                "title": (
+                    f"Recommended {'lease' if lease else 'finance'} plan {index + 1}" if level == 0
+                    else f"Level {level} {'lease' if lease else 'finance'} option {index + 1}"
+                ),
+                "description": "A balanced plan matched to your budget and credit profile.",
+                "plan_type": "lease" if lease else "finance",
+                "down_payment": 3000 + 500 * index,
+                "monthly_payment": 420 - 15 * index,
+                "term_months": term,
+                "interest_rate": 0.0021 if lease else round(4.9 + 0.4 * index, 2),
+                "positivity_score": 85 - 5 * index,
+                "recommendations": "Keep the payment under 15% of your monthly income.",
+                "suggested_model": FAKE_MODELS[index % len(FAKE_MODELS)]
+            })
+        return scenarios
+
+    def respond(self, agent: str, contents: str) -> str:
+        """The canned response text for one call"""
+        if agent == "interviewer":
+            return self._interviewer(contents)
+        if agent == "reviewer":
+            return json.dumps(FAKE_PROFILE)
+        if agent == "node_maker":
+            return json.dumps(self._scenarios(5, 0))
+        if agent.startswith("expansion-"):
+            return json.dumps(self._scenarios(3, int(agent.split("-", 1)[1])))
+        if agent == "finance-prose":
+            return json.dumps([
+                {
+                    "name": f"Option {index + 1}",
+                    "title": "A plan computed from your numbers",
+                    "description": "The payment and term below were calculated for your profile.",
+                    "recommendations": "Compare the total cost, not just the monthly payment."
+                }
+                for index in range(3)
+            ])
+        return "OK"
+
+    @staticmethod
+    def _tokens(text: str) -> int:
+        return max(1, len(text) // 4)
+
+    async def generate(self, agent, model, instruction, contents, cached_content=None, **config_fields):
+        text = self.respond(agent, contents)
+        await asyncio.sleep(self.sample_latency())
+        return LLMResponse(
+            text=text,
+            prompt_tokens=self._tokens(instruction) + self._tokens(contents),
+            output_tokens=self._tokens(text)
+        )
+
+    async def generate_stream(self, agent, model, instruction, contents, cached_content=None, **config_fields):
+        text = self.respond(agent, contents)
+        latency = self.sample_latency()
+        pieces = re.findall(r"\S+\s*", text) or [text]
+
+        async def chunks():
+            # Half the latency is time to first token, the rest is spread over the chunks
+            await asyncio.sleep(latency / 2)
+            for index, piece in enumerate(pieces):
+                if index:
+                    await asyncio.sleep(latency / 2 / len(pieces))
+                yield LLMResponse(text=piece)
+            yield LLMResponse(
+                text="",
+                prompt_tokens=self._tokens(instruction) + self._tokens(contents),
+                output_tokens=self._tokens(text)
+            )
+
+        return chunks()
+
+    async def create_cache(self, model, instruction, display_name, ttl_seconds):
+        self.cache_calls.append(("create", display_name, ttl_seconds))
+        if len(instruction) < self._min_cacheable_chars:
+            raise ValueError(f"Cached content is too small: {len(instruction)} < {self._min_cacheable_chars} characters")
+
+        self._caches_created += 1
+        name = f"cachedContents/fake-{self._caches_created}"
+        self.caches[name] = {"model": model, "instruction": instruction, "ttl_seconds": ttl_seconds}
+        return name
+
+    async def update_cache(self, name, ttl_seconds):
+        self.cache_calls.append(("update", name, ttl_seconds))
+        if name not in self.caches:
+            raise KeyError(f"Cached content {name} not found")
+        self.caches[name]["ttl_seconds"] = ttl_seconds
+
+    async def delete_cache(self, name):
+        self.cache_calls.append(("delete", name))
+        self.caches.pop(name, None)
+
+
+_backend: Optional[LLMBackend] = None
+
+
+def create_llm_backend(kind: str) -> LLMBackend:
+    """Build the backend named by `kind` (gemini, record, replay or fake)"""
+    if kind == "gemini":
+        return GeminiBackend(api_key=settings.google_api_key)
+    if kind == "record":
+        return CassetteBackend(
+            settings.llm_cassette_dir,
+            record=True,
+            inner=GeminiBackend(api_key=settings.google_api_key)
+        )
+    if kind == "replay":
+        return CassetteBackend(settings.llm_cassette_dir)
+    if kind == "fake":
+        return FakeLLMBackend(
+            latency_ms=settings.fake_llm_latency_ms,
+            latency_jitter=settings.fake_llm_latency_jitter,
+            distribution=settings.fake_llm_latency_distribution,
+            interview_turns=settings.fake_llm_interview_turns,
+            seed=settings.fake_llm_seed
+        )
+    raise ValueError(f"Unknown LLM backend: {kind}")
+
+
+def get_llm_backend() -> LLMBackend:
+    """The configured backend, created on first use"""
+    global _backend
+    if _backend is None:
+        _backend = create_llm_backend(settings.llm_backend)
+    return _backend
+
+
+def set_llm_backend(backend: Optional[LLMBackend]) -> None:
+    """Swap the process-wide backend (None re-reads settings on next use)"""
+    global _backend
+    _backend = backend
@@ -0,0 +1,333 @@
+"""
+Quota-aware gateway for LLM calls: rate limiting, retries and circuit breaking
+"""
+import asyncio
+import random
+import re
+import sys
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# HTTP status codes worth retrying; everything else is the caller's fault
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+RETRYABLE_MARKERS = ("RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED")
+
+
+class LLMUnavailableError(Exception):
+    """
+    The LLM cannot serve a call right now (quota exhausted, upstream
+    degraded or circuit open); callers should retry after `retry_after`
+    seconds
+    """
+
+    def __init__(self, message: str, retry_after: float = 30.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Priority:
+    """Scheduling class of an LLM call"""
+    INTERACTIVE = "interactive"  # a user is waiting on the response
+    BACKGROUND = "background"  # jobs and prefetching; yields quota to interactive calls
+
+
+class TokenBucket:
+    """
+    Refill `per_minute` units per minute up to a burst of one minute's quota
+
+    Consumption may exceed what was reserved up front (actual token usage
+    is only known afterwards), in which case the bucket goes into debt and
+    later callers wait for it to refill.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._available = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, reserve: float = 0.0) -> float:
+        """Seconds until `amount` units are available while keeping `reserve` (a share of capacity) untouched"""
+        self._refill()
+        needed = min(amount, self.capacity) + reserve * self.capacity
+        if self._available >= needed:
+            return 0.0
+        return (needed - self._available) / self._rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self._available -= amount
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._available
+
+
+class CircuitBreaker:
+    """
+    Fail fast after `failure_threshold` consecutive upstream failures
+
+    The circuit stays open for `reset_seconds`, then lets a single trial
+    call through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self._reset_seconds - time.monotonic())
+
+    def before_call(self) -> None:
+        """Raise LLMUnavailableError unless a call may go upstream now"""
+        if self.state == self.CLOSED:
+            return
+
+        if self.state == self.OPEN and self.retry_after() == 0:
+            self.state = self.HALF_OPEN
+
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+
+        raise LLMUnavailableError(
+            "LLM service is temporarily unavailable, please try again shortly",
+            retry_after=self.retry_after() or self._reset_seconds
+        )
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+            if self.state != self.OPEN:
+                print(f"LLM circuit opened after {self._failures} consecutive failures")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give up a trial slot without an outcome (e.g. the call was cancelled)"""
+        self._trial_in_flight = False
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an LLM error is transient (rate limits, timeouts, 5xx)"""
+    # google-genai is imported by the Gemini backend on first use; before
+    # that no error can be one of its APIErrors
+    errors = sys.modules.get("google.genai.errors")
+    if errors is not None and isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    message = str(error)
+    return any(marker in message for marker in RETRYABLE_MARKERS)
+
+
+def _suggested_delay(error: Exception) -> Optional[float]:
+    """The retry delay a 429 response asks for, if any (e.g. "retryDelay": "13s")"""
+    match = re.search(r"retryDelay['\"]?\s*:\s*['\"](\d+(?:\.\d+)?)s", str(getattr(error, "details", "")))
+    return float(match.group(1)) if match else None
+
+
+class LLMGateway:
+    """
+    Single entry point for every LLM call
+
+    Calls wait for request- and token-per-minute quota before going
+    upstream, so bursts queue at the quota ceiling instead of turning into
+    429 storms. Transient errors are retried with jittered exponential
+    backoff, and repeated failures open a circuit breaker that rejects
+    calls immediately with LLMUnavailableError until the upstream recovers.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 15,
+        tokens_per_minute: int = 1000000,
+        background_reserve: float = 0.2,
+        max_queue_wait: float = 30.0,
+        max_attempts: int = 4,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 30.0,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0
+    ):
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._background_reserve = background_reserve
+        self._max_queue_wait = max_queue_wait
+        self._max_attempts = max(1, max_attempts)
+        self._retry_base_delay = retry_base_delay
+        self._retry_max_delay = retry_max_delay
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+        self.rejected = 0
+
+    @staticmethod
+    def estimate_tokens(*texts: Optional[str], output_tokens: int = 1024) -> int:
+        """Rough token count (~4 characters per token) plus the expected output"""
+        return sum(len(text) for text in texts if text) // 4 + output_tokens
+
+    def stats(self) -> Dict:
+        """Counters and quota levels for monitoring"""
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "circuit": self.breaker.state,
+            "requests_available": int(self._requests.available),
+            "tokens_available": int(self._tokens.available)
+        }
+
+    async def _acquire(self, estimated_tokens: int, priority: str) -> None:
+        """Wait until both quotas have room for this call"""
+        reserve = self._background_reserve if priority == Priority.BACKGROUND else 0.0
+        deadline = time.monotonic() + self._max_queue_wait
+        waited = False
+
+        while True:
+            delay = max(
+                self._requests.wait_time(1, reserve),
+                self._tokens.wait_time(estimated_tokens, reserve)
+            )
+            if delay == 0:
+                self._requests.consume(1)
+                self._tokens.consume(estimated_tokens)
+                return
+
+            # Background work may wait as long as it takes
+            if priority != Priority.BACKGROUND and time.monotonic() + delay > deadline:
+                self.rejected += 1
+                raise LLMUnavailableError(
+                    "LLM request quota exhausted, please try again shortly",
+                    retry_after=delay
+                )
+
+            if not waited:
+                self.throttled += 1
+                waited = True
+            await asyncio.sleep(delay)
+
+    def _reconcile(self, response, estimated_tokens: int) -> None:
+        """Charge the token bucket for actual usage once it is known"""
+        total = getattr(response, "total_tokens", None)
+        if total:
+            self._tokens.consume(total - estimated_tokens)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        suggested = _suggested_delay(error)
+        if suggested is not None:
+            return min(suggested, self._retry_max_delay) + random.uniform(0, self._retry_base_delay)
+        delay = min(self._retry_base_delay * (2 ** (attempt - 1)), self._retry_max_delay)
+        return random.uniform(delay / 2, delay)
+
+    async def _attempt(self, call: Callable[[], Awaitable[T]], estimated_tokens: int, priority: str) -> T:
+        """Run `call` with quota, retries and circuit breaking"""
+        self.calls += 1
+
+        for attempt in range(1, self._max_attempts + 1):
+            self.breaker.before_call()
+            try:
+                await self._acquire(estimated_tokens, priority)
+                return await call()
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except LLMUnavailableError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # The upstream answered; the request itself was bad
+                    self.breaker.release()
+                    raise
+
+                self.breaker.record_failure()
+                if attempt == self._max_attempts:
+                    raise LLMUnavailableError(
+                        f"LLM service is temporarily unavailable: {e}",
+                        retry_after=self.breaker.retry_after() or self._backoff(attempt, e)
+                    ) from e
+
+                delay = self._backoff(attempt, e)
+                self.retries += 1
+                print(f"LLM call failed (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def generate(
+        self,
+        call: Callable[[], Awaitable[T]],
+        estimated_tokens: int,
+        priority: str = Priority.INTERACTIVE
+    ) -> T:
+        """
+        Run a non-streaming LLM call
+
+        Args:
+            call: Zero-argument coroutine factory issuing the request
+            estimated_tokens: Tokens reserved up front (see estimate_tokens)
+            priority: Priority.INTERACTIVE or Priority.BACKGROUND
+        """
+        response = await self._attempt(call, estimated_tokens, priority)
+        self.breaker.record_success()
+        self._reconcile(response, estimated_tokens)
+        return response
+
+    async def stream(
+        self,
+        call: Callable[[], Awaitable[AsyncIterator[T]]],
+        estimated_tokens: int,
+        priority: str = Priority.INTERACTIVE
+    ) -> AsyncIterator[T]:
+        """
+        Run a streaming LLM call
+
+        The first chunk is awaited inside the retry loop, so failures before
+        any output are retried; errors after that reach the caller.
+        """
+        async def open_stream():
+            stream = await call()
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = None
+            return stream, first
+
+        stream, first = await self._attempt(open_stream, estimated_tokens, priority)
+        self.breaker.record_success()
+
+        async def chunks() -> AsyncIterator[T]:
+            last = first
+            if first is None:
+                return
+            yield first
+            async for chunk in stream:
+                last = chunk
+                yield chunk
+            # Usage is reported on the final chunk
+            self._reconcile(last, estimated_tokens)
+
+        return chunks()
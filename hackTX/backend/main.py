@@ -2,23 +2,78 @@
 Tachyon API - FastAPI Application
 AI-powered financial advisor for Toyota vehicle financing
 """
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 import uvicorn
 from .routes import router
 from .config import settings
-from .database import engine, Base
+from .database import db_stats_observers
+from .interview_service import (
+    expansion_cache,
+    llm_gateway,
+    post_interview_jobs,
+    prefetcher,
+    prompt_cache,
+    recover_post_interview_jobs
+)
+from .llm_backends import get_llm_backend
+from . import metrics
+from .migrations import init_schema
+from .oauth import prewarm_oauth_metadata
+
 
+async def prewarm() -> None:
+    """Build the LLM client and fetch OAuth metadata while traffic is already served"""
+    try:
+        await asyncio.to_thread(get_llm_backend)
+    except Exception as e:
+        print(f"LLM backend prewarm failed: {e}")
+    await prewarm_oauth_metadata()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start-up and shutdown of the app's resources
+    
+    Nothing here runs at import, so workers and replicas start serving
+    as soon as the job workers are up; the schema is created by
+    `python -m backend.migrations` unless init_schema_on_startup is set.
+    """
+    if settings.init_schema_on_startup:
+        await asyncio.to_thread(init_schema)
+    
+    # Start the post-interview job workers and resume unfinished jobs
+    await post_interview_jobs.start()
+    recovered = await recover_post_interview_jobs()
+    if recovered:
+        print(f"Resumed {recovered} unfinished post-interview jobs")
+    
+    prewarm_task = asyncio.create_task(prewarm()) if settings.prewarm_on_startup else None
+    
+    yield
+    
+    if prewarm_task is not None:
+        prewarm_task.cancel()
+    
+    # Stop the job workers; unfinished jobs resume on next start
+    await post_interview_jobs.stop()
+    await prefetcher.stop()
+    
+    # Delete this worker's cached prompts instead of waiting for their TTL
+    await prompt_cache.close()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.app_name,
     description=settings.app_description,
-    version=settings.app_version
+    version=settings.app_version,
+    lifespan=lifespan
 )
 
 # Add session middleware for OAuth
@@ -40,6 +95,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms for /metrics
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+    db_stats_observers.append(metrics.record_db_stats)
+    metrics.register_stats("tachyon_expansion_cache", "Expand-node result cache counters", expansion_cache.stats)
+    metrics.register_stats("tachyon_prompt_cache", "Prompt (context) cache counters", prompt_cache.stats)
+    metrics.register_stats("tachyon_llm_gateway", "LLM gateway counters and remaining quota", llm_gateway.stats)
+    metrics.register_stats("tachyon_prefetch", "Speculative node expansion counters", prefetcher.stats)
+
 # Include routers
 app.include_router(router)
 
@@ -0,0 +1,285 @@
+"""
+In-process metrics collectors rendered in the Prometheus text format
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Seconds; covers fast DB calls up to slow multi-retry LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base for collectors; children are keyed by label values"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labelvalues, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        entry = self._values.get(labelvalues)
+        if entry is None:
+            entry = self._values[labelvalues] = [[0] * (len(self._buckets) + 1), 0.0]
+        entry[0][bisect_left(self._buckets, value)] += 1
+        entry[1] += value
+
+    def time(self, *labelvalues: str) -> "_Timer":
+        """Context manager observing the elapsed seconds"""
+        return _Timer(self, labelvalues)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labelvalues, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self._buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labelvalues: Tuple[str, ...]):
+        self._histogram = histogram
+        self._labelvalues = labelvalues
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(time.perf_counter() - self._started, *self._labelvalues)
+
+
+class CallbackGauge(_Metric):
+    """
+    Values read from existing counters at scrape time, so the hot path
+    pays nothing; `callback` returns (labelvalues, value) pairs
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]],
+        kind: str = "gauge"
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self._callback = callback
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        try:
+            samples = list(self._callback())
+        except Exception as e:
+            print(f"Error collecting metric {self.name}: {e}")
+            return lines
+        for labelvalues, value in samples:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ==================== Application metrics ====================
+
+http_request_duration = Histogram(
+    "tachyon_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status")
+)
+
+llm_call_duration = Histogram(
+    "tachyon_llm_call_duration_seconds",
+    "LLM call latency per agent, including gateway queueing and retries",
+    ("agent", "branch_level", "outcome")
+)
+
+llm_tokens = Counter(
+    "tachyon_llm_tokens_total",
+    "Tokens reported by the LLM per agent",
+    ("agent", "branch_level", "kind")
+)
+
+llm_json_failures = Counter(
+    "tachyon_llm_json_parse_failures_total",
+    "LLM responses that were not valid JSON",
+    ("agent",)
+)
+
+llm_rejected_items = Counter(
+    "tachyon_llm_rejected_items_total",
+    "Structured LLM output items rejected by schema validation",
+    ("schema",)
+)
+
+interview_reviews = Counter(
+    "tachyon_interview_reviews_total",
+    "Post-interview profile reviews by how much the slot tracker had filled",
+    ("mode",)
+)
+
+db_session_duration = Histogram(
+    "tachyon_db_session_duration_seconds",
+    "Time a request-scoped DB session was open"
+)
+
+db_query_duration = Histogram(
+    "tachyon_db_request_query_seconds",
+    "Time spent executing statements per request"
+)
+
+db_checkout_wait = Histogram(
+    "tachyon_db_checkout_wait_seconds",
+    "Time per request waiting for a pooled connection"
+)
+
+db_queries = Counter(
+    "tachyon_db_queries_total",
+    "Statements executed by request-scoped sessions"
+)
+
+
+def agent_labels(agent: str) -> Tuple[str, str]:
+    """Split an agent name like "expansion-3" into (agent, branch_level)"""
+    name, _, level = agent.partition("-")
+    if name == "expansion" and level.isdigit():
+        return name, level
+    return agent, ""
+
+
+def record_db_stats(stats) -> None:
+    """db_stats_observers callback for get_db's per-request DBStats"""
+    db_session_duration.observe(stats.session_time)
+    db_query_duration.observe(stats.query_time)
+    db_checkout_wait.observe(stats.checkout_wait)
+    db_queries.inc(amount=stats.query_count)
+
+
+def register_stats(name: str, documentation: str, stats: Callable[[], Dict]) -> None:
+    """
+    Expose a component's stats() dict (cache hits, gateway counters) as
+    one metric with a `stat` label; non-numeric values are skipped
+    """
+    CallbackGauge(
+        name,
+        documentation,
+        ("stat",),
+        lambda: (
+            ((key,), value) for key, value in stats().items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ),
+        kind="untyped"
+    )
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request by its route template, so
+    paths with IDs do not create a label per session
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                path,
+                str(status[0])
+            )
@@ -0,0 +1,181 @@
+"""
+Lightweight in-place schema upgrades
+
+`Base.metadata.create_all` only creates missing tables, so databases
+created by an earlier version keep their old column set. The steps here
+bring such databases up to date and are safe to run repeatedly.
+
+Run before starting (or deploying) the API, from the hackTX directory:
+    python -m backend.migrations
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import Text, cast, inspect, insert, select, text, update
+from sqlalchemy.engine import Connection
+
+from .database import Base, JSONDocument, engine
+from .models import InterviewMessage, InterviewSession
+
+
+def _add_missing_columns(connection: Connection) -> None:
+    """Add model columns that are missing from existing tables"""
+    inspector = inspect(connection)
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+
+        for column in table.columns:
+            if column.name in existing:
+                continue
+
+            column_type = column.type.compile(dialect=connection.dialect)
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+
+            # Only constant defaults are allowed by ALTER TABLE on SQLite
+            default = getattr(column.server_default, "arg", None)
+            if isinstance(default, str):
+                ddl += f" DEFAULT {default}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+
+            print(f"Adding column {table.name}.{column.name}")
+            connection.execute(text(ddl))
+
+
+def _create_missing_indexes(connection: Connection) -> None:
+    """Create model indexes that existing tables do not have yet"""
+    inspector = inspect(connection)
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+
+        for index in table.indexes:
+            if index.name and index.name not in existing:
+                print(f"Creating index {index.name}")
+                index.create(connection)
+
+
+def _convert_json_columns(connection: Connection) -> None:
+    """
+    Convert JSON documents stored in TEXT columns to JSONB on PostgreSQL
+
+    SQLite stores the JSON type as text already, so existing values are
+    read as-is there.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+
+    inspector = inspect(connection)
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+
+        for column in table.columns:
+            if column.type is not JSONDocument or column.name not in existing:
+                continue
+            if existing[column.name].__class__.__name__ in ("JSON", "JSONB"):
+                continue
+
+            print(f"Converting {table.name}.{column.name} to JSONB")
+            connection.execute(text(
+                f"ALTER TABLE {table.name} ALTER COLUMN {column.name} DROP DEFAULT"
+            ))
+            connection.execute(text(
+                f"ALTER TABLE {table.name} ALTER COLUMN {column.name} "
+                f"TYPE JSONB USING {column.name}::jsonb"
+            ))
+
+
+def _parse_timestamp(value) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.now()
+
+
+def _backfill_interview_messages(connection: Connection) -> None:
+    """
+    Move transcripts from the legacy conversation_history JSON column into
+    interview_messages, then clear the column so it is not read again
+    """
+    sessions = InterviewSession.__table__
+    messages = InterviewMessage.__table__
+
+    has_messages = (
+        select(messages.c.id)
+        .where(messages.c.interview_session_id == sessions.c.id)
+        .exists()
+    )
+    # Read as text so one malformed document cannot fail the whole query
+    history_text = cast(sessions.c.conversation_history, Text)
+    rows = connection.execute(
+        select(sessions.c.id, history_text).where(
+            history_text.is_not(None),
+            history_text != "[]",
+            ~has_messages
+        )
+    ).all()
+
+    for session_pk, conversation_history in rows:
+        try:
+            history = json.loads(conversation_history)
+        except json.JSONDecodeError:
+            print(f"Skipping unreadable conversation_history for session {session_pk}")
+            continue
+
+        if history:
+            connection.execute(insert(messages), [
+                {
+                    "interview_session_id": session_pk,
+                    "sequence": sequence,
+                    "role": message.get("role", "agent"),
+                    "content": message.get("content", ""),
+                    "created_at": _parse_timestamp(message.get("timestamp"))
+                }
+                for sequence, message in enumerate(history)
+            ])
+
+        connection.execute(
+            update(sessions)
+            .where(sessions.c.id == session_pk)
+            .values(conversation_history=[])
+        )
+
+    if rows:
+        print(f"Backfilled interview_messages for {len(rows)} sessions")
+
+
+MIGRATIONS = [
+    _add_missing_columns,
+    _create_missing_indexes,
+    _convert_json_columns,
+    _backfill_interview_messages,
+]
+
+
+def run_migrations() -> None:
+    """Apply every migration step in order inside one transaction"""
+    with engine.begin() as connection:
+        for step in MIGRATIONS:
+            step(connection)
+
+
+def init_schema() -> None:
+    """Create missing tables, then upgrade existing ones"""
+    Base.metadata.create_all(bind=engine)
+    run_migrations()
+
+
+if __name__ == "__main__":
+    init_schema()
+    print("Database schema is up to date")
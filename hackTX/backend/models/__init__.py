@@ -5,10 +5,10 @@ Data models and schemas
 from .schemas import HealthResponse
 
 # SQLAlchemy database models (for database operations)
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean, ForeignKey, Index, LargeBinary
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
-from ..database import Base
+from ..database import Base, JSONDocument
 
 
 class User(Base):
@@ -50,22 +50,68 @@ class FinancialProfile(Base):
 
 
 class InterviewSession(Base):
-    """Interview session database model to track agent conversations"""
+    """
+    Interview session database model to track agent conversations
+    
+    The JSON document columns are deferred (group "documents") and raise
+    instead of lazy-loading, so metadata queries never pull them in by
+    accident; load them with undefer_group("documents") or select them.
+    
+    Sessions compacted by backend.compaction keep their transcript,
+    scenarios and slot state in the zlib-compressed `archive` column
+    instead; read them through compaction.unpack_archive.
+    """
     __tablename__ = "interview_sessions"
+    __table_args__ = (
+        # Keyset pagination of a user's sessions, newest first
+        Index("ix_interview_sessions_user_created", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String, unique=True, index=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
-    # Conversation state
-    conversation_history = Column(Text, nullable=False, default="[]")  # JSON array of messages
+    # Conversation state (messages live in interview_messages; this legacy
+    # JSON column is only read by the backfill migration)
+    conversation_history = deferred(
+        Column(JSONDocument, nullable=False, default=list),
+        group="documents",
+        raiseload=True
+    )
     is_complete = Column(Boolean, default=False, nullable=False)
     
+    # Profile slots parsed from answers as the interview goes (JSON)
+    slot_state = deferred(Column(JSONDocument, nullable=True), group="documents", raiseload=True)
+    
     # Extracted data from reviewer agent
-    extracted_profile = Column(Text, nullable=True)  # JSON object from reviewer
+    extracted_profile = deferred(  # object from reviewer
+        Column(JSONDocument, nullable=True),
+        group="documents",
+        raiseload=True
+    )
     
     # Generated scenarios from node_maker agent
-    financing_scenarios = Column(Text, nullable=True)  # JSON array of scenarios
+    financing_scenarios = deferred(  # array of scenarios
+        Column(JSONDocument, nullable=True),
+        group="documents",
+        raiseload=True
+    )
+    
+    # Compressed cold copy of the documents above for old sessions
+    archive = deferred(Column(LargeBinary, nullable=True), group="documents", raiseload=True)
+    archived_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Answer turns: `version` is bumped by every claim and write, and a
+    # turn holds the session until `answer_lease_until` while the LLM runs
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    answer_lease_until = Column(DateTime(timezone=True), nullable=True)
+    
+    # Post-interview job state: queued, reviewing, generating, done, failed;
+    # a worker running the job holds it until `processing_lease_until`
+    processing_status = Column(String, nullable=True)
+    processing_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    processing_error = Column(Text, nullable=True)
+    processing_lease_until = Column(DateTime(timezone=True), nullable=True)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -74,12 +120,137 @@ class InterviewSession(Base):
     
     # Relationships
     user = relationship("User", back_populates="interview_sessions")
+    messages = relationship(
+        "InterviewMessage",
+        back_populates="interview_session",
+        order_by="InterviewMessage.sequence"
+    )
+    scenario_nodes = relationship("ScenarioNode", back_populates="interview_session")
+
+
+class InterviewMessage(Base):
+    """Single interview message; rows are only ever inserted"""
+    __tablename__ = "interview_messages"
+    __table_args__ = (
+        Index(
+            "ix_interview_messages_session_sequence",
+            "interview_session_id",
+            "sequence",
+            unique=True
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    interview_session_id = Column(Integer, ForeignKey("interview_sessions.id"), nullable=False)
+    sequence = Column(Integer, nullable=False)  # 0-based position in the transcript
+    role = Column(String, nullable=False)  # 'agent' or 'user'
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    
+    # Relationships
+    interview_session = relationship("InterviewSession", back_populates="messages")
+
+
+class ScenarioNode(Base):
+    """
+    One scenario in a session's exploration tree
+    
+    `path` is a materialized path of sibling positions: roots are "3/",
+    and a child generated at branch level L is "<parent path>L.<position>/",
+    so a subtree is one prefix scan of the (session, path) index.
+    """
+    __tablename__ = "scenario_nodes"
+    __table_args__ = (
+        Index(
+            "ix_scenario_nodes_session_path",
+            "interview_session_id",
+            "path",
+            unique=True,
+            postgresql_ops={"path": "text_pattern_ops"}
+        ),
+        Index(
+            "ix_scenario_nodes_parent_level_position",
+            "parent_id",
+            "branch_level",
+            "position",
+            unique=True
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    interview_session_id = Column(Integer, ForeignKey("interview_sessions.id"), nullable=False)
+    parent_id = Column(Integer, ForeignKey("scenario_nodes.id"), nullable=True)  # None for roots
+    depth = Column(Integer, nullable=False)  # 0 for the initial scenarios
+    branch_level = Column(Integer, nullable=True)  # level this node was generated at; None for roots
+    position = Column(Integer, nullable=False)  # order among its siblings
+    # NOCASE lets SQLite use the index for LIKE prefix matches
+    path = Column(String(255).with_variant(String(255, collation="NOCASE"), "sqlite"), nullable=False)
+    scenario = Column(JSONDocument, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    interview_session = relationship("InterviewSession", back_populates="scenario_nodes")
+
+
+class ExpansionCacheEntry(Base):
+    """Persisted node expansion result shared across workers and restarts"""
+    __tablename__ = "expansion_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)  # sha256 of the inputs
+    branch_level = Column(Integer, nullable=False)
+    children = Column(JSONDocument, nullable=False)  # array of child scenarios
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class CacheGeneration(Base):
+    """Counter bumped when a cache is invalidated, so every worker drops its memory tier"""
+    __tablename__ = "cache_generations"
+
+    name = Column(String(64), primary_key=True)
+    generation = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class IdempotencyKey(Base):
+    """
+    Response recorded for a client-supplied Idempotency-Key
+
+    `response` is None while the first request with the key is running.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("ix_idempotency_keys_user_key", "user_id", "key", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # sha256 of the endpoint and body
+    status_code = Column(Integer, nullable=True)
+    response = Column(JSONDocument, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class RevokedToken(Base):
+    """Access token signed out before its expiry; purged once it expires"""
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
 
 
 __all__ = [
     "HealthResponse",
     "User",
     "FinancialProfile",
-    "InterviewSession"
+    "InterviewSession",
+    "InterviewMessage",
+    "ScenarioNode",
+    "ExpansionCacheEntry",
+    "CacheGeneration",
+    "IdempotencyKey",
+    "RevokedToken"
 ]
 
@@ -1,8 +1,9 @@
 """
 Pydantic schemas for API request/response validation
 """
-from pydantic import BaseModel
-from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
 
 
 class HealthResponse(BaseModel):
@@ -30,11 +31,69 @@ class InterviewAnswerResponse(BaseModel):
     is_complete: bool
 
 
+class ExtractedProfile(BaseModel):
+    """Profile the reviewer agent extracts from an interview transcript"""
+    is_complete: bool
+    reason: Optional[str] = None  # What is missing when is_complete is false
+    name: Optional[str] = None
+    bio: Optional[str] = None
+    goal: Optional[str] = None
+    location: Optional[str] = None
+    interests: Optional[str] = None
+    skills: Optional[str] = None
+    title: Optional[str] = None
+    income: Optional[float] = Field(default=None, ge=0)
+    credit_score: Optional[int] = Field(default=None, ge=300, le=850)
+    preferred_lease_or_buy: Optional[Literal["lease", "buy"]] = None
+    vehicle_preferences: Optional[str] = None
+    current_vehicle: Optional[str] = None
+
+
+class FinancingScenario(BaseModel):
+    """One financing or leasing scenario produced by the node_maker agent"""
+    name: str
+    title: str
+    description: str
+    plan_type: Literal["finance", "lease"]
+    down_payment: Optional[float] = Field(default=None, ge=0)
+    monthly_payment: float = Field(ge=0)
+    term_months: int = Field(gt=0)
+    interest_rate: Optional[float] = Field(default=None, ge=0)  # APR, or money factor for leases
+    positivity_score: int = Field(ge=0, le=100)
+    recommendations: Optional[str] = None
+    suggested_model: Optional[str] = None
+
+
+class ScenarioProse(BaseModel):
+    """Prose fields written for a scenario whose numbers were computed locally"""
+    name: str
+    title: str
+    description: str
+    recommendations: str
+
+
 class InterviewStatusResponse(BaseModel):
     """Response for interview status check"""
     session_id: str
     is_complete: bool
-    scenarios: Optional[List[dict]] = None
+    processing_status: Optional[str] = None  # queued, reviewing, generating, done, failed
+    processing_error: Optional[str] = None
+    scenarios: Optional[List[FinancingScenario]] = None
+
+
+class InterviewSessionSummary(BaseModel):
+    """Metadata of one interview in a user's history"""
+    session_id: str
+    is_complete: bool
+    processing_status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+class InterviewSessionListResponse(BaseModel):
+    """One page of a user's interviews, newest first"""
+    sessions: List[InterviewSessionSummary]
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next page; None on the last page
 
 
 class ConversationMessage(BaseModel):
@@ -42,3 +101,60 @@ class ConversationMessage(BaseModel):
     role: str  # 'agent' or 'user'
     content: str
     timestamp: str
+
+
+class BatchExpandItem(BaseModel):
+    """One node expansion inside a batch request"""
+    id: str  # Client-chosen key echoed back in the results
+    parent_scenario: dict
+    user_profile: Optional[dict] = None  # Falls back to the batch-level profile
+    branch_level: int = 1
+
+
+class BatchExpandRequest(BaseModel):
+    """Request to expand several nodes at once"""
+    expansions: List[BatchExpandItem]
+    user_profile: Optional[dict] = None
+
+
+class BatchExpandResult(BaseModel):
+    """Outcome of one expansion in a batch"""
+    success: bool
+    branch_level: int
+    children: Optional[List[dict]] = None
+    error: Optional[str] = None
+
+
+class BatchExpandResponse(BaseModel):
+    """Results of a batch expansion keyed by item id"""
+    results: Dict[str, BatchExpandResult]
+
+
+class ScenarioNodeResponse(BaseModel):
+    """One persisted node of a scenario tree"""
+    id: int
+    parent_id: Optional[int] = None
+    depth: int
+    branch_level: Optional[int] = None  # None for the initial scenarios
+    position: int
+    scenario: dict
+
+
+class ScenarioTreeResponse(BaseModel):
+    """All nodes of a tree or subtree, parents before children"""
+    session_id: str
+    nodes: List[ScenarioNodeResponse]
+
+
+class ExpandScenarioNodeRequest(BaseModel):
+    """Request to expand a persisted node"""
+    branch_level: Optional[int] = None  # Defaults to the node's depth + 1
+
+
+class ExpandScenarioNodeResponse(BaseModel):
+    """Children of an expanded node"""
+    success: bool
+    node_id: int
+    branch_level: int
+    generated: bool  # False when served from previously stored children
+    children: List[ScenarioNodeResponse]
@@ -0,0 +1,42 @@
+"""
+Google OAuth client, created on first use
+
+authlib is only imported when the client is first needed, and the OpenID
+discovery document can be fetched at startup so the first login does not
+pay for it.
+"""
+from .config import settings
+
+GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
+
+_google = None
+
+
+def get_google_oauth():
+    """The registered Google OAuth client"""
+    global _google
+    if _google is None:
+        from authlib.integrations.starlette_client import OAuth
+
+        oauth = OAuth()
+        oauth.register(
+            name='google',
+            client_id=settings.google_client_id,
+            client_secret=settings.google_client_secret,
+            server_metadata_url=GOOGLE_DISCOVERY_URL,
+            client_kwargs={
+                'scope': 'openid email profile'
+            }
+        )
+        _google = oauth.google
+    return _google
+
+
+async def prewarm_oauth_metadata() -> None:
+    """Fetch and cache the discovery document; a failure is retried on first login"""
+    if not settings.google_client_id:
+        return
+    try:
+        await get_google_oauth().load_server_metadata()
+    except Exception as e:
+        print(f"OAuth metadata prewarm failed: {e}")
@@ -0,0 +1,145 @@
+"""
+Speculative background expansion of the nodes a user is likely to open next
+"""
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+PrefetchKey = Tuple[int, int]  # (node_id, branch_level)
+ExpandHandler = Callable[[int, int], Awaitable[None]]
+
+
+class Prefetcher:
+    """
+    Run speculative node expansions within per-user and global budgets
+
+    Work is dropped rather than queued without bound: a prefetch is
+    skipped when the global backlog is full, when the user already has
+    `user_concurrency` prefetches pending, or when they used up their
+    hourly budget. At most `concurrency` prefetches run at once, and
+    the handler is expected to call the LLM at background priority so
+    interactive requests always go first.
+    """
+
+    def __init__(
+        self,
+        handler: ExpandHandler,
+        enabled: bool = True,
+        concurrency: int = 2,
+        max_pending: int = 50,
+        user_concurrency: int = 2,
+        user_hourly_budget: int = 30
+    ):
+        self._handler = handler
+        self.enabled = enabled
+        self._concurrency = max(1, concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._max_pending = max_pending
+        self._user_concurrency = user_concurrency
+        self._user_hourly_budget = user_hourly_budget
+        self._tasks: Dict[PrefetchKey, asyncio.Task] = {}
+        self._running: Set[PrefetchKey] = set()
+        self._user_pending: Dict[int, Set[PrefetchKey]] = defaultdict(set)
+        self._user_history: Dict[int, Deque[float]] = defaultdict(deque)
+        self.scheduled = 0
+        self.skipped = 0
+        self.completed = 0
+        self.failed = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {
+            "scheduled": self.scheduled,
+            "skipped": self.skipped,
+            "completed": self.completed,
+            "failed": self.failed,
+            "pending": len(self._tasks)
+        }
+
+    def _within_user_budget(self, user_id: int) -> bool:
+        if len(self._user_pending[user_id]) >= self._user_concurrency:
+            return False
+
+        history = self._user_history[user_id]
+        cutoff = time.monotonic() - 3600
+        while history and history[0] < cutoff:
+            history.popleft()
+        return len(history) < self._user_hourly_budget
+
+    def schedule(self, user_id: int, node_id: int, branch_level: int) -> bool:
+        """Queue a speculative expansion; returns False if it was skipped"""
+        key = (node_id, branch_level)
+        if not self.enabled or key in self._tasks:
+            return False
+
+        if len(self._tasks) >= self._max_pending or not self._within_user_budget(user_id):
+            self.skipped += 1
+            return False
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+
+        self._user_pending[user_id].add(key)
+        self._user_history[user_id].append(time.monotonic())
+        task = asyncio.create_task(self._run(key))
+        task.add_done_callback(lambda _: self._finish(user_id, key))
+        self._tasks[key] = task
+        self.scheduled += 1
+        return True
+
+    def _finish(self, user_id: int, key: PrefetchKey) -> None:
+        self._tasks.pop(key, None)
+        pending = self._user_pending.get(user_id)
+        if pending is not None:
+            pending.discard(key)
+            if not pending:
+                del self._user_pending[user_id]
+
+    async def _run(self, key: PrefetchKey) -> None:
+        async with self._semaphore:
+            self._running.add(key)
+            try:
+                await self._handler(*key)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"Prefetch of node {key[0]} at level {key[1]} failed: {e}")
+            finally:
+                self._running.discard(key)
+
+    async def wait_for(self, node_id: int, branch_level: int, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for a running prefetch of the same
+        expansion, so a click during prefetch reuses it instead of calling
+        the LLM again
+
+        A prefetch still queued behind the concurrency limit is cancelled
+        rather than waited on; the caller expands the node itself.
+
+        Returns:
+            True if a prefetch of the expansion finished
+        """
+        key = (node_id, branch_level)
+        task = self._tasks.get(key)
+        if task is None:
+            return False
+
+        if key not in self._running:
+            task.cancel()
+            return False
+
+        # Shielded: a cancelled or timed-out request must not cancel the prefetch
+        done, _ = await asyncio.wait([asyncio.shield(task)], timeout=timeout)
+        return bool(done)
+
+    async def stop(self) -> None:
+        """Cancel pending prefetches"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._user_pending.clear()
@@ -0,0 +1,175 @@
+"""
+Server-side context caching for static agent instructions
+"""
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class _CacheEntry:
+    """A server-side cached content handle for one instruction"""
+    name: str
+    fingerprint: str
+    expires_at: float
+
+
+class PromptCache:
+    """
+    Serve static system instructions from the backend's cached contents
+
+    Each (model, key) pair maps to one cached content created from the
+    instruction text. Entries are refreshed shortly before their TTL runs
+    out and recreated if the instruction changes. When the API refuses to
+    cache the key is put on a cool-down and callers transparently send the
+    instruction inline instead. Backends without caching support disable
+    the cache.
+
+    The API only caches prompts of at least `min_tokens` tokens. Shorter
+    instructions are never sent to it and count as `skipped`. At the time of
+    writing every agent instruction is below Gemini's minimum, so the cache
+    only takes effect once an instruction grows past it.
+    """
+
+    def __init__(
+        self,
+        backend,
+        enabled: bool = True,
+        ttl_seconds: int = 3600,
+        refresh_margin_seconds: int = 300,
+        retry_after_seconds: int = 600,
+        min_tokens: int = 0
+    ):
+        self._backend = backend
+        self.enabled = enabled
+        self._ttl_seconds = ttl_seconds
+        self._refresh_margin = refresh_margin_seconds
+        self._retry_after = retry_after_seconds
+        self._min_tokens = min_tokens
+        self._entries: Dict[Tuple[str, str], _CacheEntry] = {}
+        self._unavailable_until: Dict[Tuple[str, str], float] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self.skipped = 0
+
+    @staticmethod
+    def _fingerprint(instruction: str) -> str:
+        return hashlib.sha256(instruction.encode("utf-8")).hexdigest()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for monitoring"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "fallbacks": self.fallbacks,
+            "skipped": self.skipped,
+            "entries": len(self._entries)
+        }
+
+    async def cached_name(self, key: str, model: str, instruction: str) -> Optional[str]:
+        """
+        Name of a cached content holding `instruction`, or None when the
+        caller should send the instruction inline
+        """
+        cache_key = (model, key)
+        now = time.monotonic()
+
+        if not self.enabled or self._unavailable_until.get(cache_key, 0) > now:
+            self.fallbacks += 1
+            return None
+
+        # Same ~4 characters per token estimate as the gateway's
+        if len(instruction) // 4 < self._min_tokens:
+            self.skipped += 1
+            return None
+
+        fingerprint = self._fingerprint(instruction)
+        entry = self._entries.get(cache_key)
+
+        if entry and entry.fingerprint == fingerprint and entry.expires_at - self._refresh_margin > now:
+            self.hits += 1
+            return entry.name
+
+        lock = self._locks.setdefault(cache_key, asyncio.Lock())
+        async with lock:
+            # Another caller may have refreshed the entry while we waited
+            entry = self._entries.get(cache_key)
+            now = time.monotonic()
+            if entry and entry.fingerprint == fingerprint and entry.expires_at - self._refresh_margin > now:
+                self.hits += 1
+                return entry.name
+
+            self.misses += 1
+            entry = await self._refresh_or_create(cache_key, model, instruction, fingerprint, entry)
+
+        if entry is None:
+            self.fallbacks += 1
+            return None
+
+        return entry.name
+
+    async def _refresh_or_create(
+        self,
+        cache_key: Tuple[str, str],
+        model: str,
+        instruction: str,
+        fingerprint: str,
+        entry: Optional[_CacheEntry]
+    ) -> Optional[_CacheEntry]:
+        # Extend a still-valid cache for the same instruction
+        if entry and entry.fingerprint == fingerprint and entry.expires_at > time.monotonic():
+            try:
+                await self._backend.update_cache(entry.name, self._ttl_seconds)
+                entry.expires_at = time.monotonic() + self._ttl_seconds
+                return entry
+            except Exception as e:
+                print(f"Error refreshing prompt cache {cache_key[1]}: {e}")
+
+        if entry:
+            await self._delete(entry)
+            self._entries.pop(cache_key, None)
+
+        try:
+            name = await self._backend.create_cache(
+                model,
+                instruction,
+                f"tachyon-{cache_key[1]}",
+                self._ttl_seconds
+            )
+        except NotImplementedError:
+            self.enabled = False
+            return None
+        except Exception as e:
+            print(f"Prompt caching unavailable for {cache_key[1]}, using inline instruction: {e}")
+            self._unavailable_until[cache_key] = time.monotonic() + self._retry_after
+            return None
+
+        entry = _CacheEntry(
+            name=name,
+            fingerprint=fingerprint,
+            expires_at=time.monotonic() + self._ttl_seconds
+        )
+        self._entries[cache_key] = entry
+        return entry
+
+    async def _delete(self, entry: _CacheEntry) -> None:
+        try:
+            await self._backend.delete_cache(entry.name)
+        except Exception as e:
+            print(f"Error deleting prompt cache {entry.name}: {e}")
+
+    def invalidate(self, name: str) -> None:
+        """Forget a cached content the API reported as missing or expired"""
+        for cache_key, entry in list(self._entries.items()):
+            if entry.name == name:
+                del self._entries[cache_key]
+
+    async def close(self) -> None:
+        """Delete every cached content created by this process"""
+        entries = list(self._entries.values())
+        self._entries.clear()
+        await asyncio.gather(*(self._delete(entry) for entry in entries))
@@ -1,53 +1,86 @@
 """
 API route handlers
 """
-from fastapi import APIRouter, HTTPException, Depends, Request
-from fastapi.responses import RedirectResponse
-from authlib.integrations.starlette_client import OAuth
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, Response, StreamingResponse
 from .config import settings
 from datetime import datetime
-import secrets
-from sqlalchemy.orm import Session
+import asyncio
+import json
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from .database import get_db
-from .models import User
+from .auth import create_access_token, get_bearer_token, get_current_user, get_user_from_token, revoke_token
+from . import metrics
+from .database import AsyncSessionLocal, get_db
+from .idempotency import (
+    IdempotencyConflict,
+    claim_idempotency_key,
+    complete_idempotency_key,
+    release_idempotency_key,
+    request_fingerprint
+)
+from .llm_gateway import LLMUnavailableError
+from .models import InterviewSession, User
+from .oauth import get_google_oauth
 from .models.schemas import (
     HealthResponse,
     InterviewStartResponse,
     InterviewAnswerRequest,
     InterviewAnswerResponse,
-    InterviewStatusResponse
+    InterviewStatusResponse,
+    InterviewSessionListResponse,
+    BatchExpandRequest,
+    BatchExpandResponse,
+    ExpandScenarioNodeRequest,
+    ExpandScenarioNodeResponse,
+    ScenarioTreeResponse
 )
 from .interview_service import (
     create_interview_session,
     process_interview_answer,
-    get_interview_status
+    get_interview_status_json,
+    list_interview_sessions,
+    generate_child_scenarios,
+    generate_child_scenarios_batch,
+    begin_answer_turn,
+    stream_interview_answer,
+    SessionBusyError,
+    stream_child_scenarios,
+    stream_session_scenarios,
+    open_interview_connection,
+    stream_connection_turn,
+    expand_scenario_node,
+    get_scenario_tree,
+    prefetch_expansions,
+    expansion_cache
 )
+from .scenario_tree import get_owned_node, get_owned_session, next_branch_level, node_to_dict
 
 
 router = APIRouter()
 
-# Initialize OAuth with proper configuration
-oauth = OAuth()
-oauth.register(
-    name='google',
-    client_id=settings.google_client_id,
-    client_secret=settings.google_client_secret,
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={
-        'scope': 'openid email profile'
-    }
-)
 
-# Store for session tokens (use Redis in production)
-session_store = {}
+def _service_unavailable(error: LLMUnavailableError) -> HTTPException:
+    """503 telling the client when to retry an LLM-backed request"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(max(1, round(error.retry_after)))}
+    )
+
+async def _claim_idempotency_key(user_id: int, key: Optional[str], endpoint: str, body: dict):
+    """Claim an Idempotency-Key header value; returns the stored (status, response) to replay, if any"""
+    if key is None:
+        return None
+    try:
+        return await claim_idempotency_key(user_id, key, request_fingerprint(endpoint, body))
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 
-def get_current_user_from_token(token: str) -> dict:
-    """Get current user from session token"""
-    if token not in session_store:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    return session_store[token]
+REPLAYED_HEADERS = {"Idempotent-Replayed": "true"}
 
 
 @router.get("/health", response_model=HealthResponse)
@@ -60,21 +93,30 @@ async def health_check():
     )
 
 
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Metrics in the Prometheus text exposition format"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @router.get("/auth/google")
 async def google_login(request: Request):
     """Redirect to Google OAuth login"""
     try:
         redirect_uri = settings.google_redirect_uri
-        return await oauth.google.authorize_redirect(request, redirect_uri)
+        return await get_google_oauth().authorize_redirect(request, redirect_uri)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OAuth initialization failed: {str(e)}")
 
 @router.get("/auth/google/callback")
-async def google_callback(request: Request, db: Session = Depends(get_db)):
+async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
     """Handle Google OAuth callback"""
     try:
         # Authorize and get token
-        token = await oauth.google.authorize_access_token(request)
+        token = await get_google_oauth().authorize_access_token(request)
         
         # Get user info from token
         user_info = token.get('userinfo')
@@ -89,7 +131,8 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
         picture = user_info.get('picture')
         
         # Check if user exists
-        user = db.query(User).filter(User.google_id == google_id).first()
+        result = await db.execute(select(User).where(User.google_id == google_id))
+        user = result.scalar_one_or_none()
         
         if not user:
             # Create new user
@@ -100,24 +143,17 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
                 picture=picture
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         else:
             # Update existing user info
             user.email = email
             user.name = name
             user.picture = picture
-            db.commit()
-        
-        # Create session token
-        session_token = secrets.token_urlsafe(32)
-        session_store[session_token] = {
-            'user_id': user.id,
-            'email': user.email,
-            'name': user.name,
-            'picture': user.picture,
-            'google_id': user.google_id
-        }
+            await db.commit()
+        
+        # Create signed session token
+        session_token = create_access_token(user)
         
         # Redirect to frontend
         frontend_url = settings.frontend_url.rstrip('/')
@@ -134,18 +170,14 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
         return RedirectResponse(url=f"{frontend_url}/?error={error_message}")
 
 @router.get("/auth/me")
-async def get_current_user(token: str):
+async def get_me(token: str):
     """Get current user info from session token"""
-    if token not in session_store:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    
-    return session_store[token]
+    return await get_user_from_token(token)
 
 @router.post("/auth/logout")
 async def logout(token: str):
     """Logout user"""
-    if token in session_store:
-        del session_store[token]
+    await revoke_token(token)
     return {"message": "Logged out successfully"}
 
 
@@ -153,25 +185,18 @@ async def logout(token: str):
 
 @router.post("/api/interview/start", response_model=InterviewStartResponse)
 async def start_interview(
-    request: Request,
-    db: Session = Depends(get_db)
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Start a new interview session"""
     try:
-        # Get token from Authorization header
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(status_code=401, detail="Missing or invalid authorization token")
-        
-        token = auth_header.replace("Bearer ", "")
-        user_data = get_current_user_from_token(token)
-        user_id = user_data.get("user_id")
+        user_id = current_user.get("user_id")
         
         if not user_id:
             raise HTTPException(status_code=401, detail="User not authenticated")
         
         # Create interview session
-        session_id, first_question = create_interview_session(db, user_id)
+        session_id, first_question = await create_interview_session(db, user_id)
         
         return InterviewStartResponse(
             session_id=session_id,
@@ -188,60 +213,187 @@ async def start_interview(
 @router.post("/api/interview/answer", response_model=InterviewAnswerResponse)
 async def submit_interview_answer(
     answer_request: InterviewAnswerRequest,
-    request: Request,
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Submit an answer and get the next question"""
+    """
+    Submit an answer and get the next question
+    
+    Retrying with the same Idempotency-Key header replays the first
+    response instead of answering twice. 409 means another answer for
+    the session is still being processed.
+    """
+    user_id = current_user["user_id"]
+    replay = await _claim_idempotency_key(
+        user_id,
+        idempotency_key,
+        "/api/interview/answer",
+        answer_request.model_dump()
+    )
+    if replay is not None:
+        status_code, body = replay
+        return JSONResponse(body, status_code=status_code, headers=REPLAYED_HEADERS)
+    
+    response = None
     try:
-        # Verify user is authenticated
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(status_code=401, detail="Missing or invalid authorization token")
-        
-        token = auth_header.replace("Bearer ", "")
-        get_current_user_from_token(token)  # Just to verify token is valid
-        
         # Process the answer
-        next_question, is_complete = process_interview_answer(
+        next_question, is_complete = await process_interview_answer(
             db,
             answer_request.session_id,
             answer_request.answer
         )
         
-        return InterviewAnswerResponse(
+        response = InterviewAnswerResponse(
             question=next_question,
             is_complete=is_complete
         )
+        if idempotency_key is not None:
+            await complete_idempotency_key(user_id, idempotency_key, 200, response.model_dump())
+        
+        return response
         
     except HTTPException:
         raise
+    except LLMUnavailableError as e:
+        raise _service_unavailable(e)
+    except SessionBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         print(f"Error processing answer: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Failed attempts are not replayed, so the client can retry the key
+        if idempotency_key is not None and response is None:
+            await release_idempotency_key(user_id, idempotency_key)
 
 
-@router.get("/api/interview/status/{session_id}", response_model=InterviewStatusResponse)
-async def check_interview_status(
-    session_id: str,
-    request: Request,
-    db: Session = Depends(get_db)
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/api/interview/answer/stream")
+async def stream_interview_answer_events(
+    answer_request: InterviewAnswerRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Check the status of an interview session"""
+    """
+    Submit an answer and stream the next question as Server-Sent Events
+    
+    Emits "chunk" events with text deltas, "complete" when the interview
+    ends, and a final "done" event with the same fields as
+    InterviewAnswerResponse. An "error" event replaces "done" when the LLM
+    is unavailable before any text was produced, or another answer was
+    saved first; the answer is not saved. A retry with the same
+    Idempotency-Key after a "done" replays only the "done" event.
+    """
+    user_id = current_user["user_id"]
+    replay = await _claim_idempotency_key(
+        user_id,
+        idempotency_key,
+        "/api/interview/answer/stream",
+        answer_request.model_dump()
+    )
+    if replay is not None:
+        _, done = replay
+        return StreamingResponse(
+            iter([_sse("done", done)]),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", **REPLAYED_HEADERS}
+        )
+    
+    turn = None
     try:
-        # Verify user is authenticated
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(status_code=401, detail="Missing or invalid authorization token")
+        # Load the session up front so lookup errors surface as HTTP errors
+        turn = await begin_answer_turn(
+            db,
+            answer_request.session_id,
+            answer_request.answer
+        )
         
-        token = auth_header.replace("Bearer ", "")
-        get_current_user_from_token(token)
+    except HTTPException:
+        raise
+    except SessionBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        print(f"Error starting answer stream: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if idempotency_key is not None and turn is None:
+            await release_idempotency_key(user_id, idempotency_key)
+    
+    async def event_stream():
+        done = None
+        try:
+            async for event in stream_interview_answer(turn):
+                if event["event"] == "done":
+                    done = event["data"]
+                    if idempotency_key is not None:
+                        await complete_idempotency_key(user_id, idempotency_key, 200, done)
+                yield _sse(event["event"], event["data"])
+        finally:
+            if idempotency_key is not None and done is None:
+                await release_idempotency_key(user_id, idempotency_key)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/api/interview/sessions", response_model=InterviewSessionListResponse)
+async def list_sessions(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    The current user's interviews, newest first
+    
+    Pass the returned next_cursor as ?cursor= to fetch the following page.
+    """
+    try:
+        sessions, next_cursor = await list_interview_sessions(
+            db,
+            current_user["user_id"],
+            limit,
+            cursor
+        )
         
-        # Get status
-        status = get_interview_status(db, session_id)
+        return InterviewSessionListResponse(sessions=sessions, next_cursor=next_cursor)
         
-        return InterviewStatusResponse(**status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error listing interview sessions: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/interview/status/{session_id}", response_model=InterviewStatusResponse)
+async def check_interview_status(
+    session_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Check the status of an interview session
+    
+    Polled frequently by the frontend, so the body is built from the stored
+    JSON without validating and re-serializing the scenarios.
+    """
+    try:
+        return Response(
+            content=await get_interview_status_json(db, session_id, current_user["user_id"]),
+            media_type="application/json"
+        )
         
     except HTTPException:
         raise
@@ -252,24 +404,133 @@ async def check_interview_status(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/api/interview/scenarios/{session_id}/stream")
+async def stream_scenario_events(
+    session_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Stream a completed interview's root scenarios as Server-Sent Events
+    
+    Emits a "scenario" event ({"index", "scenario"}) as soon as node_maker
+    finishes each one, "reset" if a retried job starts over, and a final
+    "done" ({"count"}) or "failed" ({"error"}). Scenarios that already
+    exist are sent immediately.
+    """
+    try:
+        await get_owned_session(db, session_id, current_user["user_id"])
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    async def event_stream():
+        async for event in stream_session_scenarios(session_id):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Close codes for WebSocket handshakes that are refused (4000-4999 are
+# application-defined)
+WS_UNAUTHORIZED = 4401
+WS_NOT_FOUND = 4404
+
+
+@router.websocket("/ws/interview/{session_id}")
+async def interview_socket(websocket: WebSocket, session_id: str, token: Optional[str] = None):
+    """
+    Run an interview over one WebSocket
+    
+    Authenticates once (?token= or an Authorization header) and keeps the
+    session's state for the life of the connection. The server sends
+    {"event": ..., "data": ...} messages: "ready" with the transcript so
+    far, then per answer the same "chunk", "complete", "done" and "error"
+    events as /api/interview/answer/stream. Once the interview is complete
+    the scenario events of /api/interview/scenarios/{id}/stream follow.
+    The client sends {"answer": "..."}; answers are handled in order.
+    """
+    try:
+        user = await get_user_from_token(token or get_bearer_token(websocket))
+        async with AsyncSessionLocal() as db:
+            connection = await open_interview_connection(db, session_id, user["user_id"])
+    except HTTPException:
+        await websocket.close(code=WS_UNAUTHORIZED)
+        return
+    except ValueError:
+        await websocket.close(code=WS_NOT_FOUND)
+        return
+    
+    await websocket.accept()
+    
+    # Turns and scenario events are sent from different tasks
+    send_lock = asyncio.Lock()
+    
+    async def send(event: str, data) -> None:
+        async with send_lock:
+            await websocket.send_json({"event": event, "data": data})
+    
+    async def push_scenarios() -> None:
+        async for event in stream_session_scenarios(session_id):
+            await send(event["event"], event["data"])
+    
+    scenario_task = None
+    try:
+        await send("ready", connection.snapshot())
+        
+        while True:
+            if connection.is_complete and scenario_task is None:
+                scenario_task = asyncio.create_task(push_scenarios())
+            
+            try:
+                message = json.loads(await websocket.receive_text())
+                answer = message["answer"]
+                if not isinstance(answer, str) or not answer.strip():
+                    raise ValueError
+            except (ValueError, KeyError, TypeError):
+                await send("error", {"status": 400, "detail": 'Expected {"answer": "<text>"}'})
+                continue
+            
+            try:
+                async for event in stream_connection_turn(connection, answer):
+                    await send(event["event"], event["data"])
+            except LLMUnavailableError as e:
+                await send("error", {"status": 503, "detail": str(e), "retry_after": round(e.retry_after)})
+            except SessionBusyError as e:
+                await send("error", {"status": 409, "detail": str(e)})
+                await send("ready", connection.snapshot())
+            except ValueError as e:
+                await send("error", {"status": 400, "detail": str(e)})
+            except Exception as e:
+                print(f"Error in interview socket turn: {e}")
+                await send("error", {"status": 500, "detail": str(e)})
+    
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if scenario_task is not None:
+            scenario_task.cancel()
+
+
 @router.post("/api/expand-node")
 async def expand_node(
     request: Request,
-    db: Session = Depends(get_db)
+    stream: bool = False,
+    current_user: dict = Depends(get_current_user)
 ):
     """
     Expand a node by generating 3 child scenarios using node_maker agent
     Supports multi-level branching with different focuses per level
+    
+    With ?stream=true the children are sent as NDJSON lines as soon as each
+    is generated: {"event": "scenario", "index", "scenario"} per child, then
+    {"event": "done", "branch_level", "count"} or {"event": "error",
+    "status", "detail"}.
     """
     try:
-        # Verify user is authenticated
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(status_code=401, detail="Missing or invalid authorization token")
-        
-        token = auth_header.replace("Bearer ", "")
-        get_current_user_from_token(token)
-        
         # Get request body
         body = await request.json()
         parent_scenario = body.get("parent_scenario")
@@ -283,9 +544,14 @@ async def expand_node(
         if not isinstance(branch_level, int) or branch_level < 1 or branch_level > 10:
             raise HTTPException(status_code=400, detail="branch_level must be between 1 and 10")
         
+        if stream:
+            return StreamingResponse(
+                _ndjson_expansion(parent_scenario, user_profile, branch_level),
+                media_type="application/x-ndjson"
+            )
+        
         # Generate 3 child scenarios using node_maker with specific branch level focus
-        from .interview_service import generate_child_scenarios
-        child_scenarios = generate_child_scenarios(parent_scenario, user_profile, branch_level)
+        child_scenarios = await generate_child_scenarios(parent_scenario, user_profile, branch_level)
         
         return {
             "success": True,
@@ -295,6 +561,198 @@ async def expand_node(
         
     except HTTPException:
         raise
+    except LLMUnavailableError as e:
+        raise _service_unavailable(e)
     except Exception as e:
         print(f"Error expanding node: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _ndjson_expansion(parent_scenario: dict, user_profile: dict, branch_level: int):
+    """NDJSON lines for a streamed /api/expand-node response"""
+    count = 0
+    try:
+        async for scenario in stream_child_scenarios(parent_scenario, user_profile, branch_level):
+            yield json.dumps({"event": "scenario", "index": count, "scenario": scenario}) + "\n"
+            count += 1
+    except LLMUnavailableError as e:
+        yield json.dumps({
+            "event": "error",
+            "status": 503,
+            "detail": str(e),
+            "retry_after": round(e.retry_after)
+        }) + "\n"
+        return
+    except Exception as e:
+        print(f"Error streaming node expansion: {e}")
+        yield json.dumps({"event": "error", "status": 500, "detail": str(e)}) + "\n"
+        return
+    
+    yield json.dumps({"event": "done", "branch_level": branch_level, "count": count}) + "\n"
+
+
+@router.post("/api/expand-nodes", response_model=BatchExpandResponse)
+async def expand_nodes(
+    batch_request: BatchExpandRequest,
+    stream: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Expand several nodes concurrently in one round-trip
+    
+    Each item is generated through the same path as /api/expand-node, with
+    at most `expand_batch_concurrency` LLM calls in flight. Failures are
+    reported per item. With ?stream=true, results are sent as NDJSON lines
+    ({"id": ..., ...result}) in completion order instead of a single map.
+    """
+    if not batch_request.expansions:
+        raise HTTPException(status_code=400, detail="expansions must not be empty")
+    
+    if len(batch_request.expansions) > settings.expand_batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.expand_batch_max_items} expansions per batch"
+        )
+    
+    item_ids = [item.id for item in batch_request.expansions]
+    if len(set(item_ids)) != len(item_ids):
+        raise HTTPException(status_code=400, detail="Expansion ids must be unique")
+    
+    # Invalid items are reported per node rather than failing the batch
+    results = {}
+    valid_items = []
+    for item in batch_request.expansions:
+        user_profile = item.user_profile or batch_request.user_profile
+        if not item.parent_scenario or not user_profile:
+            error = "Missing parent_scenario or user_profile"
+        elif item.branch_level < 1 or item.branch_level > 10:
+            error = "branch_level must be between 1 and 10"
+        else:
+            valid_items.append((item.id, item.parent_scenario, user_profile, item.branch_level))
+            continue
+        results[item.id] = {"success": False, "branch_level": item.branch_level, "error": error}
+    
+    batch = generate_child_scenarios_batch(valid_items, settings.expand_batch_concurrency)
+    
+    if stream:
+        async def ndjson_stream():
+            for item_id, result in results.items():
+                yield json.dumps({"id": item_id, **result}) + "\n"
+            async for item_id, result in batch:
+                yield json.dumps({"id": item_id, **result}) + "\n"
+        
+        return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+    
+    async for item_id, result in batch:
+        results[item_id] = result
+    
+    return BatchExpandResponse(results=results)
+
+
+@router.get("/api/interview/tree/{session_id}", response_model=ScenarioTreeResponse)
+async def get_interview_scenario_tree(
+    session_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Every persisted scenario node of an interview, parents before children"""
+    try:
+        session = await get_owned_session(db, session_id, current_user["user_id"])
+        nodes = await get_scenario_tree(db, session)
+        
+        return ScenarioTreeResponse(
+            session_id=session_id,
+            nodes=[node_to_dict(node) for node in nodes]
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        print(f"Error loading scenario tree: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/scenario-nodes/{node_id}/subtree", response_model=ScenarioTreeResponse)
+async def get_scenario_subtree(
+    node_id: int,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """A node and all of its descendants"""
+    try:
+        node = await get_owned_node(db, node_id, current_user["user_id"])
+        session = await db.get(InterviewSession, node.interview_session_id)
+        nodes = await get_scenario_tree(db, session, path_prefix=node.path)
+        
+        return ScenarioTreeResponse(
+            session_id=session.session_id,
+            nodes=[node_to_dict(node) for node in nodes]
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        print(f"Error loading scenario subtree: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/api/scenario-nodes/{node_id}/expand", response_model=ExpandScenarioNodeResponse)
+async def expand_persisted_node(
+    node_id: int,
+    expand_request: Optional[ExpandScenarioNodeRequest] = None,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Expand a stored node; children already generated at the requested
+    branch level are returned from the database without an LLM call
+    """
+    try:
+        node = await get_owned_node(db, node_id, current_user["user_id"])
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    branch_level = expand_request.branch_level if expand_request else None
+    if branch_level is None:
+        branch_level = next_branch_level(node.depth)
+    if branch_level < 1 or branch_level > 10:
+        raise HTTPException(status_code=400, detail="branch_level must be between 1 and 10")
+    
+    try:
+        children, generated = await expand_scenario_node(db, node, branch_level)
+        
+        # Get the most promising child's next level ready before it is clicked
+        prefetch_expansions(current_user["user_id"], children)
+        
+        return ExpandScenarioNodeResponse(
+            success=True,
+            node_id=node_id,
+            branch_level=branch_level,
+            generated=generated,
+            children=[node_to_dict(child) for child in children]
+        )
+        
+    except LLMUnavailableError as e:
+        raise _service_unavailable(e)
+    except Exception as e:
+        print(f"Error expanding scenario node {node_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/expand-node/cache")
+async def expand_node_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Hit/miss counters for the expand-node result cache"""
+    return expansion_cache.stats()
+
+
+@router.delete("/api/expand-node/cache")
+async def invalidate_expand_node_cache(
+    key: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Invalidate one cached expansion by key, or the whole cache (admins only)"""
+    if current_user["email"] not in settings.admin_emails:
+        raise HTTPException(status_code=403, detail="Only admins can invalidate the expansion cache")
+    
+    removed = await expansion_cache.invalidate(key)
+    return {"removed": removed}
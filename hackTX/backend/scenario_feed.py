@@ -0,0 +1,62 @@
+"""
+In-process fan-out of root scenarios while the post-interview job streams them
+"""
+import asyncio
+from typing import Any, Dict, List, Set
+
+TERMINAL_EVENTS = ("done", "failed")
+
+
+class ScenarioFeed:
+    """
+    Publish per-session events ("reset", "scenario", "done", "failed") to
+    every subscribed client
+
+    Scenario events of the generation in progress are buffered so a client
+    that subscribes late still receives the earlier ones. Only subscribers
+    in this process are reached; clients should fall back to the stored
+    status for jobs that run elsewhere.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._buffered: Dict[str, List[Dict]] = {}
+
+    def subscribe(self, session_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self._buffered.get(session_id, []):
+            queue.put_nowait(event)
+        self._subscribers.setdefault(session_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, session_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(session_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[session_id]
+
+    def publish(self, session_id: str, event: str, data: Any = None) -> None:
+        message = {"event": event, "data": data}
+
+        if event == "reset":
+            self._buffered[session_id] = []
+        elif event == "scenario":
+            self._buffered.setdefault(session_id, []).append(message)
+        elif event in TERMINAL_EVENTS:
+            self._buffered.pop(session_id, None)
+
+        for queue in self._subscribers.get(session_id, ()):
+            queue.put_nowait(message)
+
+    def end_generation(self, session_id: str) -> None:
+        """
+        Drop what a generation attempt buffered if it ended without a
+        terminal event (it raised or was cancelled)
+
+        Subscribers get "reset" so they discard its partial scenarios and
+        wait for a retry, a terminal event or the stored status.
+        """
+        if session_id in self._buffered:
+            self.publish(session_id, "reset")
+            del self._buffered[session_id]
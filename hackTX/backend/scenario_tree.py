@@ -0,0 +1,166 @@
+"""
+Persisted scenario trees: root scenarios and their expansions per session
+"""
+from typing import Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .compaction import unpack_archive
+from .models import InterviewSession, ScenarioNode
+
+
+def node_to_dict(node: ScenarioNode) -> Dict:
+    """API representation of a node"""
+    return {
+        "id": node.id,
+        "parent_id": node.parent_id,
+        "depth": node.depth,
+        "branch_level": node.branch_level,
+        "position": node.position,
+        "scenario": node.scenario
+    }
+
+
+def next_branch_level(depth: int) -> int:
+    """Branch level a node at `depth` is expanded at by default"""
+    return min(depth + 1, 10)
+
+
+def child_path(parent: ScenarioNode, branch_level: int, position: int) -> str:
+    return f"{parent.path}{branch_level}.{position}/"
+
+
+def seed_root_nodes(db: AsyncSession, session_pk: int, scenarios: List[Dict]) -> List[ScenarioNode]:
+    """Add the session's initial scenarios as depth-0 nodes (caller commits)"""
+    nodes = [
+        ScenarioNode(
+            interview_session_id=session_pk,
+            parent_id=None,
+            depth=0,
+            branch_level=None,
+            position=position,
+            path=f"{position}/",
+            scenario=scenario
+        )
+        for position, scenario in enumerate(scenarios)
+    ]
+    db.add_all(nodes)
+    return nodes
+
+
+async def get_owned_session(db: AsyncSession, session_id: str, user_id: int) -> InterviewSession:
+    """Load a session belonging to `user_id` or raise ValueError"""
+    result = await db.execute(
+        select(InterviewSession).where(
+            InterviewSession.session_id == session_id,
+            InterviewSession.user_id == user_id
+        )
+    )
+    session = result.scalar_one_or_none()
+    if session is None:
+        raise ValueError(f"Interview session {session_id} not found")
+    return session
+
+
+async def get_owned_node(db: AsyncSession, node_id: int, user_id: int) -> ScenarioNode:
+    """Load a node from one of `user_id`'s sessions or raise ValueError"""
+    result = await db.execute(
+        select(ScenarioNode)
+        .join(InterviewSession, ScenarioNode.interview_session_id == InterviewSession.id)
+        .where(ScenarioNode.id == node_id, InterviewSession.user_id == user_id)
+    )
+    node = result.scalar_one_or_none()
+    if node is None:
+        raise ValueError(f"Scenario node {node_id} not found")
+    return node
+
+
+async def ensure_root_nodes(db: AsyncSession, session: InterviewSession) -> None:
+    """Seed nodes for sessions completed before the tree was persisted"""
+    result = await db.execute(
+        select(ScenarioNode.id)
+        .where(ScenarioNode.interview_session_id == session.id, ScenarioNode.depth == 0)
+        .limit(1)
+    )
+    if result.first() is not None:
+        return
+
+    # The scenarios document is only read when there is something to seed
+    result = await db.execute(
+        select(InterviewSession.financing_scenarios, InterviewSession.archive)
+        .where(InterviewSession.id == session.id)
+    )
+    scenarios, archive = result.one()
+    if archive is not None:
+        scenarios = unpack_archive(archive).get("financing_scenarios")
+    if not scenarios:
+        return
+
+    seed_root_nodes(db, session.id, scenarios)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request seeded them first
+        await db.rollback()
+
+
+async def load_subtree(db: AsyncSession, session_pk: int, path_prefix: str = "") -> List[ScenarioNode]:
+    """
+    Every node of a session whose path starts with `path_prefix` (the whole
+    tree when empty), parents before children, in one indexed query
+    
+    Paths only contain digits, "." and "/", so the prefix needs no LIKE escaping.
+    """
+    statement = select(ScenarioNode).where(ScenarioNode.interview_session_id == session_pk)
+    if path_prefix:
+        statement = statement.where(ScenarioNode.path.startswith(path_prefix))
+
+    result = await db.execute(statement.order_by(ScenarioNode.depth, ScenarioNode.parent_id, ScenarioNode.position))
+    return list(result.scalars().all())
+
+
+async def load_children(db: AsyncSession, node_id: int, branch_level: int) -> List[ScenarioNode]:
+    """Children already generated for a node at `branch_level`"""
+    result = await db.execute(
+        select(ScenarioNode)
+        .where(ScenarioNode.parent_id == node_id, ScenarioNode.branch_level == branch_level)
+        .order_by(ScenarioNode.position)
+    )
+    return list(result.scalars().all())
+
+
+async def store_children(
+    db: AsyncSession,
+    parent: ScenarioNode,
+    branch_level: int,
+    scenarios: List[Dict]
+) -> List[ScenarioNode]:
+    """
+    Persist generated children of `parent`; if another request stored the
+    same expansion first, its rows are returned instead
+    """
+    # Read before commit: a rollback expires every loaded object
+    parent_id = parent.id
+    children = [
+        ScenarioNode(
+            interview_session_id=parent.interview_session_id,
+            parent_id=parent_id,
+            depth=parent.depth + 1,
+            branch_level=branch_level,
+            position=position,
+            path=child_path(parent, branch_level, position),
+            scenario=scenario
+        )
+        for position, scenario in enumerate(scenarios)
+    ]
+    db.add_all(children)
+
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return await load_children(db, parent_id, branch_level)
+
+    return children
@@ -0,0 +1,255 @@
+"""
+Incremental extraction of the interview's profile slots from each answer
+
+Structured slots (income, credit score, lease/buy, city/state) are parsed
+deterministically from any answer. Free-text slots take the user's answer
+when the interviewer's question asked for that slot alone. Those are a
+heuristic guess ("Sure, it's John" gives the name "Sure"), so the reviewer
+agent checks them against the transcript; only parsed slots are trusted
+as they are.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+# The 11 fields the interviewer collects, in the order it asks for them
+SLOTS = (
+    "name",
+    "location",
+    "current_vehicle",
+    "title",
+    "income",
+    "credit_score",
+    "goal",
+    "preferred_lease_or_buy",
+    "vehicle_preferences",
+    "interests",
+    "skills",
+)
+
+SLOT_LABELS = {
+    "name": "name",
+    "location": "location (city, state)",
+    "current_vehicle": "current vehicle",
+    "title": "professional title/role",
+    "income": "annual income",
+    "credit_score": "credit score",
+    "goal": "primary goal",
+    "preferred_lease_or_buy": "buying or leasing preference",
+    "vehicle_preferences": "vehicle preferences",
+    "interests": "interests outside of cars",
+    "skills": "skills",
+}
+
+# Which slots an interviewer question asks for
+_QUESTION_PATTERNS = {
+    "name": r"\bname\b",
+    "location": r"\b(where|located|location|live|city|state)\b",
+    "current_vehicle": r"\b(currently (own|drive|have)|current (vehicle|car)|trade[- ]in|drive now)\b",
+    "title": r"\b(work|job|title|profession|occupation|role|career|for a living)\b",
+    "income": r"\b(income|salary|earn|annual(ly)?)\b",
+    "credit_score": r"\bcredit\b",
+    "goal": r"\b(goals?|hoping to|trying to|main reason|achieve)\b",
+    "preferred_lease_or_buy": r"\b(leas(e|ing)|buy(ing)?|purchas(e|ing))\b",
+    "vehicle_preferences": r"\b(models?|features?|vehicle types?|preferences?|looking for in)\b",
+    "interests": r"\b(interests|hobby|hobbies|free time|for fun)\b",
+    "skills": r"\bskills?\b",
+}
+
+_REFUSAL = re.compile(
+    r"^\s*(i\s+(don'?t|do not)\s+know|not sure|no idea|prefer not|rather not|skip|n/?a|pass)\b",
+    re.IGNORECASE
+)
+_NONE_ANSWER = re.compile(r"^\s*(no|nope|none|nothing|i don'?t( have (one|a car|a vehicle))?)\s*[.!]?\s*$", re.IGNORECASE)
+_PREAMBLE = re.compile(
+    r"^\s*(?:(?:my name is|my name's|call me|i'?m|i am|it'?s|it is|i live in|i'?m in|i'?m based in|"
+    r"based in|i work as|i drive|i currently drive|i have|i'?d say|probably|mostly|well,?|an?)\s+)+",
+    re.IGNORECASE
+)
+
+_MONEY = re.compile(
+    r"(\$)?\s*(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*(k|thousand|m|mil|million)?\b",
+    re.IGNORECASE
+)
+_MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "m": 1e6, "mil": 1e6, "million": 1e6}
+_HOURLY = re.compile(r"\b(an|per|a|/)\s*(hour|hr)\b|\bhourly\b", re.IGNORECASE)
+_MONTHLY = re.compile(r"\b(a|per|/)\s*(month|mo)\b|\bmonthly\b", re.IGNORECASE)
+_INCOME_CONTEXT = re.compile(r"\b(income|salary|make|making|earn|earning|a year|per year|annually)\b", re.IGNORECASE)
+
+_CREDIT_CONTEXT = re.compile(r"\b(credit|score|fico)\b", re.IGNORECASE)
+_CREDIT_SCORE = re.compile(r"(?<![\d$.,])([3-8]\d{2})(?:\s*(?:-|to)\s*([3-8]\d{2}))?(?![\d,]|\s*k\b)", re.IGNORECASE)
+
+_LEASE = re.compile(r"\bleas(e|ing)\b", re.IGNORECASE)
+_BUY = re.compile(r"\b(buy(ing)?|purchas(e|ing)|financ(e|ing)|own(ing)? it)\b", re.IGNORECASE)
+_NEGATION = re.compile(r"\b(not|don'?t|never|no|rather than|instead of)\s+(\w+\s+){0,2}$", re.IGNORECASE)
+
+US_STATES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA",
+    "colorado": "CO", "connecticut": "CT", "delaware": "DE", "florida": "FL", "georgia": "GA",
+    "hawaii": "HI", "idaho": "ID", "illinois": "IL", "indiana": "IN", "iowa": "IA",
+    "kansas": "KS", "kentucky": "KY", "louisiana": "LA", "maine": "ME", "maryland": "MD",
+    "massachusetts": "MA", "michigan": "MI", "minnesota": "MN", "mississippi": "MS", "missouri": "MO",
+    "montana": "MT", "nebraska": "NE", "nevada": "NV", "new hampshire": "NH", "new jersey": "NJ",
+    "new mexico": "NM", "new york": "NY", "north carolina": "NC", "north dakota": "ND", "ohio": "OH",
+    "oklahoma": "OK", "oregon": "OR", "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC",
+    "south dakota": "SD", "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT",
+    "virginia": "VA", "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+    "district of columbia": "DC",
+}
+_STATE_CODES = set(US_STATES.values())
+_STATE_NAMES = "|".join(sorted(US_STATES, key=len, reverse=True))
+_CITY = r"([A-Z][A-Za-z.'-]*(?:\s+[A-Z][A-Za-z.'-]*){0,3})"
+_CITY_STATE = re.compile(_CITY + r",?\s+((?i:" + _STATE_NAMES + r")|[A-Z]{2})\b")
+
+
+def targeted_slots(question: str) -> List[str]:
+    """Slots the interviewer's question asks for, ignoring non-question sentences"""
+    asked = [sentence for sentence in re.split(r"(?<=[.!?])\s+", question) if sentence.endswith("?")]
+    question = " ".join(asked or [question]).lower()
+    return [slot for slot, pattern in _QUESTION_PATTERNS.items() if re.search(pattern, question)]
+
+
+def parse_income(answer: str, asked: bool = False) -> Optional[float]:
+    """Annual income in USD, e.g. "$85,000", "85k a year" or "$40 an hour" """
+    if not asked and not _INCOME_CONTEXT.search(answer):
+        return None
+
+    for match in _MONEY.finditer(answer):
+        dollar, number, unit = match.groups()
+        value = float(number.replace(",", "")) * _MULTIPLIERS.get((unit or "").lower(), 1)
+        rest = answer[match.end():match.end() + 16]
+        if _HOURLY.search(rest):
+            value *= 2080
+        elif _MONTHLY.search(rest):
+            value *= 12
+        elif value < 1000:
+            # A bare small number is a credit score, age or year, not income
+            continue
+        if dollar or unit or value >= 10000:
+            return value
+    return None
+
+
+def parse_credit_score(answer: str, asked: bool = False) -> Optional[int]:
+    """A FICO-range score such as "720" or "700-750" (the midpoint)"""
+    if not asked and not _CREDIT_CONTEXT.search(answer):
+        return None
+
+    for match in _CREDIT_SCORE.finditer(answer):
+        low = int(match.group(1))
+        high = int(match.group(2)) if match.group(2) else low
+        if 300 <= low <= 850 and 300 <= high <= 850:
+            return (low + high) // 2
+    return None
+
+
+def _counts(pattern: re.Pattern, answer: str) -> int:
+    """Non-negated matches of `pattern`; negated ones count as -1"""
+    total = 0
+    for match in pattern.finditer(answer):
+        total += -1 if _NEGATION.search(answer[:match.start()]) else 1
+    return total
+
+
+def parse_lease_or_buy(answer: str) -> Optional[str]:
+    """"lease" or "buy" when the answer clearly favours one"""
+    lease = _counts(_LEASE, answer)
+    buy = _counts(_BUY, answer)
+    if lease > 0 and buy <= 0:
+        return "lease"
+    if buy > 0 and lease <= 0:
+        return "buy"
+    if lease < 0 and buy == 0:
+        return "buy"
+    if buy < 0 and lease == 0:
+        return "lease"
+    return None
+
+
+def parse_location(answer: str) -> Optional[str]:
+    """"City, ST" from text like "Austin, Texas" or "I live in Plano TX" """
+    for match in _CITY_STATE.finditer(answer):
+        city, state = match.groups()
+        code = US_STATES.get(state.lower(), state.upper())
+        words = city.split()
+        if code not in _STATE_CODES or words[0] in ("I", "I'm"):
+            continue
+        return f"{' '.join(words)}, {code}"
+    return None
+
+
+def _free_text(slot: str, answer: str) -> Optional[str]:
+    """The answer as a free-text slot value, or None if it is not usable"""
+    if _REFUSAL.match(answer):
+        return None
+    if _NONE_ANSWER.match(answer):
+        return "None" if slot == "current_vehicle" else None
+
+    value = _PREAMBLE.sub("", answer).strip().rstrip(".!")
+    if not value:
+        return None
+
+    if slot == "name":
+        words = re.match(r"[A-Z][\w'-]*(?:\s+[A-Z][\w'-]*){0,2}", value)
+        return words.group(0) if words else None
+    return value
+
+
+def update_slot_state(state: Optional[Dict], question: str, answer: str, turn: int) -> Dict:
+    """
+    Return `state` updated with the slots found in `answer` to `question`
+
+    Each filled slot is stored as {"value", "source", "turn"} where source
+    is "parsed" for structured values and "answer" for free text. A later
+    answer replaces an earlier one, except that a free-text answer never
+    replaces a parsed value.
+    """
+    slots = dict((state or {}).get("slots", {}))
+    asked = targeted_slots(question)
+    found: Dict[str, Any] = {}
+
+    found["income"] = parse_income(answer, asked="income" in asked)
+    found["credit_score"] = parse_credit_score(answer, asked="credit_score" in asked)
+    found["location"] = parse_location(answer)
+    if "preferred_lease_or_buy" in asked or _LEASE.search(answer):
+        found["preferred_lease_or_buy"] = parse_lease_or_buy(answer)
+
+    for slot, value in found.items():
+        if value is not None:
+            slots[slot] = {"value": value, "source": "parsed", "turn": turn}
+
+    # Free text is only attributable when the question asked for one thing
+    if len(asked) == 1 and asked[0] not in found:
+        slot = asked[0]
+        value = _free_text(slot, answer)
+        if value is not None and slots.get(slot, {}).get("source") != "parsed":
+            slots[slot] = {"value": value, "source": "answer", "turn": turn}
+
+    return {"slots": slots}
+
+
+def missing_slots(state: Optional[Dict]) -> List[str]:
+    """Slots not filled yet, in interview order"""
+    slots = (state or {}).get("slots", {})
+    return [slot for slot in SLOTS if slot not in slots]
+
+
+def unconfirmed_slots(state: Optional[Dict]) -> List[str]:
+    """Slots filled only from free text, which the reviewer must confirm"""
+    slots = (state or {}).get("slots", {})
+    return [slot for slot in SLOTS if slot in slots and slots[slot]["source"] != "parsed"]
+
+
+def slot_values(state: Optional[Dict]) -> Dict[str, Any]:
+    """Filled slot values keyed like the reviewer's profile fields"""
+    slots = (state or {}).get("slots", {})
+    return {slot: slots[slot]["value"] for slot in SLOTS if slot in slots}
+
+
+def parsed_slot_values(state: Optional[Dict]) -> Dict[str, Any]:
+    """Only the deterministically parsed slot values"""
+    slots = (state or {}).get("slots", {})
+    return {
+        slot: slots[slot]["value"]
+        for slot in SLOTS
+        if slot in slots and slots[slot]["source"] == "parsed"
+    }
@@ -7,6 +7,16 @@ function getAuthToken(): string | null {
   );
 }
 
+// Headers for answer submissions; reusing a key when retrying the same
+// answer makes the server replay its first response instead of answering twice
+function getAnswerHeaders(idempotencyKey?: string): HeadersInit {
+  const headers = getAuthHeaders() as Record<string, string>;
+  if (idempotencyKey) {
+    headers["Idempotency-Key"] = idempotencyKey;
+  }
+  return headers;
+}
+
 // Headers with authentication
 function getAuthHeaders(): HeadersInit {
   const token = getAuthToken();
@@ -24,6 +34,63 @@ function getAuthHeaders(): HeadersInit {
   return headers;
 }
 
+// Call onEvent for each Server-Sent Event in a streamed response body
+async function readServerSentEvents(
+  body: ReadableStream<Uint8Array>,
+  onEvent: (eventName: string, eventData: Record<string, unknown>) => void
+): Promise<void> {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // SSE events are separated by a blank line
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+
+      let eventName = "message";
+      let payload = "";
+      for (const line of rawEvent.split("\n")) {
+        if (line.startsWith("event: ")) eventName = line.slice(7);
+        else if (line.startsWith("data: ")) payload += line.slice(6);
+      }
+
+      onEvent(eventName, payload ? JSON.parse(payload) : {});
+    }
+  }
+}
+
+// Call onLine for each JSON line of a streamed NDJSON response body
+async function readNdjson(
+  body: ReadableStream<Uint8Array>,
+  onLine: (line: Record<string, unknown>) => void
+): Promise<void> {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let newline = buffer.indexOf("\n");
+    while (newline !== -1) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      newline = buffer.indexOf("\n");
+      if (line) onLine(JSON.parse(line));
+    }
+  }
+}
+
 export interface InterviewStartResponse {
   session_id: string;
   question: string;
@@ -39,12 +106,83 @@ export interface InterviewAnswerResponse {
   is_complete: boolean;
 }
 
+export type ProcessingStatus =
+  | "queued"
+  | "reviewing"
+  | "generating"
+  | "done"
+  | "failed";
+
 export interface InterviewStatusResponse {
   session_id: string;
   is_complete: boolean;
+  processing_status: ProcessingStatus | null;
+  processing_error: string | null;
   scenarios: Record<string, unknown>[] | null;
 }
 
+export interface InterviewSessionSummary {
+  session_id: string;
+  is_complete: boolean;
+  processing_status: ProcessingStatus | null;
+  created_at: string | null;
+  completed_at: string | null;
+}
+
+export interface InterviewSessionListResponse {
+  sessions: InterviewSessionSummary[];
+  next_cursor: string | null;
+}
+
+export interface BatchExpandItem {
+  id: string;
+  parent_scenario: Record<string, unknown>;
+  user_profile?: Record<string, unknown>;
+  branch_level?: number;
+}
+
+export interface BatchExpandResult {
+  success: boolean;
+  branch_level: number;
+  children: Record<string, unknown>[] | null;
+  error: string | null;
+}
+
+export interface ScenarioNode {
+  id: number;
+  parent_id: number | null;
+  depth: number;
+  branch_level: number | null;
+  position: number;
+  scenario: Record<string, unknown>;
+}
+
+export interface ScenarioTreeResponse {
+  session_id: string;
+  nodes: ScenarioNode[];
+}
+
+export interface ExpandScenarioNodeResponse {
+  success: boolean;
+  node_id: number;
+  branch_level: number;
+  generated: boolean;
+  children: ScenarioNode[];
+}
+
+// Message pushed on the interview WebSocket: "ready", "chunk", "complete",
+// "done", "error", then "reset", "scenario", "done" or "failed" once the
+// interview is complete
+export interface InterviewSocketEvent {
+  event: string;
+  data: Record<string, unknown> | null;
+}
+
+export interface InterviewSocket {
+  sendAnswer: (answer: string) => void;
+  close: () => void;
+}
+
 export const interviewAPI = {
   // Start a new interview session
   async startInterview(): Promise<InterviewStartResponse> {
@@ -64,11 +202,12 @@ export const interviewAPI = {
 
   // Submit an answer and get next question
   async submitAnswer(
-    data: InterviewAnswerRequest
+    data: InterviewAnswerRequest,
+    idempotencyKey?: string
   ): Promise<InterviewAnswerResponse> {
     const response = await fetch(`${API_BASE_URL}/api/interview/answer`, {
       method: "POST",
-      headers: getAuthHeaders(),
+      headers: getAnswerHeaders(idempotencyKey),
       credentials: "include",
       body: JSON.stringify(data),
     });
@@ -81,6 +220,137 @@ export const interviewAPI = {
     return response.json();
   },
 
+  // Submit an answer and stream the next question as it is generated.
+  // onChunk receives text deltas; the resolved value is the final answer.
+  async submitAnswerStream(
+    data: InterviewAnswerRequest,
+    onChunk: (text: string) => void,
+    idempotencyKey?: string
+  ): Promise<InterviewAnswerResponse> {
+    const response = await fetch(`${API_BASE_URL}/api/interview/answer/stream`, {
+      method: "POST",
+      headers: getAnswerHeaders(idempotencyKey),
+      credentials: "include",
+      body: JSON.stringify(data),
+    });
+
+    if (!response.ok || !response.body) {
+      const error = await response.text();
+      throw new Error(`Failed to submit answer: ${error}`);
+    }
+
+    let result: InterviewAnswerResponse | null = null;
+
+    await readServerSentEvents(response.body, (eventName, eventData) => {
+      if (eventName === "chunk") {
+        onChunk(eventData.text as string);
+      } else if (eventName === "done") {
+        result = eventData as unknown as InterviewAnswerResponse;
+      } else if (eventName === "error") {
+        // The answer was not saved; it can be submitted again
+        throw new Error(`Failed to submit answer: ${eventData.detail}`);
+      }
+    });
+
+    if (!result) {
+      throw new Error("Answer stream ended before the final message");
+    }
+
+    return result;
+  },
+
+  // Receive a completed interview's scenarios as they are generated;
+  // onReset means a retried job starts over and shown scenarios are stale
+  async streamScenarios(
+    sessionId: string,
+    onScenario: (scenario: Record<string, unknown>, index: number) => void,
+    onReset: () => void = () => {}
+  ): Promise<number> {
+    const response = await fetch(
+      `${API_BASE_URL}/api/interview/scenarios/${sessionId}/stream`,
+      {
+        method: "GET",
+        headers: getAuthHeaders(),
+        credentials: "include",
+      }
+    );
+
+    if (!response.ok || !response.body) {
+      const error = await response.text();
+      throw new Error(`Failed to stream scenarios: ${error}`);
+    }
+
+    let count: number | null = null;
+    await readServerSentEvents(response.body, (eventName, eventData) => {
+      if (eventName === "scenario") {
+        onScenario(
+          eventData.scenario as Record<string, unknown>,
+          eventData.index as number
+        );
+      } else if (eventName === "reset") {
+        onReset();
+      } else if (eventName === "done") {
+        count = eventData.count as number;
+      } else if (eventName === "failed") {
+        throw new Error(`Failed to generate scenarios: ${eventData.error}`);
+      }
+    });
+
+    if (count === null) {
+      throw new Error("Scenario stream ended before the final message");
+    }
+
+    return count;
+  },
+
+  // Run the interview over one WebSocket: answers go out with sendAnswer,
+  // replies, streamed chunks and scenarios arrive through onEvent
+  connectInterview(
+    sessionId: string,
+    onEvent: (event: InterviewSocketEvent) => void,
+    onClose: (code: number) => void = () => {}
+  ): InterviewSocket {
+    const wsBase = API_BASE_URL.replace(/^http/, "ws");
+    const token = encodeURIComponent(getAuthToken() ?? "");
+    const socket = new WebSocket(`${wsBase}/ws/interview/${sessionId}?token=${token}`);
+
+    socket.onmessage = (message) => {
+      onEvent(JSON.parse(message.data) as InterviewSocketEvent);
+    };
+    socket.onclose = (event) => onClose(event.code);
+
+    return {
+      sendAnswer: (answer: string) => socket.send(JSON.stringify({ answer })),
+      close: () => socket.close(),
+    };
+  },
+
+  // List the user's past interviews, newest first; pass next_cursor to
+  // fetch the following page
+  async listSessions(
+    cursor?: string | null,
+    limit: number = 20
+  ): Promise<InterviewSessionListResponse> {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (cursor) params.set("cursor", cursor);
+
+    const response = await fetch(
+      `${API_BASE_URL}/api/interview/sessions?${params}`,
+      {
+        method: "GET",
+        headers: getAuthHeaders(),
+        credentials: "include",
+      }
+    );
+
+    if (!response.ok) {
+      const error = await response.text();
+      throw new Error(`Failed to list interviews: ${error}`);
+    }
+
+    return response.json();
+  },
+
   // Check interview status
   async checkStatus(sessionId: string): Promise<InterviewStatusResponse> {
     const response = await fetch(
@@ -141,4 +411,111 @@ export const interviewAPI = {
     console.log("API Response Success:", data);
     return data;
   },
+
+  // Expand a node, receiving each child as soon as it is generated
+  async expandNodeStream(
+    parentScenario: Record<string, unknown>,
+    userProfile: Record<string, unknown>,
+    branchLevel: number,
+    onScenario: (scenario: Record<string, unknown>, index: number) => void
+  ): Promise<number> {
+    const response = await fetch(
+      `${API_BASE_URL}/api/expand-node?stream=true`,
+      {
+        method: "POST",
+        headers: getAuthHeaders(),
+        credentials: "include",
+        body: JSON.stringify({
+          parent_scenario: parentScenario,
+          user_profile: userProfile,
+          branch_level: branchLevel,
+        }),
+      }
+    );
+
+    if (!response.ok || !response.body) {
+      const errorText = await response.text();
+      throw new Error(`Failed to expand node: ${errorText}`);
+    }
+
+    let count: number | null = null;
+    await readNdjson(response.body, (line) => {
+      if (line.event === "scenario") {
+        onScenario(line.scenario as Record<string, unknown>, line.index as number);
+      } else if (line.event === "done") {
+        count = line.count as number;
+      } else if (line.event === "error") {
+        throw new Error(`Failed to expand node: ${line.detail}`);
+      }
+    });
+
+    if (count === null) {
+      throw new Error("Expansion stream ended before the final message");
+    }
+
+    return count;
+  },
+
+  // Expand several nodes concurrently in one request
+  async expandNodes(
+    expansions: BatchExpandItem[],
+    userProfile?: Record<string, unknown>
+  ): Promise<Record<string, BatchExpandResult>> {
+    const response = await fetch(`${API_BASE_URL}/api/expand-nodes`, {
+      method: "POST",
+      headers: getAuthHeaders(),
+      credentials: "include",
+      body: JSON.stringify({ expansions, user_profile: userProfile }),
+    });
+
+    if (!response.ok) {
+      const errorText = await response.text();
+      throw new Error(`Failed to expand nodes: ${errorText}`);
+    }
+
+    const data = await response.json();
+    return data.results;
+  },
+
+  // Load every stored node of an interview's scenario tree
+  async getScenarioTree(sessionId: string): Promise<ScenarioTreeResponse> {
+    const response = await fetch(
+      `${API_BASE_URL}/api/interview/tree/${sessionId}`,
+      {
+        method: "GET",
+        headers: getAuthHeaders(),
+        credentials: "include",
+      }
+    );
+
+    if (!response.ok) {
+      const error = await response.text();
+      throw new Error(`Failed to load scenario tree: ${error}`);
+    }
+
+    return response.json();
+  },
+
+  // Expand a stored node; previously generated children come from the server
+  async expandScenarioNode(
+    nodeId: number,
+    branchLevel?: number
+  ): Promise<ExpandScenarioNodeResponse> {
+    const response = await fetch(
+      `${API_BASE_URL}/api/scenario-nodes/${nodeId}/expand`,
+      {
+        method: "POST",
+        headers: getAuthHeaders(),
+        credentials: "include",
+        body: JSON.stringify({ branch_level: branchLevel ?? null }),
+      }
+    );
+
+    if (!response.ok) {
+      const error = await response.text();
+      throw new Error(`Failed to expand node: ${error}`);
+    }
+
+    return response.json();
+  },
 };
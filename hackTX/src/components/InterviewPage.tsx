@@ -108,10 +108,19 @@ export default function InterviewPage() {
       if (response.is_complete) {
         setIsComplete(true);
 
-        // Wait a moment, then check status and load scenarios
-        setTimeout(async () => {
+        // Scenarios are generated in the background; poll until ready
+        const pollStatus = async () => {
           try {
             const status = await interviewAPI.checkStatus(sessionId);
+            if (status.processing_status === "failed") {
+              console.error("Scenario generation failed:", status.processing_error);
+              setError("Interview complete, but failed to load scenarios.");
+              return;
+            }
+            if (status.processing_status !== "done") {
+              setTimeout(pollStatus, 2000);
+              return;
+            }
             if (status.scenarios && status.scenarios.length > 0) {
               setScenarios(status.scenarios);
               console.log("Interview complete! Scenarios:", status.scenarios);
@@ -124,7 +133,8 @@ export default function InterviewPage() {
             console.error("Failed to get scenarios:", err);
             setError("Interview complete, but failed to load scenarios.");
           }
-        }, 2000);
+        };
+        setTimeout(pollStatus, 2000);
       }
 
       setError(null);
@@ -0,0 +1,4 @@
+import os
+
+# backend.database refuses to import without a URL; the tests never connect
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
@@ -0,0 +1,95 @@
+"""
+Locally computed branch levels in backend.finance
+
+Run from the hackTX directory:
+    python -m pytest tests
+"""
+import pytest
+
+from backend.finance import _number, build_child_scenarios, lease_payment
+from backend.models.schemas import FinancingScenario
+
+FINANCE_PARENT = {
+    "plan_type": "finance",
+    "term_months": 60,
+    "down_payment": 3000,
+    "monthly_payment": 450,
+    "interest_rate": 5.9,
+    "suggested_model": "Camry"
+}
+LEASE_PARENT = {
+    "plan_type": "lease",
+    "term_months": 36,
+    "down_payment": 2000,
+    "monthly_payment": 350,
+    "interest_rate": 0.0021,
+    "suggested_model": "RAV4"
+}
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("5.9%", 5.9),
+    ("$1,200", 1200.0),
+    (" 6.25 % ", 6.25),
+    (450, 450.0),
+    ("n/a", 7.0),
+    (None, 7.0)
+])
+def test_number_strips_currency_and_percent(value, expected):
+    assert _number(value, 7.0) == expected
+
+
+def test_percent_string_rate_matches_numeric_rate():
+    as_text = build_child_scenarios({**FINANCE_PARENT, "interest_rate": "5.9%"}, {}, 1)
+    as_number = build_child_scenarios(FINANCE_PARENT, {}, 1)
+    assert as_text == as_number
+
+
+@pytest.mark.parametrize("level", [1, 6, 7, 8, 9])
+def test_every_local_level_returns_three_valid_scenarios(level):
+    scenarios = build_child_scenarios(FINANCE_PARENT, {"income": 85000}, level)
+
+    assert len(scenarios) == 3
+    for scenario in scenarios:
+        FinancingScenario.model_validate(scenario)
+
+
+def test_non_local_level_goes_to_the_llm():
+    assert build_child_scenarios(FINANCE_PARENT, {}, 2) is None
+
+
+@pytest.mark.parametrize("level", [1, 6, 8, 9])
+def test_nothing_financed_goes_to_the_llm_at_loan_levels(level):
+    parent = {**FINANCE_PARENT, "down_payment": 40000, "monthly_payment": 0}
+    assert build_child_scenarios(parent, {}, level) is None
+
+
+@pytest.mark.parametrize("level", [1, 6, 8, 9])
+def test_lease_parent_goes_to_the_llm_at_loan_levels(level):
+    assert build_child_scenarios(LEASE_PARENT, {}, level) is None
+
+
+def test_lease_parent_is_compared_locally_at_lease_vs_buy():
+    scenarios = build_child_scenarios(LEASE_PARENT, {}, 7)
+    assert [scenario["plan_type"] for scenario in scenarios] == ["finance", "lease", "lease"]
+
+
+@pytest.mark.parametrize("down_payment", [0, 15000, 40000])
+def test_lease_payment_never_goes_negative(down_payment):
+    parent = {**FINANCE_PARENT, "down_payment": down_payment, "monthly_payment": 0}
+    _, lease, buyout = build_child_scenarios(parent, {}, 7)
+
+    assert lease["monthly_payment"] > 0
+    # The down payment only reduces the cap cost down to the residual
+    assert lease["down_payment"] <= down_payment
+    assert buyout["total_cost"] >= lease["total_cost"]
+
+
+def test_lease_payment_with_cap_cost_below_residual_is_rent_only():
+    assert float(lease_payment(10000, 12000, 0.0025, 36)) == pytest.approx((10000 + 12000) * 0.0025)
+
+
+@pytest.mark.parametrize("term", [0, -12, "abc"])
+def test_non_positive_term_falls_back_to_the_default(term):
+    scenarios = build_child_scenarios({**FINANCE_PARENT, "term_months": term}, {}, 6)
+    assert all(scenario["term_months"] == 60 for scenario in scenarios)
@@ -0,0 +1,170 @@
+"""
+PromptCache against the fake backend's in-memory cached contents
+
+Run from the hackTX directory:
+    python -m pytest tests
+"""
+import asyncio
+
+import pytest
+
+from backend import prompt_cache as prompt_cache_module
+from backend.llm_backends import FakeLLMBackend
+from backend.prompt_cache import PromptCache
+
+MODEL = "gemini-2.0-flash"
+INSTRUCTION = "You are a friendly Toyota financing interviewer. " * 20
+
+
+class Clock:
+    """Stands in for time.monotonic so TTLs can be crossed instantly"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prompt_cache_module.time, "monotonic", clock)
+    return clock
+
+
+def make_cache(backend, **options):
+    options = {"ttl_seconds": 3600, "refresh_margin_seconds": 300, "retry_after_seconds": 600, **options}
+    return PromptCache(backend, **options)
+
+
+def cached_name(cache, key="interviewer", instruction=INSTRUCTION):
+    return asyncio.run(cache.cached_name(key, MODEL, instruction))
+
+
+def calls(backend, kind):
+    return [call for call in backend.cache_calls if call[0] == kind]
+
+
+def test_first_call_creates_a_cached_content(clock):
+    backend = FakeLLMBackend()
+    cache = make_cache(backend)
+
+    name = cached_name(cache)
+
+    assert name in backend.caches
+    assert backend.caches[name]["instruction"] == INSTRUCTION
+    assert backend.cache_calls == [("create", "tachyon-interviewer", 3600)]
+    assert cache.stats() == {"hits": 0, "misses": 1, "fallbacks": 0, "skipped": 0, "entries": 1}
+
+
+def test_repeated_calls_hit_without_calling_the_backend(clock):
+    backend = FakeLLMBackend()
+    cache = make_cache(backend)
+
+    first = cached_name(cache)
+    clock.now += 60
+    second = cached_name(cache)
+
+    assert first == second
+    assert len(backend.cache_calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_changed_instruction_replaces_the_cached_content(clock):
+    backend = FakeLLMBackend()
+    cache = make_cache(backend)
+
+    old = cached_name(cache)
+    new = cached_name(cache, instruction=INSTRUCTION + "Be brief.")
+
+    assert new != old
+    assert old not in backend.caches
+    assert calls(backend, "delete") == [("delete", old)]
+
+
+def test_entry_near_expiry_is_refreshed_in_place(clock):
+    backend = FakeLLMBackend()
+    cache = make_cache(backend)
+
+    name = cached_name(cache)
+    clock.now += 3600 - 299  # inside the refresh margin
+    refreshed = cached_name(cache)
+
+    assert refreshed == name
+    assert calls(backend, "update") == [("update", name, 3600)]
+    assert len(calls(backend, "create")) == 1
+
+    # The refresh restarted the TTL
+    clock.now += 3000
+    assert cached_name(cache) == name
+    assert len(calls(backend, "update")) == 1
+
+
+def test_expired_entry_is_recreated(clock):
+    backend = FakeLLMBackend()
+    cache = make_cache(backend)
+
+    old = cached_name(cache)
+    clock.now += 3601
+    new = cached_name(cache)
+
+    assert new != old
+    assert calls(backend, "update") == []
+    assert calls(backend, "delete") == [("delete", old)]
+    assert len(calls(backend, "create")) == 2
+
+
+def test_refused_instruction_falls_back_inline_until_the_cool_down_ends(clock):
+    backend = FakeLLMBackend(min_cacheable_chars=len(INSTRUCTION) + 1)
+    cache = make_cache(backend)
+
+    assert cached_name(cache) is None
+    clock.now += 599
+    assert cached_name(cache) is None
+    # No new attempt during the cool-down
+    assert len(calls(backend, "create")) == 1
+    assert cache.stats()["fallbacks"] == 2
+    assert cache.enabled
+
+    backend._min_cacheable_chars = 0
+    clock.now += 2
+    assert cached_name(cache) in backend.caches
+    assert len(calls(backend, "create")) == 2
+
+
+def test_cool_down_is_per_key(clock):
+    backend = FakeLLMBackend(min_cacheable_chars=100)
+    cache = make_cache(backend)
+
+    assert cached_name(cache, key="short", instruction="Reply OK.") is None
+    assert cached_name(cache, key="interviewer") is not None
+
+
+def test_instruction_below_the_minimum_size_is_not_sent_to_the_api(clock):
+    backend = FakeLLMBackend()
+    cache = make_cache(backend, min_tokens=len(INSTRUCTION) // 4 + 1)
+
+    assert cached_name(cache) is None
+    assert cached_name(cache) is None
+    assert backend.cache_calls == []
+    assert cache.stats() == {"hits": 0, "misses": 0, "fallbacks": 0, "skipped": 2, "entries": 0}
+
+
+def test_instruction_at_the_minimum_size_is_cached(clock):
+    backend = FakeLLMBackend()
+    cache = make_cache(backend, min_tokens=len(INSTRUCTION) // 4)
+
+    assert cached_name(cache) in backend.caches
+
+
+def test_close_deletes_every_cached_content(clock):
+    backend = FakeLLMBackend()
+    cache = make_cache(backend)
+    cached_name(cache, key="interviewer")
+    cached_name(cache, key="reviewer", instruction=INSTRUCTION + "Review.")
+
+    asyncio.run(cache.close())
+
+    assert backend.caches == {}
+    assert cache.stats()["entries"] == 0